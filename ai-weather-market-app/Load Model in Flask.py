@@ -2,26 +2,33 @@
 
 from flask import Flask, request, jsonify # type: ignore
 import numpy as np
-import tensorflow as tf # type: ignore
 from sklearn.preprocessing import MinMaxScaler # type: ignore
 import os
+from app.lite_runtime import LiteModel
 
 app = Flask(__name__)
 
-import tensorflow as tf # type: ignore
-
-# Load trained model
-model_path = os.path.join(os.path.dirname(__file__), 'models', 'lstm_weather_model.h5')
-
-model = tf.keras.models.load_model(model_path, compile=False)
+# Load trained model: the TFLite export when present (no TensorFlow import),
+# otherwise the Keras .h5
+tflite_path = os.path.join(os.path.dirname(__file__), 'models', 'lstm_weather_model.tflite')
+if os.path.exists(tflite_path):
+    model = LiteModel(tflite_path)
+else:
+    import tensorflow as tf # type: ignore
+    model_path = os.path.join(os.path.dirname(__file__), 'models', 'lstm_weather_model.h5')
+    model = tf.keras.models.load_model(model_path, compile=False)
 
 @app.route('/predict', methods=['POST'])
 def predict():
     data = request.json
-    input_data = np.array(data['features']).reshape(1, 10, 2)
-    
-    prediction = model.predict(input_data)
-    return jsonify({"predicted_temperature": prediction[0][0]})
+    # `features` may hold one sequence or a list of sequences; all are
+    # scored in one batched call
+    input_data = np.array(data['features'], dtype=np.float32).reshape(-1, 10, 2)
+
+    prediction = model.predict(input_data)[:, 0]
+    if len(prediction) == 1:
+        return jsonify({"predicted_temperature": float(prediction[0])})
+    return jsonify({"predicted_temperature": prediction.tolist()})
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,5 +1,81 @@
+import operator
+
+import numpy as np
+
+NORMAL_IMPACT = "Normal market behavior"
+
+# Each rule flags forecast rows where `variable` `op` `threshold`. A city's
+# score for a rule is `weight` times the fraction of its rows that are
+# flagged. A rule may instead give `fn`, a callable taking the batch and
+# returning a boolean mask (e.g. a model with a decision threshold).
+DEFAULT_RULES = [
+    {"name": "heat", "variable": "temperature_c", "op": ">", "threshold": 25, "weight": 1.0,
+     "impact": "Increased energy demand"},
+    {"name": "heavy_rain", "variable": "precipitation_mm", "op": ">", "threshold": 10, "weight": 1.0,
+     "impact": "Harvest and transport disruption"},
+    {"name": "dry_air", "variable": "humidity_percent", "op": "<", "threshold": 30, "weight": 0.8,
+     "impact": "Crop stress, upward price pressure"},
+    {"name": "high_wind", "variable": "wind_speed_kmh", "op": ">", "threshold": 40, "weight": 0.8,
+     "impact": "Crop damage risk"},
+]
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
 def predict_impact(data):
     # Placeholder AI logic
     if data["temp"] > 25:
         return "Increased energy demand"
     return "Normal market behavior"
+
+
+def _rule_mask(rule, batch):
+    if "fn" in rule:
+        return np.asarray(rule["fn"](batch), dtype=bool)
+    values = np.asarray(batch[rule["variable"]], dtype=float)
+    # Comparisons with NaN are False, so missing readings never trigger a rule
+    with np.errstate(invalid="ignore"):
+        return OPERATORS[rule["op"]](values, rule["threshold"])
+
+
+def predict_impact_batch(batch, rules=None, min_score=0.0):
+    """
+    Evaluate market-impact rules over a whole forecast batch at once.
+
+    `batch` maps column names to equal-length arrays and must contain a
+    "city" column; rows can be any mix of cities, hours and variables.
+    Returns a dict with the sorted unique `cities`, each city's `impact`
+    label and `score` (its best rule's score, or NORMAL_IMPACT when no
+    score exceeds `min_score`), and the full `rule_scores` matrix
+    (cities × rules) with the matching `rule_names`.
+    """
+    rules = DEFAULT_RULES if rules is None else rules
+    cities, city_codes = np.unique(np.asarray(batch["city"]), return_inverse=True)
+    rows_per_city = np.bincount(city_codes, minlength=len(cities))
+
+    rule_scores = np.zeros((len(cities), len(rules)))
+    for j, rule in enumerate(rules):
+        hits = np.bincount(city_codes, weights=_rule_mask(rule, batch), minlength=len(cities))
+        rule_scores[:, j] = rule.get("weight", 1.0) * hits / rows_per_city
+
+    impacts = np.array([rule["impact"] for rule in rules] + [NORMAL_IMPACT], dtype=object)
+    if rules:
+        best = rule_scores.argmax(axis=1)
+        scores = rule_scores[np.arange(len(cities)), best]
+        best[scores <= min_score] = len(rules)
+    else:
+        best = np.full(len(cities), len(rules))
+        scores = np.zeros(len(cities))
+
+    return {
+        "cities": cities,
+        "impact": impacts[best],
+        "score": scores,
+        "rule_scores": rule_scores,
+        "rule_names": [rule["name"] for rule in rules],
+    }
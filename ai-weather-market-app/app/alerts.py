@@ -0,0 +1,189 @@
+"""
+Vectorized emergency-alert rules over observation and forecast arrays.
+
+Data arrive as {variable: (cities, timesteps) array} on a shared hourly time
+axis. Each rule is evaluated over all cities and timesteps at once.
+  - threshold rules fire when `variable` `op` `threshold` holds for
+    `duration` consecutive steps;
+  - rate rules (kind "rate") fire when the change over `window` steps
+    crosses `threshold`, again for `duration` steps.
+A rule can be limited to some `regions` and can override its threshold per
+region with `region_thresholds`.
+
+`AlertEngine.observe` consumes an observation stream incrementally. Only
+steps newer than the last one seen are evaluated; run lengths and the tail
+needed by rate rules are carried between calls. `AlertEngine.forecast`
+evaluates a whole forecast horizon. Triggers from both are rolled up per
+(rule, region). An alert is emitted only when none was raised for the same
+key within the rule's `cooldown_hours`, so the same storm forecast on every
+tick alerts once.
+"""
+import numpy as np
+
+from app.ai_model import OPERATORS
+
+DEFAULT_ALERT_RULES = [
+    {"name": "extreme_heat", "variable": "temperature_c", "op": ">=", "threshold": 35, "duration": 3,
+     "severity": "warning", "message": "Extreme heat: protect livestock and irrigate early",
+     "region_thresholds": {"Mombasa": 37}},
+    {"name": "flood_risk", "variable": "precipitation_mm", "op": ">=", "threshold": 20, "duration": 2,
+     "severity": "emergency", "message": "Flood risk: move stock and produce to higher ground"},
+    {"name": "frost", "variable": "temperature_c", "op": "<=", "threshold": 2, "duration": 2,
+     "severity": "warning", "message": "Frost risk: cover seedlings",
+     "regions": ["Nyandarua", "Laikipia", "Nyeri"]},
+    {"name": "damaging_wind", "variable": "wind_speed_kmh", "op": ">=", "threshold": 60, "duration": 1,
+     "severity": "warning", "message": "Damaging winds: secure greenhouses and stores"},
+    {"name": "pressure_drop", "kind": "rate", "variable": "pressure_hpa", "op": "<=", "threshold": -6,
+     "window": 3, "duration": 1, "severity": "watch", "message": "Rapid pressure fall: storm likely"},
+]
+
+DEFAULT_COOLDOWN_HOURS = 12
+
+
+def run_lengths(mask, initial=None):
+    """
+    Length of the run of consecutive True values ending at each step of a
+    (rows, steps) mask; `initial` carries runs in from a previous chunk.
+    """
+    steps = np.arange(mask.shape[1])
+    last_false = np.maximum.accumulate(np.where(mask, -1, steps), axis=1)
+    runs = steps - last_false
+    if initial is not None:
+        runs = np.where(last_false < 0, runs + np.asarray(initial)[:, None], runs)
+    return runs
+
+
+class AlertEngine:
+    def __init__(self, rules=None, regions=None, cooldown_hours=DEFAULT_COOLDOWN_HOURS):
+        self.rules = DEFAULT_ALERT_RULES if rules is None else rules
+        self.regions = dict(regions or {})
+        self.cooldown = np.timedelta64(int(cooldown_hours * 3600), "s")
+        self.cities = []
+        self._city_index = {}
+        self._runs = np.zeros((len(self.rules), 0), dtype=np.int64)
+        # Trailing observed values kept per variable for rate rules
+        self._tail_width = {}
+        for rule in self.rules:
+            if rule.get("kind") == "rate":
+                var = rule["variable"]
+                self._tail_width[var] = max(self._tail_width.get(var, 0), rule.get("window", 1))
+        self._tails = {var: np.full((0, width), np.nan) for var, width in self._tail_width.items()}
+        self.last_time = None
+        # (rule name, region) -> time of the last alert raised for it
+        self.last_alert = {}
+
+    def _align(self, cities):
+        """State-array positions for `cities`, growing the state for new ones."""
+        new = [c for c in cities if c not in self._city_index]
+        if new:
+            for city in new:
+                self._city_index[city] = len(self.cities)
+                self.cities.append(city)
+            self._runs = np.pad(self._runs, ((0, 0), (0, len(new))))
+            self._tails = {var: np.pad(tail, ((0, len(new)), (0, 0)), constant_values=np.nan)
+                           for var, tail in self._tails.items()}
+        return np.array([self._city_index[c] for c in cities], dtype=np.int64)
+
+    def _thresholds(self, rule, cities):
+        overrides = rule.get("region_thresholds")
+        if not overrides:
+            return rule["threshold"]
+        return np.array([overrides.get(self.regions.get(c, c), rule["threshold"]) for c in cities])[:, None]
+
+    def _region_filter(self, rule, cities):
+        allowed = rule.get("regions")
+        if allowed is None:
+            return None
+        return np.array([self.regions.get(c, c) in allowed for c in cities])
+
+    def _triggers(self, cities, values, rule, initial_runs=None, history=None):
+        """(runs, fired) for one rule: run lengths and the (cities, steps) alert mask."""
+        data = np.asarray(values[rule["variable"]], dtype=np.float64)
+        if rule.get("kind") == "rate":
+            window = rule.get("window", 1)
+            full = data if history is None else np.concatenate([history, data], axis=1)
+            delta = np.full(full.shape, np.nan)
+            delta[:, window:] = full[:, window:] - full[:, :-window]
+            data = delta[:, full.shape[1] - data.shape[1]:]
+        with np.errstate(invalid="ignore"):
+            mask = OPERATORS[rule["op"]](data, self._thresholds(rule, cities))
+        allowed = self._region_filter(rule, cities)
+        if allowed is not None:
+            mask &= allowed[:, None]
+        runs = run_lengths(mask, initial_runs)
+        return runs, runs >= rule.get("duration", 1)
+
+    def _rollup(self, cities, times, fired, rule, source):
+        """Per-region alert candidates for one rule, passed through the cooldown."""
+        hit_rows = np.flatnonzero(fired.any(axis=1))
+        if not len(hit_rows):
+            return []
+        first_step = fired[hit_rows].argmax(axis=1)
+        by_region = {}
+        for row, step in zip(hit_rows, first_step):
+            region = self.regions.get(cities[row], cities[row])
+            entry = by_region.setdefault(region, {"start": times[step], "cities": []})
+            entry["start"] = min(entry["start"], times[step])
+            entry["cities"].append(cities[row])
+
+        alerts = []
+        for region, entry in sorted(by_region.items()):
+            key = (rule["name"], region)
+            last = self.last_alert.get(key)
+            cooldown = np.timedelta64(int(rule["cooldown_hours"] * 3600), "s") if "cooldown_hours" in rule \
+                else self.cooldown
+            if last is not None and entry["start"] - last < cooldown:
+                continue
+            self.last_alert[key] = entry["start"]
+            alerts.append({
+                "rule": rule["name"],
+                "region": region,
+                "severity": rule.get("severity", "warning"),
+                "message": rule.get("message", rule["name"]),
+                "cities": sorted(entry["cities"]),
+                "start": str(entry["start"]),
+                "source": source,
+            })
+        return alerts
+
+    def observe(self, cities, times, values):
+        """
+        Feed observed steps; steps not newer than the last call are skipped.
+        Returns the alerts raised.
+        """
+        times = np.asarray(times, dtype="datetime64[s]")
+        new = slice(None) if self.last_time is None else times > self.last_time
+        times = times[new]
+        if not len(times):
+            return []
+        values = {var: np.asarray(v, dtype=np.float64)[:, new] for var, v in values.items()}
+        positions = self._align(list(cities))
+
+        alerts = []
+        for i, rule in enumerate(self.rules):
+            history = self._tails[rule["variable"]][positions] if rule.get("kind") == "rate" else None
+            runs, fired = self._triggers(cities, values, rule, self._runs[i, positions], history)
+            self._runs[i, positions] = runs[:, -1]
+            alerts += self._rollup(list(cities), times, fired, rule, "observed")
+
+        for var, tail in self._tails.items():
+            combined = np.concatenate([tail[positions], values[var]], axis=1)
+            tail[positions] = combined[:, -tail.shape[1]:]
+        self.last_time = times[-1]
+        return alerts
+
+    def forecast(self, cities, times, values):
+        """
+        Evaluate a forecast horizon that starts right after the latest
+        observation. Runs and rate windows continue from the observed state,
+        but the state itself is not advanced. Returns the alerts raised.
+        """
+        times = np.asarray(times, dtype="datetime64[s]")
+        values = {var: np.asarray(v, dtype=np.float64) for var, v in values.items()}
+        positions = self._align(list(cities))
+        alerts = []
+        for i, rule in enumerate(self.rules):
+            history = self._tails[rule["variable"]][positions] if rule.get("kind") == "rate" else None
+            _, fired = self._triggers(cities, values, rule, self._runs[i, positions], history)
+            alerts += self._rollup(list(cities), times, fired, rule, "forecast")
+        return alerts
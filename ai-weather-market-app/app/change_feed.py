@@ -0,0 +1,151 @@
+"""
+Change notifications from ingestion to serving processes.
+
+After each committed insert the writer publishes one compact JSON message
+per city touched, {"city", "start", "end", "rows"}, covering the batch's
+recorded_at range. On PostgreSQL this uses `pg_notify` on the
+`weather_changes` channel, so the notification is delivered only if the
+insert commits. For local runs without PostgreSQL (the SQLite stand-in) messages
+can go over a UDP socket on localhost instead; that publisher is opt-in
+(CHANGE_FEED_LOCAL=1) so tests and benchmarks send nothing.
+
+Servers subscribe with `ChangeFeedListener` (in app_server.py, opt-in through
+CHANGE_FEED) and refresh only the affected cache entries and recent-data
+windows, with no polling.
+"""
+import json
+import os
+import select
+import socket
+import threading
+
+import numpy as np
+
+from app.db import DB_PARAMS, dialect
+
+CHANNEL = "weather_changes"
+LOCAL_FEED_ADDRESS = ("127.0.0.1", int(os.getenv("CHANGE_FEED_PORT", "8765")))
+
+
+def local_feed_enabled():
+    return os.getenv("CHANGE_FEED_LOCAL") == "1"
+
+
+def summarize_changes(columns):
+    """One change message per city: the recorded_at range and row count of the batch."""
+    cities = np.asarray(columns["city"], dtype=object)
+    times = np.array(columns["recorded_at"], dtype="datetime64[s]")
+    messages = []
+    for city in sorted(c for c in set(cities) if c is not None):
+        city_times = times[cities == city]
+        messages.append({
+            "city": city,
+            "start": str(city_times.min()),
+            "end": str(city_times.max()),
+            "rows": int(len(city_times)),
+        })
+    return messages
+
+
+def publish_changes(cursor, columns, db_dialect="postgresql"):
+    """
+    Announce a batch. On PostgreSQL this must run inside the inserting
+    transaction (before commit), so listeners only hear about committed rows.
+    """
+    messages = summarize_changes(columns)
+    if db_dialect == "postgresql":
+        for message in messages:
+            cursor.execute("SELECT pg_notify(%s, %s)", (CHANNEL, json.dumps(message)))
+    elif local_feed_enabled():
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for message in messages:
+                sock.sendto(json.dumps(message).encode("utf-8"), LOCAL_FEED_ADDRESS)
+    return messages
+
+
+class ChangeFeedListener:
+    """
+    Background thread that calls `callback(message)` for every change
+    notification. `source` is "postgresql" (LISTEN on the weather_changes
+    channel, reconnecting on errors; an outage is logged once, not on every
+    retry) or "local" (the UDP stand-in).
+    """
+
+    def __init__(self, callback, source="postgresql", poll_interval=5.0):
+        self.callback = callback
+        self.source = source
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._connected = False
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+
+    def start(self, wait=True):
+        self._thread.start()
+        if wait:
+            self._ready.wait(timeout=10)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=self.poll_interval + 1)
+
+    def _dispatch(self, payload):
+        try:
+            self.callback(json.loads(payload))
+        except Exception as e:
+            print(f"❌ Error handling change notification {payload!r}: {e}")
+
+    def _run(self):
+        if self.source == "local":
+            self._run_local()
+            return
+        failing = False
+        while not self._stop.is_set():
+            self._connected = False
+            try:
+                self._listen_postgresql()
+            except Exception as e:
+                # One line per outage: a connection that came up and dropped again is a new one
+                if not failing or self._connected:
+                    print(f"❌ Change feed connection lost: {e}; retrying every {self.poll_interval:g}s")
+                failing = True
+                self._stop.wait(self.poll_interval)
+
+    def _listen_postgresql(self):
+        import psycopg2  # type: ignore
+        import psycopg2.extensions  # type: ignore
+
+        conn = psycopg2.connect(**DB_PARAMS)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            self._connected = True
+            self._ready.set()
+            while not self._stop.is_set():
+                if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._dispatch(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+    def _run_local(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(LOCAL_FEED_ADDRESS)
+            sock.settimeout(self.poll_interval)
+            self._ready.set()
+            while not self._stop.is_set():
+                try:
+                    payload, _ = sock.recvfrom(65536)
+                except socket.timeout:
+                    continue
+                self._dispatch(payload.decode("utf-8"))
+
+
+def feed_source(conn):
+    """Listener source matching a writer connection's dialect."""
+    return "postgresql" if dialect(conn) == "postgresql" else "local"
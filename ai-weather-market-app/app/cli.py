@@ -0,0 +1,284 @@
+"""
+Single entry point for the operational scripts.
+
+    python -m app check                      # DB reachable, data fresh, artifacts present
+    python -m app inspect db|schema|model
+    python -m app ingest [--city X] [--interval 300] [--once]
+    python -m app backfill --city Nairobi --start 2024-01-01 [--hourly]
+    python -m app train rf|lstm|h2o|orchestrate [args...]
+    python -m app predict [--city Nairobi]
+    python -m app bench ingest|alerts [args...]
+    python -m app export|grid|prices|rollups|schema [args...]
+
+Subcommands import their heavy dependencies (pandas, TensorFlow, H2O) only
+when they run, so `check` and `inspect db` start in a fraction of a second.
+All of them read configuration from the same environment/.env (or
+--env-file) and share a pooled database connection (app.db.pooled).
+"""
+import argparse
+import importlib.util
+import os
+import runpy
+import sys
+from datetime import datetime, timedelta
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(PACKAGE_ROOT, "models")
+
+TRAINERS = {
+    "rf": "train-rf_weather_model.py",
+    "lstm": "train-lstm_weather_model.py",
+    "h2o": "train-h2o_automl_weather_model.py",
+}
+
+# Artifacts `check` looks for, relative to MODELS_DIR
+ARTIFACTS = {
+    "rf (compact)": "rf_weather_model.compact",
+    "rf (joblib)": "rf_weather_model.joblib",
+    "lstm (tflite)": "lstm_weather_model.tflite",
+    "lstm scaler": "scaler.save",
+    "h2o automl": "h2o_automl_model",
+    "drift snapshot (rf)": "drift_snapshot_rf.json",
+    "drift snapshot (rf full)": "drift_snapshot_rf_full.json",
+}
+
+
+def load_ingest_script():
+    """Import ins-weather-data.py (hyphenated, so not importable by name)."""
+    path = os.path.join(PACKAGE_ROOT, "ins-weather-data.py")
+    spec = importlib.util.spec_from_file_location("ins_weather_data", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_script(path, argv=()):
+    """Run a standalone script as __main__ with its own argv."""
+    saved = sys.argv
+    sys.argv = [path] + list(argv)
+    try:
+        runpy.run_path(path, run_name="__main__")
+    finally:
+        sys.argv = saved
+    return 0
+
+
+def cmd_check(args):
+    from app.db import pooled
+
+    ok = True
+    try:
+        with pooled() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT city), MAX(recorded_at) FROM weather_data")
+            rows, cities, newest = cursor.fetchone()
+            cursor.close()
+        print(f"✅ Database: {rows} weather_data rows, {cities} cities, newest {newest}")
+        if newest is not None and (datetime.now() - newest).total_seconds() > args.max_age_hours * 3600:
+            print(f"⚠️ Newest observation is older than {args.max_age_hours} h")
+            ok = False
+    except Exception as e:
+        print(f"❌ Database: {e}")
+        ok = False
+
+    for name, relative in ARTIFACTS.items():
+        present = os.path.exists(os.path.join(MODELS_DIR, relative))
+        print(f"{'✅' if present else '⚠️'} {name}: {relative}{'' if present else ' (missing)'}")
+    return 0 if ok else 1
+
+
+def cmd_inspect(args):
+    if args.what == "model":
+        sys.path.insert(0, PACKAGE_ROOT)
+        from inspect_model_schema import inspect_model_schema
+        inspect_model_schema()
+        return 0
+
+    from app.db import pooled
+    with pooled() as conn:
+        cursor = conn.cursor()
+        if args.what == "schema":
+            cursor.execute("""
+                SELECT table_schema, table_name, column_name, data_type
+                FROM information_schema.columns
+                WHERE table_name LIKE 'weather%%' AND table_schema NOT IN ('pg_catalog', 'information_schema')
+                ORDER BY table_schema, table_name, ordinal_position
+            """)
+            current = None
+            for schema, table, column, data_type in cursor.fetchall():
+                if (schema, table) != current:
+                    current = (schema, table)
+                    print(f"{schema}.{table}")
+                print(f"  - {column}: {data_type}")
+        else:
+            # Coverage from the daily rollups instead of a scan of every raw row
+            from app.rollups import fetch_rollups
+            coverage = {}
+            for row in fetch_rollups(conn, "daily", variables=["temperature_c"]):
+                days, readings, first, _ = coverage.get(row["city"], (0, 0, row["bucket_start"], None))
+                coverage[row["city"]] = (days + 1, readings + row["n_obs"], first, row["bucket_start"])
+            if not coverage:
+                print("⚠️ No rollups yet; run 'python -m app rollups rebuild' on an existing database")
+            print(f"{'city':<20} {'days':>6} {'readings':>10}  first       newest")
+            for city, (days, readings, first, newest) in coverage.items():
+                print(f"{city or '-':<20} {days:>6} {readings:>10}  {first!s:<11} {newest}")
+        cursor.close()
+    return 0
+
+
+def cmd_ingest(args):
+    import time
+    from app import profiling
+    from app.db import pooled
+    from app.weather_data import tracked_cities
+
+    module = load_ingest_script()
+    cities = args.city or tracked_cities()
+    profiling.install_signal_handler()
+    while True:
+        # Borrow a connection per tick: a dropped connection is discarded by
+        # the pool and replaced on the next tick instead of failing forever
+        try:
+            with pooled() as conn:
+                for city in cities:
+                    try:
+                        with profiling.timed(f"realtime tick {city}"):
+                            with profiling.stage("fetch"):
+                                record = module.fetch_current_weather(city)
+                            module.insert_weather_data([record], conn=conn)
+                    except Exception as e:
+                        print(f"❌ Error fetching real-time data for {city}: {e}")
+        except Exception as e:
+            print(f"❌ Database unavailable: {e}")
+        if args.once:
+            return 0
+        time.sleep(args.interval)
+
+
+def cmd_backfill(args):
+    from app.db import pooled
+
+    module = load_ingest_script()
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    end = datetime.strptime(args.end, "%Y-%m-%d") if args.end else datetime.now()
+    for city in args.city:
+        # One pooled connection per flushed batch of days, so a dropped
+        # connection only costs the batch it happened in
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=args.batch_size - 1), end)
+            with pooled() as conn:
+                module.backfill(city, window_start, window_end, batch_size=args.batch_size,
+                                delay=args.delay, conn=conn, hourly=args.hourly)
+            window_start = window_end + timedelta(days=1)
+    return 0
+
+
+def cmd_train(args):
+    if args.model == "orchestrate":
+        from app.train_orchestrator import main
+        return main(args.args)
+    return run_script(os.path.join(MODELS_DIR, TRAINERS[args.model]), args.args)
+
+
+def cmd_predict(args):
+    if args.city:
+        os.environ["PREDICT_CITY"] = args.city
+    sys.path.insert(0, PACKAGE_ROOT)
+    return run_script(os.path.join(PACKAGE_ROOT, "predict_weather.py"))
+
+
+def cmd_bench(args):
+    sys.path.insert(0, PACKAGE_ROOT)
+    if args.which == "ingest":
+        from benchmarks.bench_ingest import main
+    else:
+        from benchmarks.bench_alerts import main
+    return main(args.args)
+
+
+def cmd_module(args):
+    """Pass through to an app module's own CLI."""
+    module = importlib.import_module(f"app.{MODULE_COMMANDS[args.command]}")
+    return module.main(args.args)
+
+
+MODULE_COMMANDS = {
+    "export": "export",
+    "grid": "grid_surfaces",
+    "prices": "market_prices",
+    "rollups": "rollups",
+    "schema": "schema",
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app", description="AI weather market app operations.")
+    parser.add_argument("--env-file", help="Load configuration from this .env file (overrides the environment)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    check = sub.add_parser("check", help="Check the database, data freshness and model artifacts")
+    check.add_argument("--max-age-hours", type=float, default=24)
+    check.set_defaults(func=cmd_check)
+
+    inspect = sub.add_parser("inspect", help="Show per-city data coverage, table schemas or the H2O model inputs")
+    inspect.add_argument("what", choices=("db", "schema", "model"), nargs="?", default="db")
+    inspect.set_defaults(func=cmd_inspect)
+
+    ingest = sub.add_parser("ingest", help="Poll current conditions into weather_data")
+    ingest.add_argument("--city", action="append", help="Repeat for several cities (default: TRACKED_CITIES)")
+    ingest.add_argument("--interval", type=float, default=300)
+    ingest.add_argument("--once", action="store_true", help="Run a single tick and exit")
+    ingest.set_defaults(func=cmd_ingest)
+
+    backfill = sub.add_parser("backfill", help="Load historical weather for a date range")
+    backfill.add_argument("--city", action="append", default=None)
+    backfill.add_argument("--start", default="2023-01-01", help="first day to fetch (YYYY-MM-DD)")
+    backfill.add_argument("--end", help="last day to fetch (YYYY-MM-DD, default today)")
+    backfill.add_argument("--hourly", action="store_true", help="keep all 24 hourly records per day")
+    backfill.add_argument("--batch-size", type=int, default=10)
+    backfill.add_argument("--delay", type=float, default=1)
+    backfill.set_defaults(func=cmd_backfill)
+
+    train = sub.add_parser("train", help="Train a model (arguments after the model are passed through)")
+    train.add_argument("model", choices=sorted(TRAINERS) + ["orchestrate"])
+    train.set_defaults(func=cmd_train, passthrough=True)
+
+    predict = sub.add_parser("predict", help="Forecast the next step for a city with the LSTM")
+    predict.add_argument("--city")
+    predict.set_defaults(func=cmd_predict)
+
+    bench = sub.add_parser("bench", help="Run a benchmark (arguments are passed through)")
+    bench.add_argument("which", choices=("ingest", "alerts"))
+    bench.set_defaults(func=cmd_bench, passthrough=True)
+
+    for name, module in MODULE_COMMANDS.items():
+        passthrough = sub.add_parser(name, help=f"app.{module} (arguments are passed through)", add_help=False)
+        passthrough.set_defaults(func=cmd_module, passthrough=True)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    # Unknown arguments belong to pass-through commands (trainers, benchmarks, module CLIs)
+    args, extra = parser.parse_known_args(argv)
+    if extra and not getattr(args, "passthrough", False):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.args = extra
+    if args.env_file:
+        from dotenv import load_dotenv  # type: ignore
+        load_dotenv(args.env_file, override=True)
+    if getattr(args, "city", None) is None and args.command == "backfill":
+        from app.weather_data import tracked_cities
+        args.city = tracked_cities()
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        from app.db import close_pool
+        close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import contextlib
+import os
+import threading
+
+import psycopg2  # type: ignore
+from dotenv import load_dotenv  # type: ignore
+
+# Load environment variables from .env file
+load_dotenv()
+
+DB_PARAMS = {
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": os.getenv("DB_PORT", "5432"),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def connect():
+    """Open a new PostgreSQL connection using the DB_* environment variables."""
+    return psycopg2.connect(**DB_PARAMS)
+
+
+def dialect(conn):
+    """'postgresql', or the `dialect` attribute of a local stand-in connection."""
+    return getattr(conn, "dialect", "postgresql")
+
+
+def get_pool():
+    """Process-wide connection pool, created on first use (DB_POOL_MIN / DB_POOL_MAX)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from psycopg2.pool import ThreadedConnectionPool  # type: ignore
+            _pool = ThreadedConnectionPool(int(os.getenv("DB_POOL_MIN", "1")),
+                                           int(os.getenv("DB_POOL_MAX", "5")), **DB_PARAMS)
+        return _pool
+
+
+@contextlib.contextmanager
+def pooled():
+    """
+    Borrow a pooled connection. Uncommitted work is rolled back before the
+    connection goes back to the pool; a broken connection is discarded.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        broken = bool(conn.closed)
+        if not broken:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        pool.putconn(conn, close=broken)
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
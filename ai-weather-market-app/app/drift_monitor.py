@@ -0,0 +1,283 @@
+"""
+Online drift and data-quality monitoring of the ingest stream.
+
+A training snapshot (`build_snapshot`, written by the trainers) stores, per
+feature, the mean, standard deviation, null rate and decile bin edges with
+the fraction of training rows in each bin. `DriftMonitor` then keeps
+constant-memory statistics per (city, feature) over the ingest stream:
+Welford/Chan mean and variance, null counts, and a histogram over the
+snapshot's bins that doubles as a quantile sketch. All of them decay
+exponentially with a half-life of `half_life` observations, so they describe
+recent data: months of normal readings do not dilute a fresh shift. After
+each batch the decayed statistics are compared against the snapshot and
+flags are raised when
+
+- the population stability index (PSI) of the histogram exceeds
+  `psi_threshold`,
+- the running mean moves more than `z_threshold` training standard
+  deviations, or
+- the null rate rises more than `null_rate_delta` above training.
+
+Flags and statistics are exported in Prometheus text format.
+"""
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+
+MONITORED_FEATURES = (
+    "temperature_c",
+    "humidity_percent",
+    "pressure_hpa",
+    "wind_speed_kmh",
+    "wind_direction_deg",
+    "precipitation_mm",
+    "uv_index",
+    "air_quality_index",
+    "cloud_cover_percent",
+    "visibility_km",
+    "dew_point_c",
+    "solar_radiation_w_m2",
+)
+
+GLOBAL = "__all__"
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+# One snapshot per trainer, so neither overwrites the other's reference
+RF_SNAPSHOT = os.path.join(MODELS_DIR, "drift_snapshot_rf.json")
+RF_FULL_SNAPSHOT = os.path.join(MODELS_DIR, "drift_snapshot_rf_full.json")
+DEFAULT_SNAPSHOTS = [RF_FULL_SNAPSHOT, RF_SNAPSHOT]
+
+
+def _feature_snapshot(values, n_bins):
+    values = np.asarray(values, dtype=float)
+    present = values[~np.isnan(values)]
+    entry = {"count": int(len(values)), "null_rate": float(1 - len(present) / len(values)) if len(values) else 0.0}
+    if len(present):
+        edges = np.unique(np.quantile(present, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, present, side="right"), minlength=len(edges) + 1)
+        entry.update(mean=float(present.mean()), std=float(present.std()),
+                     min=float(present.min()), max=float(present.max()),
+                     edges=edges.tolist(), fractions=(counts / counts.sum()).tolist())
+    return entry
+
+
+def build_snapshot(df, features=MONITORED_FEATURES, n_bins=10):
+    """
+    Summarize a training DataFrame (before dropping nulls) overall and per
+    city, if it has a `city` column.
+    """
+    features = [f for f in features if f in df.columns]
+    snapshot = {"features": {GLOBAL: {f: _feature_snapshot(df[f], n_bins) for f in features}}}
+    if "city" in df.columns:
+        for city, part in df.groupby("city"):
+            snapshot["features"][city] = {f: _feature_snapshot(part[f], n_bins) for f in features}
+    return snapshot
+
+
+def merge_snapshots(*snapshots):
+    """Combine snapshots; for a (city, feature) in several, the first one wins."""
+    merged = {"features": {}}
+    for snapshot in snapshots:
+        for city, features in snapshot.get("features", {}).items():
+            target = merged["features"].setdefault(city, {})
+            for feature, entry in features.items():
+                target.setdefault(feature, entry)
+    return merged
+
+
+def save_snapshot(snapshot, path):
+    with open(path, "w") as f:
+        json.dump(snapshot, f)
+
+
+def load_snapshot(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class RunningStats:
+    """
+    Constant-memory, exponentially decayed statistics for one (city,
+    feature) stream. `count`, `nulls` and the histogram are effective
+    (decayed) weights; `half_life=None` keeps everything cumulative.
+    """
+
+    __slots__ = ("count", "nulls", "mean", "m2", "min", "max", "edges", "hist", "half_life")
+
+    def __init__(self, edges=None, half_life=None):
+        self.count = 0.0
+        self.nulls = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.edges = None if edges is None else np.asarray(edges, dtype=float)
+        self.hist = None if edges is None else np.zeros(len(edges) + 1, dtype=np.float64)
+        self.half_life = half_life
+
+    def _decay(self, n):
+        """Age the existing state by `n` new observations."""
+        factor = 0.5 ** (n / self.half_life)
+        self.count *= factor
+        self.nulls *= factor
+        self.m2 *= factor
+        if self.hist is not None:
+            self.hist *= factor
+
+    def update(self, values):
+        if self.half_life and len(values):
+            self._decay(len(values))
+        present = values[~np.isnan(values)]
+        self.nulls += len(values) - len(present)
+        n = len(present)
+        if not n:
+            return
+        # Chan et al. merge of the batch moments into the (decayed) Welford state
+        batch_mean = present.mean()
+        batch_m2 = ((present - batch_mean) ** 2).sum()
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, present.min())
+        self.max = max(self.max, present.max())
+        if self.edges is not None:
+            self.hist += np.bincount(np.searchsorted(self.edges, present, side="right"), minlength=len(self.hist))
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def null_rate(self):
+        total = self.count + self.nulls
+        return self.nulls / total if total else 0.0
+
+    def quantile(self, q):
+        """Approximate quantile, interpolating linearly inside histogram bins."""
+        if self.edges is None or not self.count:
+            return None
+        bounds = np.concatenate([[self.min], np.clip(self.edges, self.min, self.max), [self.max]])
+        cdf = np.concatenate([[0], np.cumsum(self.hist)]) / self.hist.sum()
+        return float(np.interp(q, cdf, bounds))
+
+    def psi(self, fractions):
+        if self.edges is None or not self.count:
+            return 0.0
+        expected = np.clip(np.asarray(fractions), 1e-4, None)
+        actual = np.clip(self.hist / self.hist.sum(), 1e-4, None)
+        return float(((actual - expected) * np.log(actual / expected)).sum())
+
+
+class DriftMonitor:
+    def __init__(self, snapshot=None, psi_threshold=0.2, z_threshold=3.0, null_rate_delta=0.1, min_count=100,
+                 features=MONITORED_FEATURES, half_life=720):
+        self.snapshot = (snapshot or {}).get("features", {})
+        # In observations per (city, feature): 720 is a month of hourly readings
+        self.half_life = half_life
+        self.psi_threshold = psi_threshold
+        self.z_threshold = z_threshold
+        self.null_rate_delta = null_rate_delta
+        self.min_count = min_count
+        self.features = features
+        self.stats = {}
+        self.flags = defaultdict(set)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Reference from DRIFT_SNAPSHOT (comma-separated paths), by default the
+        snapshots of both Random Forest trainers, merged.
+        """
+        paths = os.getenv("DRIFT_SNAPSHOT")
+        paths = paths.split(",") if paths else DEFAULT_SNAPSHOTS
+        snapshots = [load_snapshot(path) for path in paths if os.path.exists(path)]
+        half_life = os.getenv("DRIFT_HALF_LIFE")
+        return cls(merge_snapshots(*snapshots) if snapshots else None,
+                   half_life=float(half_life) if half_life else 720)
+
+    def reference(self, city, feature):
+        return self.snapshot.get(city, {}).get(feature) or self.snapshot.get(GLOBAL, {}).get(feature)
+
+    def _stats(self, city, feature):
+        key = (city, feature)
+        if key not in self.stats:
+            ref = self.reference(city, feature)
+            self.stats[key] = RunningStats(ref.get("edges") if ref else None, self.half_life)
+        return self.stats[key]
+
+    def observe(self, columns):
+        """
+        Update the running statistics with a batch of weather_data columns
+        and return the flags raised by this batch, as (city, feature, kind,
+        value) tuples. A flag is only reported when it first appears.
+        """
+        cities = np.asarray(columns["city"], dtype=object)
+        groups = {city: cities == city for city in set(cities)}
+        raised = []
+        for feature in self.features:
+            if feature not in columns:
+                continue
+            values = np.array(columns[feature], dtype=float)
+            for city, mask in groups.items():
+                stats = self._stats(city, feature)
+                stats.update(values[mask])
+                current = self._check(city, feature, stats)
+                active = self.flags[(city, feature)]
+                raised += [(city, feature, kind, value) for kind, value in current if kind not in active]
+                self.flags[(city, feature)] = {kind for kind, _ in current}
+        return raised
+
+    def _check(self, city, feature, stats):
+        ref = self.reference(city, feature)
+        if ref is None or stats.count + stats.nulls < self.min_count:
+            return []
+        found = []
+        if stats.null_rate - ref["null_rate"] > self.null_rate_delta:
+            found.append(("null_rate", stats.null_rate))
+        if stats.count >= self.min_count and "mean" in ref:
+            if ref["std"] > 0 and abs(stats.mean - ref["mean"]) / ref["std"] > self.z_threshold:
+                found.append(("mean_shift", stats.mean))
+            psi = stats.psi(ref["fractions"])
+            if psi > self.psi_threshold:
+                found.append(("psi", psi))
+        return found
+
+    def metrics(self):
+        """Prometheus text exposition of the running statistics and drift flags."""
+        lines = []
+        for name, help_text in (
+            ("weather_feature_count", "Non-null observations seen"),
+            ("weather_feature_null_rate", "Fraction of null observations"),
+            ("weather_feature_mean", "Running mean"),
+            ("weather_feature_stddev", "Running standard deviation"),
+            ("weather_feature_p50", "Approximate median"),
+            ("weather_feature_psi", "Population stability index against the training snapshot"),
+            ("weather_feature_drift", "1 when a drift or null-rate flag is active"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for (city, feature), stats in sorted(self.stats.items()):
+                ref = self.reference(city, feature)
+                value = {
+                    "weather_feature_count": stats.count,
+                    "weather_feature_null_rate": stats.null_rate,
+                    "weather_feature_mean": stats.mean,
+                    "weather_feature_stddev": stats.variance ** 0.5,
+                    "weather_feature_p50": stats.quantile(0.5),
+                    "weather_feature_psi": stats.psi(ref["fractions"]) if ref and "fractions" in ref else None,
+                    "weather_feature_drift": int(bool(self.flags.get((city, feature)))),
+                }[name]
+                if value is not None:
+                    lines.append(f'{name}{{city="{city}",feature="{feature}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Write metrics for the node_exporter textfile collector (atomically)."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.metrics())
+        os.replace(tmp_path, path)
@@ -0,0 +1,92 @@
+"""
+Concurrent ensemble scoring with per-model timeouts.
+
+All members score the same batch in parallel on a shared thread pool, so
+the ensemble takes about as long as its slowest *answering* member instead
+of the sum of all of them. A member that raises, misses its timeout, or is
+still busy with an earlier request is left out and the blend is re-weighted
+over the members that answered.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+
+@dataclass
+class Member:
+    name: str
+    predict: Callable
+    weight: float = 1.0
+    timeout: float = 2.0
+
+
+class EnsemblePredictor:
+    def __init__(self, members, max_workers=None):
+        self.members = list(members)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or max(1, len(self.members)),
+                                        thread_name_prefix="ensemble")
+        # Futures still running past their timeout; the member is skipped until they
+        # finish. Shared by concurrent request threads, so only touched under _lock
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        """
+        Score `batch` with every member. Returns the weighted `prediction`
+        (a list, None when no member answered) and per-member details:
+        status ("ok", "timeout", "error", "busy"), seconds, weight and
+        prediction.
+        """
+        start = time.perf_counter()
+        futures = {}
+        results = {}
+        with self._lock:
+            for member in self.members:
+                running = self._in_flight.get(member.name)
+                if running is not None and not running.done():
+                    results[member.name] = {"status": "busy", "weight": member.weight}
+                    continue
+                self._in_flight.pop(member.name, None)
+                futures[member.name] = self._pool.submit(member.predict, batch)
+
+        for member in sorted(self.members, key=lambda m: m.timeout):
+            future = futures.get(member.name)
+            if future is None:
+                continue
+            remaining = max(0.0, start + member.timeout - time.perf_counter())
+            try:
+                prediction = np.asarray(future.result(timeout=remaining), dtype=float).ravel()
+                if prediction.shape[0] != len(batch):
+                    raise ValueError(f"{prediction.shape[0]} predictions for {len(batch)} rows")
+                results[member.name] = {"status": "ok", "prediction": prediction}
+            except FutureTimeoutError:
+                with self._lock:
+                    self._in_flight[member.name] = future
+                results[member.name] = {"status": "timeout"}
+            except Exception as e:
+                results[member.name] = {"status": "error", "error": str(e)}
+            results[member.name].update(weight=member.weight, seconds=time.perf_counter() - start)
+
+        answered = [m for m in self.members if results[m.name]["status"] == "ok" and m.weight > 0]
+        blended = None
+        if answered:
+            weights = np.array([m.weight for m in answered])
+            stacked = np.vstack([results[m.name]["prediction"] for m in answered])
+            blended = (weights[:, None] * stacked).sum(axis=0) / weights.sum()
+
+        for entry in results.values():
+            if "prediction" in entry:
+                entry["prediction"] = entry["prediction"].tolist()
+        return {
+            "prediction": None if blended is None else blended.tolist(),
+            "members": results,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
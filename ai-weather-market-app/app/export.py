@@ -0,0 +1,256 @@
+"""
+Bulk export of weather_data (plus optional model predictions) as Arrow IPC
+or Parquet.
+
+Only the requested columns are selected. City and time filters go into the
+WHERE clause, where the (city, recorded_at) index and monthly partitions
+handle them. Rows are read through a PostgreSQL server-side cursor in chunks
+and written one record batch per chunk. Million-row pulls therefore stream
+at disk/network speed without holding the result in memory and without any
+per-row JSON.
+
+    python -m app.export --out nairobi.parquet --city Nairobi --start 2024-01-01 --end 2024-07-01
+    python -m app.export --out all.arrow --columns city,recorded_at,temperature_c --predictions
+
+pyarrow is pinned in requirements.txt; the rest of the app runs without it.
+"""
+import argparse
+import os
+import sys
+import uuid
+from datetime import datetime, time
+
+import numpy as np
+
+from app.db import connect, dialect
+from app.schema import DATA_COLUMNS
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:
+    pa = pq = None
+
+EXPORT_COLUMNS = tuple(c.strip() for c in DATA_COLUMNS.split(","))
+TEXT_COLUMNS = {"city", "country", "weather_condition"}
+TIME_COLUMNS = {"sunrise_time", "sunset_time"}
+RF_FEATURES = ("humidity_percent", "wind_speed_kmh", "pressure_hpa", "precipitation_mm")
+PREDICTION_COLUMN = "rf_prediction"
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Exporting requires pyarrow (pip install pyarrow)")
+
+
+def arrow_type(column):
+    if column in TEXT_COLUMNS:
+        return pa.string()
+    if column == "recorded_at":
+        return pa.timestamp("s")
+    if column in TIME_COLUMNS:
+        return pa.time32("s")
+    return pa.float32()
+
+
+def export_schema(columns, predictions=False):
+    _require_pyarrow()
+    fields = [pa.field(c, arrow_type(c)) for c in columns]
+    if predictions:
+        fields.append(pa.field(PREDICTION_COLUMN, pa.float32()))
+    return pa.schema(fields)
+
+
+def _select_expression(column):
+    # Legacy tables store lat/lon etc. as DECIMAL, which arrives as Decimal and
+    # which pa.array refuses for a float32 field, so measurements come as floats
+    if column in TEXT_COLUMNS or column in TIME_COLUMNS or column == "recorded_at":
+        return column
+    return f"CAST({column} AS DOUBLE PRECISION) AS {column}"
+
+
+def build_query(columns, cities=None, start=None, end=None):
+    """SELECT for the projected `columns`, filtered on city and [start, end)."""
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {unknown}")
+    where, params = [], []
+    if cities:
+        where.append(f"city IN ({', '.join(['%s'] * len(cities))})")
+        params += list(cities)
+    if start is not None:
+        where.append("recorded_at >= %s")
+        params.append(start)
+    if end is not None:
+        where.append("recorded_at < %s")
+        params.append(end)
+    query = f"SELECT {', '.join(_select_expression(c) for c in columns)} FROM weather_data"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    return query + " ORDER BY city, recorded_at", params
+
+
+def _column_array(column, values):
+    if column in TIME_COLUMNS:
+        values = [time.fromisoformat(v) if isinstance(v, str) else v for v in values]
+        return pa.array([None if v is None else v.hour * 3600 + v.minute * 60 + v.second for v in values],
+                        type=pa.time32("s"))
+    if column == "recorded_at" and values and isinstance(values[0], str):
+        # SQLite stores timestamps as ISO strings
+        return pa.array(values, type=pa.string()).cast(pa.timestamp("s"))
+    return pa.array(values, type=arrow_type(column))
+
+
+def iter_batches(conn, columns=EXPORT_COLUMNS, cities=None, start=None, end=None,
+                 predictor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield pyarrow RecordBatches of at most `chunk_size` rows. With a
+    `predictor` (rows x RF_FEATURES float32 -> predictions), each batch also
+    carries an rf_prediction column.
+    """
+    _require_pyarrow()
+    columns = list(columns)
+    fetch = columns + [f for f in RF_FEATURES if predictor is not None and f not in columns]
+    schema = export_schema(columns, predictions=predictor is not None)
+    query, params = build_query(fetch, cities, start, end)
+
+    if dialect(conn) == "postgresql":
+        # Named cursor: rows stay on the server and arrive `itersize` at a time
+        cursor = conn.cursor(name=f"weather_export_{uuid.uuid4().hex[:8]}")
+        cursor.itersize = chunk_size
+    else:
+        cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            values = dict(zip(fetch, zip(*rows)))
+            arrays = [_column_array(c, list(values[c])) for c in columns]
+            if predictor is not None:
+                X = np.array([[np.nan if v is None else v for v in values[f]] for f in RF_FEATURES],
+                             dtype=np.float32).T
+                predictions = np.full(len(X), np.nan, dtype=np.float32)
+                complete = ~np.isnan(X).any(axis=1)
+                if complete.any():
+                    predictions[complete] = predictor(X[complete])
+                arrays.append(pa.array(predictions, mask=~complete))
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+    finally:
+        cursor.close()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def stream_export(batches, schema, fmt="arrow"):
+    """Encode record batches as an Arrow IPC stream or Parquet file, yielding bytes as they are produced."""
+    _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {sorted(FORMATS)}")
+    sink = _ChunkSink()
+    if fmt == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        # One row group per batch keeps memory flat
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    with writer:
+        for batch in batches:
+            if fmt == "arrow":
+                writer.write_batch(batch)
+            else:
+                writer.write_table(pa.Table.from_batches([batch], schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def export(conn, fmt="arrow", columns=EXPORT_COLUMNS, cities=None, start=None, end=None,
+           predictor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Bytes generator for a whole export; see iter_batches for the arguments."""
+    schema = export_schema(columns, predictions=predictor is not None)
+    batches = iter_batches(conn, columns, cities, start, end, predictor, chunk_size)
+    return stream_export(batches, schema, fmt)
+
+
+def load_rf_predictor(models_dir):
+    """predict(X) of the compact RF artifact, or the joblib model, if either exists."""
+    compact_path = os.path.join(models_dir, "rf_weather_model.compact")
+    joblib_path = os.path.join(models_dir, "rf_weather_model.joblib")
+    if os.path.isdir(compact_path):
+        from app.model_compaction import load_compact
+        return load_compact(compact_path).predict
+    if os.path.exists(joblib_path):
+        import joblib  # type: ignore
+        return joblib.load(joblib_path).predict
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export weather_data as Arrow IPC or Parquet.")
+    parser.add_argument("--out", required=True, help="Output file; .parquet writes Parquet, anything else Arrow IPC")
+    parser.add_argument("--format", choices=sorted(FORMATS))
+    parser.add_argument("--columns", help="Comma-separated columns (default: all)")
+    parser.add_argument("--city", action="append", help="Repeat for several cities (default: all)")
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    parser.add_argument("--predictions", action="store_true", help="Add rf_prediction from the trained Random Forest")
+    parser.add_argument("--models-dir", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("parquet" if args.out.endswith(".parquet") else "arrow")
+    columns = args.columns.split(",") if args.columns else EXPORT_COLUMNS
+    predictor = None
+    if args.predictions:
+        predictor = load_rf_predictor(args.models_dir)
+        if predictor is None:
+            print(f"❌ No Random Forest artifact in {args.models_dir}")
+            return 1
+
+    conn = connect()
+    try:
+        size = 0
+        with open(args.out, "wb") as f:
+            for chunk in export(conn, fmt, columns, args.city, args.start, args.end, predictor, args.chunk_size):
+                f.write(chunk)
+                size += len(chunk)
+    finally:
+        conn.close()
+    print(f"✅ Exported to {args.out} ({size / 1e6:.1f} MB, {fmt})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Gridded weather surfaces over Kenya.
+
+A batch job takes each station's latest observation and interpolates it onto a
+fixed lat/lon grid with vectorized inverse distance weighting. Each snapshot
+is saved as one float32 .npy array, shaped (variables, lat, lon), with a JSON
+sidecar holding the grid axes and variable names. `latest.json` points at the
+newest snapshot; older ones are pruned down to the newest `keep`. The server memory-maps the array and cuts region slices
+(counties such as Laikipia or Nyandarua, or any bounding box) without
+reading the whole surface.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.db import connect
+from app.spatial import StationIndex, station_locations
+from app.weather_data import READING_COLUMNS, latest_readings
+
+# (south, north, west, east)
+KENYA_BOUNDS = (-4.8, 5.2, 33.8, 42.0)
+DEFAULT_RESOLUTION = 0.05
+DEFAULT_SURFACE_DIR = os.path.join("data", "surfaces")
+DEFAULT_KEEP = 48
+
+# Approximate county / region bounding boxes, (south, north, west, east)
+REGIONS = {
+    "Nairobi": (-1.45, -1.16, 36.66, 37.10),
+    "Mombasa": (-4.15, -3.92, 39.55, 39.77),
+    "Kisumu": (-0.45, 0.05, 34.45, 35.35),
+    "Nakuru": (-1.20, 0.30, 35.40, 36.60),
+    "Laikipia": (-0.25, 0.90, 36.20, 37.40),
+    "Nyandarua": (-0.85, 0.10, 36.20, 36.75),
+    "Nyeri": (-0.70, -0.05, 36.60, 37.35),
+    "Uasin Gishu": (0.05, 0.90, 34.85, 35.65),
+    "Rift Valley": (-2.00, 2.50, 35.00, 37.00),
+    "Kenya": KENYA_BOUNDS,
+}
+
+
+def grid_axes(bounds=KENYA_BOUNDS, resolution=DEFAULT_RESOLUTION):
+    """Cell-centre latitudes (south to north) and longitudes (west to east)."""
+    south, north, west, east = bounds
+    lats = np.arange(south + resolution / 2, north, resolution)
+    lons = np.arange(west + resolution / 2, east, resolution)
+    return np.round(lats, 6), np.round(lons, 6)
+
+
+def interpolate_grid(index, values, lats, lons, k=8, power=2.0, chunk_size=65536):
+    """
+    IDW surface of per-station `values` (stations, variables) on the grid.
+    Returns float32 (variables, len(lats), len(lons)).
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(index), -1)
+    grid_lat, grid_lon = np.meshgrid(lats, lons, indexing="ij")
+    flat_lat, flat_lon = grid_lat.ravel(), grid_lon.ravel()
+    out = np.empty((len(flat_lat), values.shape[1]), dtype=np.float32)
+    for start in range(0, len(flat_lat), chunk_size):
+        end = start + chunk_size
+        out[start:end] = index.interpolate(flat_lat[start:end], flat_lon[start:end], values, k, power)
+    return out.T.reshape(values.shape[1], len(lats), len(lons))
+
+
+def save_surface(surface, lats, lons, variables, out_dir=DEFAULT_SURFACE_DIR, created_at=None, extra=None):
+    """Write `<stamp>.npy` + `<stamp>.json` and point latest.json at them. Returns the stamp."""
+    created_at = created_at or datetime.now(timezone.utc)
+    stamp = created_at.strftime("%Y%m%dT%H%M%SZ")
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, f"{stamp}.npy"), np.ascontiguousarray(surface, dtype=np.float32))
+    meta = {
+        "created_at": created_at.isoformat(),
+        "variables": list(variables),
+        "lat0": float(lats[0]), "lon0": float(lons[0]),
+        "resolution": float(lats[1] - lats[0]) if len(lats) > 1 else DEFAULT_RESOLUTION,
+        "shape": [len(variables), len(lats), len(lons)],
+        **(extra or {}),
+    }
+    with open(os.path.join(out_dir, f"{stamp}.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    # Write-then-rename so readers never see a half-written pointer
+    tmp = os.path.join(out_dir, "latest.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"stamp": stamp}, f)
+    os.replace(tmp, os.path.join(out_dir, "latest.json"))
+    return stamp
+
+
+def prune_surfaces(out_dir=DEFAULT_SURFACE_DIR, keep=DEFAULT_KEEP):
+    """
+    Delete all but the newest `keep` snapshots (never the one latest.json
+    points at). A server still mapping a deleted array keeps reading it until
+    it re-maps. Returns the removed stamps.
+    """
+    with open(os.path.join(out_dir, "latest.json")) as f:
+        latest = json.load(f)["stamp"]
+    # Stamps are UTC %Y%m%dT%H%M%SZ, so name order is time order
+    stamps = sorted(name[:-4] for name in os.listdir(out_dir) if name.endswith(".npy"))
+    removed = [stamp for stamp in stamps[:-keep] if stamp != latest] if keep > 0 else []
+    for stamp in removed:
+        for ext in (".npy", ".json"):
+            try:
+                os.remove(os.path.join(out_dir, stamp + ext))
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+class Surface:
+    """A memory-mapped snapshot plus its grid metadata."""
+
+    def __init__(self, data, meta):
+        self.data = data
+        self.meta = meta
+        _, n_lat, n_lon = meta["shape"]
+        res = meta["resolution"]
+        self.lats = np.round(meta["lat0"] + res * np.arange(n_lat), 6)
+        self.lons = np.round(meta["lon0"] + res * np.arange(n_lon), 6)
+
+    @property
+    def variables(self):
+        return self.meta["variables"]
+
+    def region(self, bounds, variables=None):
+        """(lats, lons, {variable: 2-D slice}) for cells whose centres fall inside `bounds`."""
+        if isinstance(bounds, str):
+            bounds = REGIONS[bounds]
+        south, north, west, east = bounds
+        lat_lo, lat_hi = np.searchsorted(self.lats, [south, north], side="left")
+        lon_lo, lon_hi = np.searchsorted(self.lons, [west, east], side="left")
+        names = variables or self.variables
+        slices = {
+            name: self.data[self.variables.index(name), lat_lo:lat_hi, lon_lo:lon_hi]
+            for name in names
+        }
+        return self.lats[lat_lo:lat_hi], self.lons[lon_lo:lon_hi], slices
+
+    def sample(self, latitude, longitude, variable):
+        """Nearest-cell values at arbitrary points (NaN outside the grid)."""
+        res = self.meta["resolution"]
+        i = np.rint((np.asarray(latitude) - self.lats[0]) / res).astype(int)
+        j = np.rint((np.asarray(longitude) - self.lons[0]) / res).astype(int)
+        inside = (i >= 0) & (i < len(self.lats)) & (j >= 0) & (j < len(self.lons))
+        values = np.full(i.shape, np.nan, dtype=np.float32)
+        values[inside] = self.data[self.variables.index(variable), i[inside], j[inside]]
+        return values
+
+
+def load_surface(out_dir=DEFAULT_SURFACE_DIR, stamp=None, mmap_mode="r"):
+    if stamp is None:
+        with open(os.path.join(out_dir, "latest.json")) as f:
+            stamp = json.load(f)["stamp"]
+    with open(os.path.join(out_dir, f"{stamp}.json")) as f:
+        meta = json.load(f)
+    return Surface(np.load(os.path.join(out_dir, f"{stamp}.npy"), mmap_mode=mmap_mode), meta)
+
+
+def build_snapshot(conn, out_dir=DEFAULT_SURFACE_DIR, variables=READING_COLUMNS,
+                   bounds=KENYA_BOUNDS, resolution=DEFAULT_RESOLUTION, k=8, power=2.0,
+                   extra_values=None, keep=DEFAULT_KEEP):
+    """
+    Grid each station's latest observation. `extra_values` maps additional
+    layer names (e.g. a forecast) to {city: value} and is gridded alongside.
+    Snapshots beyond the newest `keep` are deleted afterwards.
+    """
+    cities, latitudes, longitudes = station_locations(conn)
+    if not cities:
+        raise ValueError("No station locations in weather_data")
+    index = StationIndex(cities, latitudes, longitudes)
+    readings = latest_readings(conn, list(index.cities))
+    layers = list(variables) + list(extra_values or {})
+    values = np.full((len(index), len(layers)), np.nan)
+    for s, city in enumerate(index.cities):
+        record = readings.get(city, {})
+        for v, name in enumerate(layers):
+            value = (extra_values or {}).get(name, {}).get(city) if name not in variables else record.get(name)
+            if value is not None:
+                values[s, v] = value
+    lats, lons = grid_axes(bounds, resolution)
+    surface = interpolate_grid(index, values, lats, lons, k=k, power=power)
+    observed = [r["recorded_at"] for r in readings.values()]
+    stamp = save_surface(surface, lats, lons, layers, out_dir, extra={
+        "stations": len(index),
+        "observed_until": max(observed).isoformat() if observed else None,
+    })
+    prune_surfaces(out_dir, keep)
+    return stamp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interpolate the latest observations onto the Kenya grid.")
+    parser.add_argument("--out", default=DEFAULT_SURFACE_DIR)
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION)
+    parser.add_argument("--neighbours", type=int, default=8)
+    parser.add_argument("--power", type=float, default=2.0)
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="Snapshots to retain")
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        stamp = build_snapshot(conn, args.out, resolution=args.resolution, k=args.neighbours, power=args.power,
+                               keep=args.keep)
+    finally:
+        conn.close()
+    print(f"✅ Surface {stamp} written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
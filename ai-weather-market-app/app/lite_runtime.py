@@ -0,0 +1,97 @@
+"""
+Lightweight TFLite export and CPU runtime for the LSTM weather model.
+
+Serving with the `.tflite` artifact only needs the LiteRT interpreter
+(`ai-edge-litert`, or the older `tflite-runtime`), which imports in a
+fraction of the time and memory of full TensorFlow. TensorFlow is only
+imported to export, or as a last-resort interpreter when neither runtime is
+installed.
+"""
+import importlib
+
+import numpy as np
+
+INTERPRETER_MODULES = ("ai_edge_litert.interpreter", "tflite_runtime.interpreter")
+
+
+def _interpreter_class():
+    for name in INTERPRETER_MODULES:
+        try:
+            return importlib.import_module(name).Interpreter
+        except ImportError:
+            continue
+    import tensorflow as tf  # type: ignore
+    return tf.lite.Interpreter
+
+
+def export_tflite(model, path, batch_size=32, quantize=False):
+    """
+    Convert a Keras model to TFLite and write it to `path`.
+
+    The LSTM layers only lower to TFLite builtin ops with static shapes, so
+    the model is exported with a fixed `batch_size`; `LiteModel` pads the
+    last partial batch. With `quantize`, weights are stored as int8
+    (dynamic-range quantization, ~4x smaller).
+    """
+    import tensorflow as tf  # type: ignore
+
+    inputs = tf.keras.Input(shape=model.input_shape[1:], batch_size=batch_size)
+    fixed_batch_model = tf.keras.Model(inputs, model(inputs))
+    converter = tf.lite.TFLiteConverter.from_keras_model(fixed_batch_model)
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    tflite_model = converter.convert()
+    with open(path, "wb") as f:
+        f.write(tflite_model)
+    return len(tflite_model)
+
+
+class LiteModel:
+    """Batched inference over a `.tflite` model with a Keras-like `predict`."""
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self._interpreter = _interpreter_class()(model_path=path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        # Models exported by export_tflite have a fixed batch dimension
+        self._resizable = int(self._input.get("shape_signature", self._input["shape"])[0]) == -1
+
+    @property
+    def input_shape(self):
+        return tuple(int(d) for d in self._input["shape"][1:])
+
+    def _invoke(self, batch):
+        if batch.shape[0] != self._batch_size:
+            self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+        self._interpreter.set_tensor(self._input["index"], batch)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output["index"]).copy()
+
+    def predict(self, X, batch_size=256):
+        X = np.ascontiguousarray(X, dtype=self._input["dtype"])
+        if not self._resizable:
+            batch_size = self._batch_size
+        outputs = []
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            if not self._resizable and len(batch) < batch_size:
+                # Fixed-batch model: pad the tail batch and drop the padding
+                padded = np.zeros((batch_size,) + batch.shape[1:], dtype=batch.dtype)
+                padded[:len(batch)] = batch
+                outputs.append(self._invoke(padded)[:len(batch)])
+            else:
+                outputs.append(self._invoke(batch))
+        return np.concatenate(outputs) if outputs else np.empty((0,) + tuple(self._output["shape"][1:]))
+
+
+def check_parity(keras_model, lite_path, X, atol=1e-4):
+    """Max absolute difference between Keras and TFLite predictions on `X`."""
+    expected = keras_model.predict(X, verbose=0)
+    actual = LiteModel(lite_path).predict(X)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    return max_diff, max_diff <= atol
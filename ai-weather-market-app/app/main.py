@@ -1,12 +1,13 @@
-from app.weather_data import fetch_weather_data
-from app.ai_model import predict_impact
+from app.weather_data import fetch_weather_batch
+from app.ai_model import predict_impact_batch
 
 def main():
     print("Fetching weather data...")
-    data = fetch_weather_data()
+    batch = fetch_weather_batch()
     print("Predicting market impact...")
-    prediction = predict_impact(data)
-    print(f"Prediction: {prediction}")
+    result = predict_impact_batch(batch)
+    for city, impact, score in zip(result["cities"], result["impact"], result["score"]):
+        print(f"Prediction for {city}: {impact} (score {score:.2f})")
 
 if __name__ == "__main__":
     main()
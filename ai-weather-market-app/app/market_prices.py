@@ -0,0 +1,251 @@
+"""
+Crop market price storage and weather/price as-of joins.
+
+Prices are loaded from local CSV or JSON files with `market`, `commodity`,
+`observed_at` and `price` columns (plus an optional `unit`), and kept per
+(market, commodity) as sorted int64 timestamp and float32 price arrays. The
+store round-trips through a single `.npz` file.
+
+`asof_join` lines each price observation up with the `window` weather
+readings at or before it for the market's city, entirely with NumPy
+(`searchsorted` plus fancy indexing), so weather-to-price training sets over
+years of data build in seconds. The readings can be raw rows or the daily /
+weekly means kept in the rollup tables (app.rollups), which suit daily price
+series and never touch raw history.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from app.db import connect
+from app.rollups import PERIODS, fetch_rollups
+
+PRICE_COLUMNS = ("market", "commodity", "observed_at", "price")
+
+WEATHER_FEATURES = ("temperature_c", "humidity_percent", "wind_speed_kmh", "pressure_hpa", "precipitation_mm")
+
+
+def _to_epoch_seconds(values):
+    return np.asarray(pd.to_datetime(values), dtype="datetime64[s]").astype(np.int64)
+
+
+def load_price_file(path):
+    """Read a CSV or JSON (records or JSON lines) price file into a DataFrame."""
+    if path.endswith(".csv"):
+        df = pd.read_csv(path)
+    elif path.endswith(".jsonl"):
+        df = pd.read_json(path, lines=True)
+    elif path.endswith(".json"):
+        with open(path) as f:
+            df = pd.DataFrame(json.load(f))
+    else:
+        raise ValueError(f"Unsupported price file format: {path}")
+    missing = [c for c in PRICE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    return df
+
+
+class PriceStore:
+    """Time-indexed price series per (market, commodity)."""
+
+    def __init__(self):
+        self.series = {}
+
+    def __len__(self):
+        return sum(len(ts) for ts, _ in self.series.values())
+
+    def keys(self):
+        return sorted(self.series)
+
+    def add(self, df):
+        """Merge a DataFrame of price observations; later duplicates win."""
+        df = df.dropna(subset=list(PRICE_COLUMNS))
+        timestamps = _to_epoch_seconds(df["observed_at"])
+        prices = df["price"].to_numpy(dtype=np.float32)
+        markets = df["market"].astype(str).to_numpy()
+        commodities = df["commodity"].astype(str).to_numpy()
+
+        keys, codes = np.unique(np.char.add(np.char.add(markets, "\x1f"), commodities), return_inverse=True)
+        for i, key in enumerate(keys):
+            market, commodity = key.split("\x1f")
+            mask = codes == i
+            self._merge((market, commodity), timestamps[mask], prices[mask])
+        return self
+
+    def _merge(self, key, timestamps, prices):
+        if key in self.series:
+            old_ts, old_prices = self.series[key]
+            timestamps = np.concatenate([old_ts, timestamps])
+            prices = np.concatenate([old_prices, prices])
+        # Stable sort then keep the last observation per timestamp
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, prices = timestamps[order], prices[order]
+        keep = np.append(timestamps[1:] != timestamps[:-1], True)
+        self.series[key] = (timestamps[keep], prices[keep])
+
+    def load(self, *paths):
+        for path in paths:
+            self.add(load_price_file(path))
+        return self
+
+    def get(self, market, commodity, start=None, end=None):
+        """(timestamps as datetime64[s], prices) for one series, optionally sliced."""
+        timestamps, prices = self.series[(market, commodity)]
+        lo = 0 if start is None else np.searchsorted(timestamps, _to_epoch_seconds([start])[0], side="left")
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, _to_epoch_seconds([end])[0], side="right")
+        return timestamps[lo:hi].astype("datetime64[s]"), prices[lo:hi]
+
+    def save(self, path):
+        arrays = {}
+        for i, ((market, commodity), (timestamps, prices)) in enumerate(sorted(self.series.items())):
+            arrays[f"ts_{i}"] = timestamps
+            arrays[f"price_{i}"] = prices
+        arrays["keys"] = np.array(["\x1f".join(key) for key in sorted(self.series)])
+        np.savez(path, **arrays)
+
+    @classmethod
+    def open(cls, path):
+        store = cls()
+        with np.load(path) as data:
+            for i, key in enumerate(data["keys"]):
+                store.series[tuple(str(key).split("\x1f"))] = (data[f"ts_{i}"], data[f"price_{i}"])
+        return store
+
+
+def load_weather_series(conn=None, cities=None, features=WEATHER_FEATURES, period=None):
+    """
+    Read weather_data as {city: (epoch-second timestamps, float32 features)}
+    sorted by time, with one row per reading. With `period` ("daily" or
+    "weekly") the rows are that period's means from the rollup tables,
+    stamped at the end of their bucket so an as-of join only sees buckets
+    that were complete at the observation time.
+    """
+    if period is not None:
+        return _load_rollup_series(conn, cities, features, period)
+    columns = ", ".join(features)
+    query = f"SELECT city, recorded_at, {columns} FROM weather_data WHERE recorded_at IS NOT NULL"
+    params = None
+    if cities:
+        query += f" AND city IN ({', '.join(['%s'] * len(cities))})"
+        params = list(cities)
+    query += " ORDER BY city, recorded_at"
+
+    owns_conn = conn is None
+    conn = conn or connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params or ())
+        df = pd.DataFrame(cursor.fetchall(), columns=["city", "recorded_at", *features])
+        cursor.close()
+    finally:
+        if owns_conn:
+            conn.close()
+
+    series = {}
+    for city, group in df.groupby("city", sort=False):
+        series[city] = (_to_epoch_seconds(group["recorded_at"]), group[list(features)].to_numpy(dtype=np.float32))
+    return series
+
+
+def _load_rollup_series(conn, cities, features, period):
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {PERIODS}")
+    owns_conn = conn is None
+    conn = conn or connect()
+    try:
+        rows = fetch_rollups(conn, period, cities=cities, variables=list(features))
+    finally:
+        if owns_conn:
+            conn.close()
+
+    series = {}
+    if not rows:
+        return series
+    df = pd.DataFrame(rows).pivot_table(index=["city", "bucket_start"], columns="variable", values="mean")
+    df = df.reindex(columns=list(features)).reset_index()
+    bucket_end = pd.to_datetime(df["bucket_start"]) + pd.Timedelta(days=1 if period == "daily" else 7)
+    df["bucket_end"] = _to_epoch_seconds(bucket_end)
+    for city, group in df.groupby("city", sort=False):
+        series[city] = (group["bucket_end"].to_numpy(), group[list(features)].to_numpy(dtype=np.float32))
+    return series
+
+
+def asof_join(store, weather, market_cities, window=7, commodities=None):
+    """
+    Build a weather-to-price training set.
+
+    For every price observation of a market listed in `market_cities`
+    (market -> city), take the `window` weather readings of that city at or
+    before the observation time. Observations with fewer than `window`
+    preceding readings are dropped.
+
+    Returns a dict with `X` (n, window, n_features) float32, `y` prices,
+    and per-row `market`, `commodity` and `observed_at` arrays.
+    """
+    X_parts, y_parts, markets, commodities_out, observed = [], [], [], [], []
+    for (market, commodity), (price_ts, prices) in sorted(store.series.items()):
+        if commodities and commodity not in commodities:
+            continue
+        city = market_cities.get(market)
+        if city not in weather:
+            continue
+        weather_ts, features = weather[city]
+
+        # Index of the last reading at or before each observation
+        last = np.searchsorted(weather_ts, price_ts, side="right") - 1
+        valid = last >= window - 1
+        if not valid.any():
+            continue
+        last = last[valid]
+        idx = last[:, None] + np.arange(-window + 1, 1)
+        X_parts.append(features[idx])
+        y_parts.append(prices[valid])
+        n = int(valid.sum())
+        markets.append(np.full(n, market, dtype=object))
+        commodities_out.append(np.full(n, commodity, dtype=object))
+        observed.append(price_ts[valid].astype("datetime64[s]"))
+
+    if not X_parts:
+        n_features = next(iter(weather.values()))[1].shape[1] if weather else 0
+        return {
+            "X": np.empty((0, window, n_features), dtype=np.float32),
+            "y": np.empty(0, dtype=np.float32),
+            "market": np.empty(0, dtype=object),
+            "commodity": np.empty(0, dtype=object),
+            "observed_at": np.empty(0, dtype="datetime64[s]"),
+        }
+    return {
+        "X": np.concatenate(X_parts),
+        "y": np.concatenate(y_parts),
+        "market": np.concatenate(markets),
+        "commodity": np.concatenate(commodities_out),
+        "observed_at": np.concatenate(observed),
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load crop market price files into a compact price store")
+    parser.add_argument("files", nargs="+", help="CSV, JSON or JSON-lines price files")
+    parser.add_argument("--store", default=os.path.join("data", "market_prices.npz"))
+    args = parser.parse_args(argv)
+
+    store = PriceStore.open(args.store) if os.path.exists(args.store) else PriceStore()
+    try:
+        store.load(*args.files)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load price files: {e}")
+        return 1
+    os.makedirs(os.path.dirname(args.store) or ".", exist_ok=True)
+    store.save(args.store)
+    print(f"✅ {len(store)} price observations in {len(store.keys())} series saved to {args.store}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
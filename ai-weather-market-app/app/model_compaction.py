@@ -0,0 +1,148 @@
+"""
+Compact, memory-mappable artifacts for the Random Forest model.
+
+`compact_forest` flattens every tree of a fitted scikit-learn forest into a
+handful of small typed arrays: int32 child indices, int16 feature ids,
+float32 thresholds and float32 (or, quantized, float16) leaf values, about a
+quarter of the size of the pickled estimator. Thresholds are rounded *down*
+to float32; scikit-learn compares float32 inputs against them, so the split
+decisions, and therefore the predictions, are unchanged.
+
+`save_compact` writes the arrays as uncompressed `.npy` files that
+`load_compact` memory-maps, so startup is near-instant and the pages are
+shared between worker processes; with `compress=True` a compressed `.npz`
+copy is written as well for shipping.
+"""
+import json
+import os
+
+import numpy as np
+
+ARRAY_NAMES = ("left", "right", "feature", "threshold", "value", "roots")
+
+
+def compact_forest(model, quantize=False):
+    """Flatten a fitted RandomForestRegressor (or any forest of regression trees)."""
+    lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        node_ids = np.arange(n, dtype=np.int64) + offset
+        is_leaf = tree.children_left == -1
+        # Leaves point at themselves so traversal can run a fixed number of steps
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+        rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+        features.append(np.where(is_leaf, 0, tree.feature))
+        threshold = tree.threshold.astype(np.float32)
+        too_high = threshold.astype(np.float64) > tree.threshold
+        threshold[too_high] = np.nextafter(threshold[too_high], np.float32(-np.inf))
+        thresholds.append(np.where(is_leaf, np.float32(0), threshold))
+        values.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    if offset >= np.iinfo(np.int32).max:
+        raise ValueError("Forest has too many nodes for int32 indices")
+    return {
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "feature": np.concatenate(features).astype(np.int16 if model.n_features_in_ < 2 ** 15 else np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float32),
+        "value": np.concatenate(values).astype(np.float16 if quantize else np.float32),
+        "roots": np.array(roots, dtype=np.int32),
+        "meta": {
+            "n_features": int(model.n_features_in_),
+            "feature_names": [str(f) for f in getattr(model, "feature_names_in_", [])],
+            "max_depth": int(max_depth),
+            "n_trees": len(roots),
+            "quantized": bool(quantize),
+        },
+    }
+
+
+class CompactForest:
+    """Vectorized predictor over compact forest arrays (possibly memory-mapped)."""
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self.feature_names = meta.get("feature_names") or None
+
+    def predict(self, X, chunk_size=4096):
+        if hasattr(X, "columns") and self.feature_names:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        a = self.arrays
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            chunk = X[start:start + chunk_size]
+            rows = np.arange(len(chunk))[:, None]
+            # One column per tree; every step moves all (sample, tree) pairs down one level
+            node = np.broadcast_to(a["roots"], (len(chunk), len(a["roots"])))
+            for depth in range(self.meta["max_depth"]):
+                go_left = chunk[rows, a["feature"][node]] <= a["threshold"][node]
+                node = np.where(go_left, a["left"][node], a["right"][node])
+                # Most paths end well before max_depth; stop once all have
+                if depth % 4 == 3 and (a["left"][node] == node).all():
+                    break
+            out[start:start + chunk_size] = a["value"][node].astype(np.float64).mean(axis=1)
+        return out
+
+
+def save_compact(compact, path, compress=False):
+    """Write arrays to `path/` as .npy files plus meta.json; optionally `path.npz` too."""
+    os.makedirs(path, exist_ok=True)
+    for name in ARRAY_NAMES:
+        np.save(os.path.join(path, f"{name}.npy"), compact[name])
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(compact["meta"], f, indent=2)
+    if compress:
+        np.savez_compressed(path + ".npz", meta=json.dumps(compact["meta"]),
+                            **{name: compact[name] for name in ARRAY_NAMES})
+
+
+def load_compact(path, mmap_mode="r"):
+    """Load a compact forest from a directory (memory-mapped) or a .npz file."""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in ARRAY_NAMES}
+            meta = json.loads(str(data["meta"]))
+        return CompactForest(arrays, meta)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    return CompactForest(arrays, meta)
+
+
+def _path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+
+def compaction_report(model, model_path, compact_path, X_test, y_test, report_path=None):
+    """
+    Compare the original and compact artifacts: on-disk sizes, test MSE of
+    each and the largest prediction difference. Written to `report_path`
+    as JSON when given.
+    """
+    y_test = np.asarray(y_test, dtype=np.float64)
+    compact = load_compact(compact_path)
+    original_pred = model.predict(X_test)
+    compact_pred = compact.predict(X_test)
+    report = {
+        "original_bytes": _path_size(model_path),
+        "compact_bytes": _path_size(compact_path),
+        "compressed_bytes": _path_size(compact_path + ".npz"),
+        "original_mse": float(np.mean((original_pred - y_test) ** 2)),
+        "compact_mse": float(np.mean((compact_pred - y_test) ** 2)),
+        "max_abs_prediction_diff": float(np.max(np.abs(original_pred - compact_pred))) if len(y_test) else 0.0,
+        "quantized": compact.meta["quantized"],
+    }
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
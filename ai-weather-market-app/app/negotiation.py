@@ -0,0 +1,179 @@
+"""
+Content negotiation and conditional responses for the Flask endpoints.
+
+`respond` picks the body encoding from the Accept header: JSON (default),
+MessagePack, or Arrow IPC stream for tabular results. It compresses with
+brotli or gzip according to Accept-Encoding. msgpack, pyarrow and brotli are
+pinned in requirements.txt; an encoding whose package is not installed is
+not offered. Each response carries an
+ETag derived from the data version plus the request. It also carries
+Last-Modified. When the client's If-None-Match or If-Modified-Since still
+holds, the reply is an empty 304.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from flask import Response, request  # type: ignore
+from werkzeug.datastructures import MIMEAccept  # type: ignore
+from werkzeug.http import http_date, parse_accept_header, parse_date  # type: ignore
+
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa  # type: ignore
+except ImportError:
+    pa = None
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+class DataVersion:
+    """
+    Monotonic version + modification time of the data behind a set of
+    endpoints. The version includes a random per-process nonce: counters
+    restart at 0 on every boot and in every worker, and an ETag minted by
+    another process must never validate here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.nonce = uuid.uuid4().hex[:12]
+        self.counter = 0
+        self.modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def bump(self, when=None):
+        with self._lock:
+            self.counter += 1
+            # HTTP dates have one-second resolution: keep Last-Modified strictly increasing
+            when = (when or datetime.now(timezone.utc)).replace(microsecond=0)
+            self.modified = max(when, self.modified + timedelta(seconds=1))
+
+    def __str__(self):
+        return f"{self.nonce}-{self.counter}"
+
+
+def _to_builtin(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not serializable")
+
+
+def _arrow_table(payload):
+    if isinstance(payload, list) and payload and all(isinstance(row, dict) for row in payload):
+        return pa.Table.from_pylist(json.loads(json.dumps(payload, default=_to_builtin)))
+    if isinstance(payload, dict) and payload and all(isinstance(v, (list, np.ndarray)) for v in payload.values()):
+        return pa.Table.from_pydict({k: list(np.asarray(v).tolist()) for k, v in payload.items()})
+    return None
+
+
+def available_types(payload):
+    types = [JSON]
+    if msgpack is not None:
+        types.append(MSGPACK)
+    if pa is not None and _arrow_table(payload) is not None:
+        types.append(ARROW)
+    return types
+
+
+def encode(payload, mimetype):
+    if mimetype == MSGPACK:
+        return msgpack.packb(payload, default=_to_builtin)
+    if mimetype == ARROW:
+        sink = pa.BufferOutputStream()
+        table = _arrow_table(payload)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return json.dumps(payload, default=_to_builtin, separators=(",", ":")).encode("utf-8")
+
+
+def compress(body, accept_encoding):
+    """(body, content-encoding or None) for the best encoding the client accepts."""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    accepted = parse_accept_header(accept_encoding or "")
+    if brotli is not None and accepted["br"]:
+        return brotli.compress(body, quality=5), "br"
+    if accepted["gzip"]:
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+def make_etag(version, *parts):
+    digest = hashlib.sha256(str(version).encode("utf-8"))
+    for part in parts:
+        digest.update(b"\x1f")
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def not_modified(etag, last_modified=None):
+    """True if the current request's validators show the client copy is still current."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    # A date says nothing about a POST body, so only GET/HEAD fall back to it
+    if request.method not in ("GET", "HEAD"):
+        return False
+    since = parse_date(request.headers.get("If-Modified-Since"))
+    return bool(last_modified and since and last_modified.replace(microsecond=0) <= since)
+
+
+def _validator_headers(etag, last_modified):
+    headers = {"ETag": f'"{etag}"', "Vary": "Accept, Accept-Encoding", "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def respond(payload, status=200, version=None, last_modified=None, etag_parts=()):
+    """
+    Negotiated Flask response for `payload`. With a `version`, the ETag
+    covers version + request path, query, a hash of the body (so POSTed
+    predictions validate per input) and any `etag_parts` describing how the
+    result was produced; a matching conditional request gets a bare 304.
+    """
+    headers = {}
+    if version is not None:
+        body_hash = hashlib.sha256(request.get_data(cache=True)).hexdigest()
+        etag = make_etag(version, request.method, request.full_path, body_hash,
+                         request.headers.get("Accept", ""), *etag_parts)
+        headers = _validator_headers(etag, last_modified)
+        if status == 200 and not_modified(etag, last_modified):
+            return Response(status=304, headers=headers)
+
+    offered = available_types(payload)
+    accept = parse_accept_header(request.headers.get("Accept", ""), MIMEAccept)
+    # Aliases some msgpack clients send
+    if msgpack is not None and (accept["application/x-msgpack"] or accept["application/vnd.msgpack"]) \
+            and not accept.best_match(offered):
+        mimetype = MSGPACK
+    else:
+        mimetype = accept.best_match(offered, default=JSON)
+
+    body, content_encoding = compress(encode(payload, mimetype), request.headers.get("Accept-Encoding"))
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    headers.setdefault("Vary", "Accept, Accept-Encoding")
+    return Response(body, status=status, mimetype=mimetype, headers=headers)
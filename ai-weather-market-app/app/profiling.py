@@ -0,0 +1,256 @@
+"""
+On-demand profiling for the Flask server and the ingestion loops.
+
+Everything here is off unless switched on by environment variables:
+
+    PROFILING_TOKEN=...    enables GET /debug/profile/cpu?seconds=N and
+                           /debug/profile/memory?seconds=N, which require the
+                           X-Profiling-Token header
+    PROFILING_SIGNAL=1     SIGUSR1 writes a CPU profile and an allocation diff
+                           to PROFILING_DIR (default "profiles/")
+    SLOW_REQUEST_MS=500    logs requests/ticks slower than this, broken down by
+                           the `stage(...)` blocks they went through
+
+The CPU profiler samples every thread's stack from a background thread
+(sys._current_frames), so nothing is instrumented and the target code runs
+unmodified. Its output includes folded stacks for flamegraph.pl / speedscope.
+The memory profile compares two tracemalloc snapshots taken N seconds apart.
+While disabled, `stage` and `timed` return a shared no-op context manager.
+"""
+import contextlib
+import hmac
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+MAX_PROFILE_SECONDS = 60
+DEFAULT_INTERVAL = 0.005
+
+_NOOP = contextlib.nullcontext()
+_local = threading.local()
+
+
+def slow_threshold_ms():
+    value = os.getenv("SLOW_REQUEST_MS")
+    return float(value) if value else None
+
+
+_slow_ms = slow_threshold_ms()
+
+
+# ---------------------------------------------------------------------------
+# CPU sampling
+# ---------------------------------------------------------------------------
+
+def sample_stacks(seconds, interval=DEFAULT_INTERVAL):
+    """Counter of folded stacks ("thread;outer;...;inner") sampled across all other threads."""
+    counts = Counter()
+    own = threading.get_ident()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def summarize_stacks(counts, top=25):
+    """Top functions by own (leaf) and total samples, plus the folded stacks."""
+    total = sum(counts.values())
+    own, cumulative = Counter(), Counter()
+    for stack, n in counts.items():
+        frames = stack.split(";")[1:]
+        if frames:
+            own[frames[-1]] += n
+        for frame in set(frames):
+            cumulative[frame] += n
+
+    def table(counter):
+        return [{"function": f, "samples": n, "percent": round(100 * n / total, 1)}
+                for f, n in counter.most_common(top)]
+
+    return {
+        "samples": total,
+        "top_self": table(own) if total else [],
+        "top_total": table(cumulative) if total else [],
+        "folded": "\n".join(f"{stack} {n}" for stack, n in counts.most_common()),
+    }
+
+
+def profile_cpu(seconds, interval=DEFAULT_INTERVAL, top=25):
+    seconds = min(float(seconds), MAX_PROFILE_SECONDS)
+    return {"seconds": seconds, "interval": interval, **summarize_stacks(sample_stacks(seconds, interval), top)}
+
+
+# ---------------------------------------------------------------------------
+# Allocations
+# ---------------------------------------------------------------------------
+
+def allocation_diff(seconds, top=25, frames=10):
+    """
+    Top allocation sites by growth over `seconds`. tracemalloc is only
+    running for the duration of the call unless it was already on.
+    """
+    seconds = min(float(seconds), MAX_PROFILE_SECONDS)
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+    try:
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        before = tracemalloc.take_snapshot().filter_traces(ignore)
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "size_kb": round(stat.size / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in after.compare_to(before, "lineno")[:top]
+        ],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Slow request / tick log
+# ---------------------------------------------------------------------------
+
+class _Timer:
+    def __init__(self, label, threshold_ms):
+        self.label = label
+        self.threshold_ms = threshold_ms
+        self.stages = []
+
+    def __enter__(self):
+        self.parent = getattr(_local, "timer", None)
+        _local.timer = self
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        _local.timer = self.parent
+        if elapsed_ms >= self.threshold_ms:
+            stages = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.stages)
+            print(f"[SLOW] {self.label} took {elapsed_ms:.0f} ms" + (f" ({stages})" if stages else ""))
+        return False
+
+
+@contextlib.contextmanager
+def _stage(timer, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.stages.append((name, (time.perf_counter() - start) * 1000))
+
+
+def timed(label):
+    """Time a request or loop tick; logged with its stages if slower than SLOW_REQUEST_MS."""
+    if _slow_ms is None:
+        return _NOOP
+    return _Timer(label, _slow_ms)
+
+
+def stage(name):
+    """Record a named stage of the enclosing `timed` block (no-op outside one or when disabled)."""
+    timer = getattr(_local, "timer", None) if _slow_ms is not None else None
+    if timer is None:
+        return _NOOP
+    return _stage(timer, name)
+
+
+# ---------------------------------------------------------------------------
+# Entry points: Flask routes and a signal
+# ---------------------------------------------------------------------------
+
+def install_flask(app):
+    """Register the slow-request hooks and token-protected profile routes if enabled."""
+    from flask import abort, g, jsonify, request  # type: ignore
+
+    if _slow_ms is not None:
+        @app.before_request
+        def _start_request_timer():
+            g.profiling_timer = timed(f"{request.method} {request.path}")
+            g.profiling_timer.__enter__()
+
+        @app.teardown_request
+        def _finish_request_timer(exc):
+            timer = g.pop("profiling_timer", None)
+            if timer is not None:
+                timer.__exit__(None, None, None)
+
+    token = os.getenv("PROFILING_TOKEN")
+    if not token:
+        return
+
+    def authorized():
+        return hmac.compare_digest(request.headers.get("X-Profiling-Token", ""), token)
+
+    @app.route("/debug/profile/cpu", methods=["GET"])
+    def profile_cpu_route():
+        if not authorized():
+            abort(404)
+        interval = float(request.args.get("interval", DEFAULT_INTERVAL))
+        return jsonify(profile_cpu(request.args.get("seconds", 10), max(interval, 0.001))), 200
+
+    @app.route("/debug/profile/memory", methods=["GET"])
+    def profile_memory_route():
+        if not authorized():
+            abort(404)
+        return jsonify(allocation_diff(request.args.get("seconds", 10), int(request.args.get("top", 25)))), 200
+
+
+def _write_profiles(seconds, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    cpu = profile_cpu(seconds)
+    with open(os.path.join(out_dir, f"cpu-{stamp}.folded"), "w") as f:
+        f.write(cpu.pop("folded"))
+    memory = allocation_diff(seconds)
+    with open(os.path.join(out_dir, f"profile-{stamp}.json"), "w") as f:
+        json.dump({"cpu": cpu, "memory": memory}, f, indent=2)
+    print(f"✅ Profiles written to {out_dir} ({stamp})")
+
+
+def install_signal_handler(signum=getattr(signal, "SIGUSR1", None), seconds=None, out_dir=None):
+    """
+    With PROFILING_SIGNAL=1, `kill -USR1 <pid>` profiles the process for
+    PROFILING_SECONDS (default 10) in a background thread and writes the results.
+    """
+    if os.getenv("PROFILING_SIGNAL") != "1" or signum is None:
+        return False
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    seconds = seconds or float(os.getenv("PROFILING_SECONDS", "10"))
+    out_dir = out_dir or os.getenv("PROFILING_DIR", "profiles")
+
+    def handler(signum, frame):
+        threading.Thread(target=_write_profiles, args=(seconds, out_dir), name="profiler", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
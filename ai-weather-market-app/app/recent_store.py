@@ -0,0 +1,159 @@
+"""
+Process-local store of each city's most recent observations.
+
+Every city gets a fixed-size ring buffer of float32 rows (one per timestep,
+columns in `RECENT_COLUMNS` order, i.e. the LSTM's input order). Each row is
+written twice, at `i` and `i + capacity`, so the newest `n` rows are always
+one contiguous slice and `window` can hand out a zero-copy view ready to
+feed the model. The store is filled from weather_data once at startup and
+then kept current with `append_columns` as new rows are ingested, or
+reloaded per city when the change feed (app.change_feed) announces new rows,
+so forecast requests never query PostgreSQL.
+"""
+import threading
+
+import numpy as np
+
+from app.db import dialect
+
+RECENT_COLUMNS = ("temperature_c", "humidity_percent", "wind_speed_kmh", "pressure_hpa", "precipitation_mm")
+# Timesteps per LSTM input window, shared by the trainers, the server and predict_weather.py
+LSTM_SEQ_LENGTH = 10
+
+
+class CityRing:
+    def __init__(self, capacity, n_columns):
+        self.capacity = capacity
+        self.values = np.full((2 * capacity, n_columns), np.nan, dtype=np.float32)
+        self.times = np.zeros(2 * capacity, dtype="datetime64[s]")
+        self.head = 0
+        self.size = 0
+
+    @property
+    def last_time(self):
+        return self.times[self.head - 1 + self.capacity] if self.size else None
+
+    def append(self, timestamp, row):
+        if self.size and timestamp == self.last_time:
+            # Same timestep written again: replace the newest row
+            slot = (self.head - 1) % self.capacity
+        else:
+            slot = self.head
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+        self.values[slot] = self.values[slot + self.capacity] = row
+        self.times[slot] = self.times[slot + self.capacity] = timestamp
+
+    def window(self, n):
+        n = min(n, self.size)
+        end = self.head + self.capacity
+        return self.times[end - n:end], self.values[end - n:end]
+
+
+class RecentObservationStore:
+    def __init__(self, capacity=30, columns=RECENT_COLUMNS):
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self.rings = {}
+        self._lock = threading.Lock()
+
+    def cities(self):
+        return sorted(self.rings)
+
+    def _ring(self, city):
+        ring = self.rings.get(city)
+        if ring is None:
+            ring = self.rings[city] = CityRing(self.capacity, len(self.columns))
+        return ring
+
+    def append_columns(self, columns):
+        """
+        Add a batch of weather_data columns (lists or arrays). Rows older than
+        a city's newest buffered row are ignored; a row with the same
+        timestamp replaces it.
+        """
+        cities = np.asarray(columns["city"], dtype=object)
+        times = np.array(columns["recorded_at"], dtype="datetime64[s]")
+        values = np.column_stack([np.array(columns[c], dtype=np.float32) for c in self.columns])
+        order = np.lexsort((times, cities.astype(str)))
+        with self._lock:
+            for i in order:
+                if cities[i] is None:
+                    continue
+                ring = self._ring(cities[i])
+                if ring.size and times[i] < ring.last_time:
+                    continue
+                ring.append(times[i], values[i])
+
+    def reload(self, conn, cities):
+        """
+        Rebuild the given cities' buffers from the database (e.g. after a
+        backfill of older rows) and swap them in atomically, so readers see
+        either the old or the new buffer, never a missing one.
+        """
+        fresh = RecentObservationStore(self.capacity, self.columns)
+        fresh.load_from_db(conn, cities=cities)
+        with self._lock:
+            for city in cities:
+                if city in fresh.rings:
+                    self.rings[city] = fresh.rings[city]
+                else:
+                    self.rings.pop(city, None)
+
+    def load_from_db(self, conn, cities=None):
+        """Fill the buffers with each city's newest `capacity` rows."""
+        select = ", ".join(self.columns)
+        where = ""
+        params = []
+        if cities:
+            where = f"WHERE city IN ({', '.join(['%s'] * len(cities))})"
+            params = list(cities)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT city, recorded_at, {select} FROM (
+                    SELECT city, recorded_at, {select},
+                           ROW_NUMBER() OVER (PARTITION BY city ORDER BY recorded_at DESC) AS rn
+                    FROM weather_data {where}
+                ) latest
+                WHERE rn <= %s
+                ORDER BY city, recorded_at
+            """, params + [self.capacity])
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if not rows:
+            return 0
+        columns = dict(zip(("city", "recorded_at") + self.columns, zip(*rows)))
+        if dialect(conn) == "sqlite":
+            columns["recorded_at"] = [np.datetime64(t.replace(" ", "T")) for t in columns["recorded_at"]]
+        columns = {k: [np.nan if v is None else v for v in vals] if k in self.columns else vals
+                   for k, vals in columns.items()}
+        self.append_columns(columns)
+        return len(rows)
+
+    def window(self, city, n=None):
+        """
+        Zero-copy (n, len(columns)) float32 view of the city's newest `n`
+        rows, oldest first (all buffered rows when `n` is None). The view is
+        only guaranteed until the next append; copy it to keep it.
+        """
+        ring = self.rings.get(city)
+        if ring is None:
+            return np.empty((0, len(self.columns)), dtype=np.float32)
+        return ring.window(n or self.capacity)[1]
+
+    def window_times(self, city, n=None):
+        ring = self.rings.get(city)
+        if ring is None:
+            return np.empty(0, dtype="datetime64[s]")
+        return ring.window(n or self.capacity)[0]
+
+    def batch(self, cities, n):
+        """Stack the newest `n` rows of each city into a (cities, n, columns) model input."""
+        out = np.full((len(cities), n, len(self.columns)), np.nan, dtype=np.float32)
+        for i, city in enumerate(cities):
+            window = self.window(city, n)
+            if len(window):
+                out[i, n - len(window):] = window
+        return out
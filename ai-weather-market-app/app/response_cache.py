@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import date
+
+import requests
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".weather_cache")
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a response is not in the cache."""
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw weatherapi.com responses.
+
+    Entries are gzip-compressed JSON files named by the SHA-256 of the
+    endpoint and query (the API key is left out). `history.json` responses for
+    past days never expire; everything else (`current.json`, today's history)
+    is reused for at most `current_ttl` seconds. In `offline` mode a miss
+    raises `CacheMiss` instead of calling the API, so backfills and parser
+    changes can be replayed from disk with no network.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, current_ttl=60, offline=False, enabled=True):
+        self.root = root
+        self.current_ttl = current_ttl
+        self.offline = offline
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            root=os.getenv("WEATHER_CACHE_DIR") or DEFAULT_CACHE_DIR,
+            current_ttl=float(os.getenv("WEATHER_CACHE_CURRENT_TTL", "60")),
+            offline=os.getenv("WEATHER_CACHE_OFFLINE", "0") == "1",
+            enabled=os.getenv("WEATHER_CACHE", "1") != "0",
+        )
+
+    @staticmethod
+    def key(endpoint, params):
+        query = {k: str(v) for k, v in params.items() if k != "key"}
+        material = json.dumps([endpoint, sorted(query.items())])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + ".json.gz")
+
+    def ttl(self, endpoint, params):
+        """Seconds an entry stays valid, or None if it never expires."""
+        if endpoint == "history.json" and "dt" in params:
+            if str(params["dt"]) < date.today().isoformat():
+                return None
+        return self.current_ttl
+
+    def get(self, endpoint, params):
+        if not self.enabled:
+            return None
+        path = self.path(self.key(endpoint, params))
+        try:
+            ttl = self.ttl(endpoint, params)
+            if ttl is not None and time.time() - os.path.getmtime(path) > ttl:
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, endpoint, params, data):
+        if not self.enabled:
+            return
+        path = self.path(self.key(endpoint, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def fetch_json(self, base_url, endpoint, params, timeout=30):
+        """Return the JSON response for `endpoint`, from the cache when possible."""
+        data = self.get(endpoint, params)
+        if data is not None:
+            return data
+        self.misses += 1
+        if self.offline:
+            raise CacheMiss(f"{endpoint} {params.get('q')} {params.get('dt', '')} not cached")
+        response = requests.get(f"{base_url}/{endpoint}", params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        self.put(endpoint, params, data)
+        return data
@@ -0,0 +1,201 @@
+"""
+Incrementally maintained daily and weekly weather aggregates per city.
+
+Every ingested batch is reduced to (city, bucket, variable) partial
+aggregates with NumPy and merged into weather_rollup_daily /
+weather_rollup_weekly in the same transaction as the raw insert, so only the
+buckets the batch touches are updated. Readers get min/mean/max/sum per
+bucket without scanning raw history.
+
+    python -m app.rollups rebuild   # recompute both tables from weather_data
+"""
+import sys
+from datetime import date
+
+import numpy as np
+
+from app.db import connect, dialect
+
+PERIODS = ("daily", "weekly")
+
+ROLLUP_VARIABLES = (
+    "temperature_c",
+    "humidity_percent",
+    "pressure_hpa",
+    "wind_speed_kmh",
+    "precipitation_mm",
+    "uv_index",
+    "cloud_cover_percent",
+)
+
+# Partial aggregates merge by adding counts and sums and widening min/max
+UPSERT_QUERY = {
+    "postgresql": """
+        INSERT INTO weather_rollup_{period} (city, bucket_start, variable, n_obs, value_sum, value_min, value_max)
+        VALUES %s
+        ON CONFLICT (city, bucket_start, variable) DO UPDATE SET
+            n_obs = weather_rollup_{period}.n_obs + EXCLUDED.n_obs,
+            value_sum = weather_rollup_{period}.value_sum + EXCLUDED.value_sum,
+            value_min = LEAST(weather_rollup_{period}.value_min, EXCLUDED.value_min),
+            value_max = GREATEST(weather_rollup_{period}.value_max, EXCLUDED.value_max)
+    """,
+    "sqlite": """
+        INSERT INTO weather_rollup_{period} (city, bucket_start, variable, n_obs, value_sum, value_min, value_max)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (city, bucket_start, variable) DO UPDATE SET
+            n_obs = weather_rollup_{period}.n_obs + excluded.n_obs,
+            value_sum = weather_rollup_{period}.value_sum + excluded.value_sum,
+            value_min = MIN(weather_rollup_{period}.value_min, excluded.value_min),
+            value_max = MAX(weather_rollup_{period}.value_max, excluded.value_max)
+    """,
+}
+
+# SQL expression for the start of a bucket
+BUCKET_SQL = {
+    "postgresql": {
+        "daily": "date_trunc('day', recorded_at)::date",
+        "weekly": "date_trunc('week', recorded_at)::date",
+    },
+    "sqlite": {
+        "daily": "date(recorded_at)",
+        "weekly": "date(recorded_at, 'weekday 0', '-6 days')",
+    },
+}
+
+
+def bucket_days(recorded_at, period):
+    """Bucket start as days since 1970-01-01; weekly buckets start on Monday."""
+    days = np.array(recorded_at, dtype="datetime64[D]").astype(np.int64)
+    if period == "weekly":
+        # 1970-01-01 was a Thursday, so Mondays are days ≡ 4 (mod 7)
+        days = (days + 3) // 7 * 7 - 3
+    return days
+
+
+def aggregate_batch(columns, period):
+    """
+    Reduce a batch of weather_data columns to partial aggregates, returned
+    as (city, bucket_start, variable, n_obs, value_sum, value_min, value_max)
+    rows. Null values and rows without a city or timestamp are skipped.
+    """
+    valid = np.array([c is not None and t is not None for c, t in zip(columns["city"], columns["recorded_at"])])
+    if not valid.any():
+        return []
+    cities, city_codes = np.unique(np.array(columns["city"], dtype=object)[valid].astype(str), return_inverse=True)
+    buckets, bucket_codes = np.unique(
+        bucket_days(np.array(columns["recorded_at"], dtype=object)[valid], period), return_inverse=True
+    )
+    groups, group_codes = np.unique(city_codes * len(buckets) + bucket_codes, return_inverse=True)
+    n_groups = len(groups)
+
+    rows = []
+    for variable in ROLLUP_VARIABLES:
+        values = np.array(columns[variable], dtype=float)[valid]
+        present = ~np.isnan(values)
+        if not present.any():
+            continue
+        codes = group_codes[present]
+        values = values[present]
+        counts = np.bincount(codes, minlength=n_groups)
+        sums = np.bincount(codes, weights=values, minlength=n_groups)
+        mins = np.full(n_groups, np.inf)
+        maxs = np.full(n_groups, -np.inf)
+        np.minimum.at(mins, codes, values)
+        np.maximum.at(maxs, codes, values)
+
+        for g in np.flatnonzero(counts):
+            city = cities[groups[g] // len(buckets)]
+            bucket = date.fromordinal(date(1970, 1, 1).toordinal() + int(buckets[groups[g] % len(buckets)]))
+            rows.append((city, bucket, variable, int(counts[g]), float(sums[g]), float(mins[g]), float(maxs[g])))
+    return rows
+
+
+def update_rollups(cursor, columns, db_dialect="postgresql"):
+    """Merge a freshly inserted batch into the rollup tables (caller commits)."""
+    for period in PERIODS:
+        rows = aggregate_batch(columns, period)
+        if not rows:
+            continue
+        query = UPSERT_QUERY[db_dialect].format(period=period)
+        if db_dialect == "postgresql":
+            from psycopg2.extras import execute_values  # type: ignore
+            execute_values(cursor, query, rows, page_size=1000)
+        else:
+            cursor.executemany(query, rows)
+
+
+def rebuild_rollups(conn):
+    """Recompute both rollup tables from the raw weather_data rows."""
+    db_dialect = dialect(conn)
+    cursor = conn.cursor()
+    try:
+        for period in PERIODS:
+            bucket = BUCKET_SQL[db_dialect][period]
+            cursor.execute(f"DELETE FROM weather_rollup_{period}")
+            for variable in ROLLUP_VARIABLES:
+                cursor.execute(f"""
+                    INSERT INTO weather_rollup_{period} (city, bucket_start, variable, n_obs, value_sum, value_min, value_max)
+                    SELECT city, {bucket}, '{variable}', COUNT({variable}), SUM({variable}), MIN({variable}), MAX({variable})
+                    FROM weather_data
+                    WHERE city IS NOT NULL AND {variable} IS NOT NULL
+                    GROUP BY city, {bucket}
+                """)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def fetch_rollups(conn, period="daily", cities=None, start=None, end=None, variables=None):
+    """
+    Read aggregates as dicts with city, bucket_start, variable, n_obs, min,
+    mean, max and sum, ordered by city and bucket. `start`/`end` bound
+    bucket_start inclusively.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {PERIODS}")
+    conditions, params = [], []
+    for column, values in (("city", cities), ("variable", variables)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+    if start is not None:
+        conditions.append("bucket_start >= %s")
+        params.append(start)
+    if end is not None:
+        conditions.append("bucket_start <= %s")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT city, bucket_start, variable, n_obs, value_min, value_sum / n_obs, value_max, value_sum
+            FROM weather_rollup_{period}
+            {where}
+            ORDER BY city, bucket_start, variable
+        """, params)
+        keys = ("city", "bucket_start", "variable", "n_obs", "min", "mean", "max", "sum")
+        return [dict(zip(keys, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] != ["rebuild"]:
+        print("Usage: python -m app.rollups rebuild")
+        return 1
+    conn = connect()
+    try:
+        rebuild_rollups(conn)
+        print("✅ Rollup tables rebuilt from weather_data.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
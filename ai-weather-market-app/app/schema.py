@@ -0,0 +1,281 @@
+"""
+Schema management for the weather_data table.
+
+On PostgreSQL, weather_data is range-partitioned by month on `recorded_at`
+with a (city, recorded_at) index, so latest-window and range queries only
+touch the partitions and index ranges they need. Measurements are stored as
+REAL (4 bytes) rather than FLOAT/DECIMAL, which is well within sensor
+precision.
+
+    python -m app.schema ensure     # create the table if missing
+    python -m app.schema migrate    # convert an existing unpartitioned table
+"""
+import sys
+import weakref
+from datetime import datetime
+
+from app.db import connect, dialect
+
+COLUMN_DEFINITIONS = """
+    city VARCHAR(100),
+    country CHAR(2),
+    latitude REAL,
+    longitude REAL,
+    recorded_at TIMESTAMP NOT NULL,
+    temperature_c REAL,
+    humidity_percent REAL,
+    pressure_hpa REAL,
+    wind_speed_kmh REAL,
+    wind_direction_deg REAL,
+    precipitation_mm REAL,
+    uv_index REAL,
+    air_quality_index REAL,
+    weather_condition VARCHAR(50),
+    cloud_cover_percent REAL,
+    visibility_km REAL,
+    dew_point_c REAL,
+    solar_radiation_w_m2 REAL,
+    sunrise_time TIME,
+    sunset_time TIME
+"""
+
+DATA_COLUMNS = (
+    "city, country, latitude, longitude, recorded_at, temperature_c, humidity_percent, pressure_hpa, "
+    "wind_speed_kmh, wind_direction_deg, precipitation_mm, uv_index, air_quality_index, weather_condition, "
+    "cloud_cover_percent, visibility_km, dew_point_c, solar_radiation_w_m2, sunrise_time, sunset_time"
+)
+
+POSTGRES_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS weather_data (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        {COLUMN_DEFINITIONS},
+        PRIMARY KEY (id, recorded_at)
+    ) PARTITION BY RANGE (recorded_at)
+    """,
+    # Catches rows outside every monthly partition so inserts never fail
+    "CREATE TABLE IF NOT EXISTS weather_data_default PARTITION OF weather_data DEFAULT",
+    "CREATE INDEX IF NOT EXISTS weather_data_city_recorded_at_idx ON weather_data (city, recorded_at)",
+    "CREATE INDEX IF NOT EXISTS weather_data_recorded_at_idx ON weather_data (recorded_at)",
+]
+
+SQLITE_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS weather_data (
+        id INTEGER PRIMARY KEY,
+        {COLUMN_DEFINITIONS}
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS weather_data_city_recorded_at_idx ON weather_data (city, recorded_at)",
+    "CREATE INDEX IF NOT EXISTS weather_data_recorded_at_idx ON weather_data (recorded_at)",
+]
+
+# Per-city daily and weekly aggregates maintained by app/rollups.py. One row
+# per (city, bucket, variable); the mean is value_sum / n_obs.
+ROLLUP_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS weather_rollup_{period} (
+        city VARCHAR(100) NOT NULL,
+        bucket_start DATE NOT NULL,
+        variable VARCHAR(32) NOT NULL,
+        n_obs INTEGER NOT NULL,
+        value_sum DOUBLE PRECISION NOT NULL,
+        value_min REAL NOT NULL,
+        value_max REAL NOT NULL,
+        PRIMARY KEY (city, bucket_start, variable)
+    )
+    """
+    for period in ("daily", "weekly")
+]
+
+# Monthly partitions already known to exist, so steady-state inserts skip the catalog lookup
+_known_partitions = set()
+# Connections that have already run ensure_schema, so inserts don't repeat the lookup and commit
+_schema_ready = weakref.WeakSet()
+
+
+def partition_name(month_start):
+    return f"weather_data_y{month_start.year}m{month_start.month:02d}"
+
+
+def next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_starts(first, last):
+    """First day of every month from `first` to `last`, inclusive."""
+    month = datetime(first.year, first.month, 1)
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+def table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    return cursor.fetchone()[0]
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('weather_data'))")
+    return cursor.fetchone()[0]
+
+
+def ensure_schema(conn):
+    """
+    Create weather_data, its indexes and the rollup tables if missing. An
+    existing unpartitioned weather_data is left alone (inserts keep working);
+    run `migrate` to convert it. Runs once per connection.
+    """
+    if conn in _schema_ready:
+        return
+    cursor = conn.cursor()
+    try:
+        if dialect(conn) == "sqlite":
+            for statement in SQLITE_DDL:
+                cursor.execute(statement)
+        elif not table_exists(cursor, "weather_data"):
+            for statement in POSTGRES_DDL:
+                cursor.execute(statement)
+        for statement in ROLLUP_DDL:
+            cursor.execute(statement)
+        conn.commit()
+    finally:
+        cursor.close()
+    _schema_ready.add(conn)
+
+
+def ensure_partitions(conn, timestamps):
+    """
+    Create the monthly partitions covering `timestamps` if they don't exist,
+    moving any of their rows already caught by weather_data_default.
+    """
+    timestamps = [ts for ts in timestamps if ts is not None]
+    if dialect(conn) == "sqlite" or not timestamps:
+        return
+    months = [m for m in month_starts(min(timestamps), max(timestamps)) if m not in _known_partitions]
+    if not months:
+        return
+
+    cursor = conn.cursor()
+    try:
+        if not is_partitioned(cursor):
+            return
+        for month in months:
+            if not table_exists(cursor, partition_name(month)):
+                _create_partition(cursor, month, move_default=True)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    _known_partitions.update(months)
+
+
+def _create_partition(cursor, month, move_default=False):
+    """
+    PostgreSQL refuses to create a partition while the default partition
+    holds rows in its range, so with `move_default` those rows are taken out
+    first and re-inserted (ids kept) into the new partition, all within the
+    caller's transaction.
+    """
+    bounds = (month, next_month(month))
+    moving = False
+    if move_default and table_exists(cursor, "weather_data_default"):
+        cursor.execute("LOCK TABLE weather_data_default IN EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM weather_data_default WHERE recorded_at >= %s AND recorded_at < %s)",
+            bounds,
+        )
+        moving = cursor.fetchone()[0]
+    if moving:
+        cursor.execute(
+            "CREATE TEMP TABLE weather_data_moving ON COMMIT DROP AS "
+            "SELECT * FROM weather_data_default WHERE recorded_at >= %s AND recorded_at < %s",
+            bounds,
+        )
+        cursor.execute("DELETE FROM weather_data_default WHERE recorded_at >= %s AND recorded_at < %s", bounds)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF weather_data "
+        "FOR VALUES FROM (%s) TO (%s)",
+        bounds,
+    )
+    if moving:
+        cursor.execute(f"INSERT INTO weather_data (id, {DATA_COLUMNS}) SELECT id, {DATA_COLUMNS} FROM weather_data_moving")
+        print(f"[INFO] Moved {cursor.rowcount} rows from weather_data_default into {partition_name(month)}")
+        cursor.execute("DROP TABLE weather_data_moving")
+
+
+def migrate(conn, drop_legacy=False):
+    """
+    Convert an existing unpartitioned weather_data table in one transaction:
+    rename it to weather_data_legacy, create the partitioned table with
+    partitions for its whole date range, and copy every row across (keeping
+    ids). Rows without `recorded_at` cannot be partitioned and stay in the
+    legacy table, which is kept unless `drop_legacy` is set.
+    """
+    cursor = conn.cursor()
+    try:
+        if not table_exists(cursor, "weather_data"):
+            ensure_schema(conn)
+            return 0
+        if is_partitioned(cursor):
+            print("[INFO] weather_data is already partitioned.")
+            return 0
+
+        cursor.execute("LOCK TABLE weather_data IN ACCESS EXCLUSIVE MODE")
+        cursor.execute("ALTER TABLE weather_data RENAME TO weather_data_legacy")
+        for index in ("weather_data_city_recorded_at_idx", "weather_data_recorded_at_idx"):
+            cursor.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_legacy")
+        for statement in POSTGRES_DDL:
+            cursor.execute(statement)
+
+        cursor.execute("SELECT MIN(recorded_at), MAX(recorded_at) FROM weather_data_legacy")
+        first, last = cursor.fetchone()
+        if first is not None:
+            for month in month_starts(first, last):
+                _create_partition(cursor, month)
+
+        cursor.execute(
+            f"INSERT INTO weather_data (id, {DATA_COLUMNS}) "
+            f"SELECT id, {DATA_COLUMNS} FROM weather_data_legacy WHERE recorded_at IS NOT NULL"
+        )
+        copied = cursor.rowcount
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence('weather_data', 'id'), "
+            "(SELECT COALESCE(MAX(id), 0) + 1 FROM weather_data), false)"
+        )
+        if drop_legacy:
+            cursor.execute("DROP TABLE weather_data_legacy")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    _known_partitions.clear()
+    print(f"✅ Migrated {copied} rows into the partitioned weather_data table.")
+    return copied
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "ensure"
+    conn = connect()
+    try:
+        if command == "migrate":
+            migrate(conn, drop_legacy="--drop-legacy" in argv)
+        elif command == "ensure":
+            ensure_schema(conn)
+            print("✅ weather_data schema is in place.")
+        else:
+            print(f"Unknown command {command!r}; use 'ensure' or 'migrate [--drop-legacy]'.")
+            return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
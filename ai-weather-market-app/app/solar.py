@@ -0,0 +1,231 @@
+"""
+Vectorized solar geometry (NOAA General Solar Position equations).
+
+Given latitudes, longitudes and local timestamps, computes solar elevation,
+sunrise/sunset, day length and Haurwitz clear-sky irradiance for whole arrays
+at once. Ingestion uses it to fill sunrise_time, sunset_time and
+solar_radiation_w_m2 locally instead of relying on the API's `astro` block
+(absent in realtime mode). The trainers use it to backfill rows already
+stored without those values.
+
+Daily summary rows (stamped at midnight) get the day's mean clear-sky
+irradiance rather than the value at midnight, which is always zero.
+
+Timestamps are local wall-clock times, as stored in weather_data; Kenya is on
+EAT (UTC+3) all year, the default `utc_offset_hours`. Results match NOAA's
+calculator to about a minute and a few tenths of a degree.
+"""
+from datetime import time
+
+import numpy as np
+
+EAT_UTC_OFFSET_HOURS = 3.0
+# Zenith of sunrise/sunset: refraction plus the solar disc's radius
+SUNRISE_ZENITH_DEG = 90.833
+
+
+def _local_times(timestamps):
+    t = np.asarray(timestamps, dtype="datetime64[s]")
+    day_of_year = (t.astype("datetime64[D]") - t.astype("datetime64[Y]")).astype(np.int64) + 1
+    minutes = (t - t.astype("datetime64[D]")).astype(np.int64) / 60.0
+    days_in_year = np.where(np.isin(t.astype("datetime64[Y]").astype(np.int64) % 4, 2), 366, 365)
+    return day_of_year, minutes, days_in_year
+
+
+def _orbit(day_of_year, minutes, days_in_year):
+    """Equation of time (minutes) and solar declination (radians)."""
+    gamma = 2 * np.pi / days_in_year * (day_of_year - 1 + (minutes / 60 - 12) / 24)
+    eqtime = 229.18 * (0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+                       - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma))
+    decl = (0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma)
+            - 0.006758 * np.cos(2 * gamma) + 0.000907 * np.sin(2 * gamma)
+            - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma))
+    return eqtime, decl
+
+
+def _orbit_at(timestamps):
+    """
+    _orbit for an array of timestamps. Weather rows share few distinct
+    timestamps (hours, dates), so large inputs are evaluated once per
+    distinct value and broadcast back.
+    """
+    t = np.asarray(timestamps, dtype="datetime64[s]")
+    flat = t.ravel()
+    inverse = None
+    if flat.size > 4096:
+        flat, inverse = np.unique(flat, return_inverse=True)
+    eqtime, decl = _orbit(*_local_times(flat))
+    if inverse is not None:
+        eqtime, decl = eqtime[inverse], decl[inverse]
+    return eqtime.reshape(t.shape), decl.reshape(t.shape)
+
+
+def solar_elevation(latitude, longitude, timestamps, utc_offset_hours=EAT_UTC_OFFSET_HOURS):
+    """Solar elevation above the horizon in degrees (negative at night)."""
+    t = np.asarray(timestamps, dtype="datetime64[s]")
+    minutes = (t - t.astype("datetime64[D]")).astype(np.int64) / 60.0
+    eqtime, decl = _orbit_at(t)
+    true_solar_minutes = minutes + eqtime + 4 * np.asarray(longitude, dtype=np.float64) - 60 * utc_offset_hours
+    hour_angle = np.radians(true_solar_minutes / 4 - 180)
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    cos_zenith = np.sin(lat) * np.sin(decl) + np.cos(lat) * np.cos(decl) * np.cos(hour_angle)
+    return 90 - np.degrees(np.arccos(np.clip(cos_zenith, -1, 1)))
+
+
+def sun_times(latitude, longitude, timestamps, utc_offset_hours=EAT_UTC_OFFSET_HOURS):
+    """
+    Local sunrise and sunset in minutes after midnight, and day length in
+    hours, for each timestamp's date. Polar day/night give 24/0 hours.
+    """
+    t = np.asarray(timestamps, dtype="datetime64[s]").astype("datetime64[D]").astype("datetime64[s]")
+    # Evaluate the orbit at local noon, close enough to both events
+    eqtime, decl = _orbit_at(t + np.timedelta64(12 * 3600, "s"))
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    cos_ha = np.cos(np.radians(SUNRISE_ZENITH_DEG)) / (np.cos(lat) * np.cos(decl)) - np.tan(lat) * np.tan(decl)
+    ha = np.degrees(np.arccos(np.clip(cos_ha, -1, 1)))
+    noon = 720 - 4 * np.asarray(longitude, dtype=np.float64) - eqtime + 60 * utc_offset_hours
+    return noon - 4 * ha, noon + 4 * ha, 8 * ha / 60
+
+
+def clear_sky_ghi(elevation_deg):
+    """Haurwitz clear-sky global horizontal irradiance (W/m²); 0 with the sun down."""
+    cos_zenith = np.sin(np.radians(np.asarray(elevation_deg, dtype=np.float64)))
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        ghi = 1098.0 * cos_zenith * np.exp(-0.059 / cos_zenith)
+    return np.where(cos_zenith > 0, ghi, 0.0)
+
+
+def solar_features(latitude, longitude, timestamps, utc_offset_hours=EAT_UTC_OFFSET_HOURS):
+    """All solar features for aligned arrays, as a dict of NumPy arrays."""
+    elevation = solar_elevation(latitude, longitude, timestamps, utc_offset_hours)
+    sunrise, sunset, day_length = sun_times(latitude, longitude, timestamps, utc_offset_hours)
+    return {
+        "solar_elevation_deg": elevation,
+        "clear_sky_ghi_w_m2": clear_sky_ghi(elevation),
+        "sunrise_minutes": sunrise,
+        "sunset_minutes": sunset,
+        "day_length_h": day_length,
+    }
+
+
+def minutes_to_time(minutes):
+    minutes = int(round(float(minutes))) % (24 * 60)
+    return time(minutes // 60, minutes % 60)
+
+
+def daily_mean_clear_sky_ghi(latitude, longitude, timestamps, utc_offset_hours=EAT_UTC_OFFSET_HOURS,
+                             samples=48, chunk_size=50_000):
+    """24-hour mean Haurwitz irradiance (W/m²) of each timestamp's date, sampled at interval midpoints."""
+    lat = np.broadcast_to(np.asarray(latitude, dtype=np.float64), np.shape(timestamps))
+    lon = np.broadcast_to(np.asarray(longitude, dtype=np.float64), np.shape(timestamps))
+    days = np.asarray(timestamps, dtype="datetime64[s]").astype("datetime64[D]").astype("datetime64[s]")
+    step = 86400 // samples
+    offsets = (np.arange(samples) * step + step // 2).astype("timedelta64[s]")
+    out = np.empty(len(days))
+    for start in range(0, len(days), chunk_size):
+        rows = slice(start, start + chunk_size)
+        elevation = solar_elevation(lat[rows, None], lon[rows, None], days[rows, None] + offsets, utc_offset_hours)
+        out[rows] = clear_sky_ghi(elevation).mean(axis=1)
+    return out
+
+
+def looks_daily(latitude, longitude, timestamps):
+    """
+    Rows that look like daily summaries: stamped at midnight and the only row
+    for their location and date (hourly data has 24 rows per day).
+    """
+    t = np.asarray(timestamps, dtype="datetime64[s]")
+    days = t.astype("datetime64[D]")
+    midnight = t == days.astype("datetime64[s]")
+    if not midnight.any():
+        return midnight
+    # One int64 key per (location to 1e-4 degrees, date); a 1-D unique is much faster than rows
+    lat = np.rint(np.nan_to_num(np.asarray(latitude, dtype=np.float64)) * 1e4).astype(np.int64) + 900_000
+    lon = np.rint(np.nan_to_num(np.asarray(longitude, dtype=np.float64)) * 1e4).astype(np.int64) + 1_800_000
+    keys = (lat * 3_600_001 + lon) * 100_000 + days.astype(np.int64) % 100_000
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    return midnight & (counts[inverse] == 1)
+
+
+def _solar_fill(lat, lon, t, need_sunrise, need_sunset, need_radiation, daily, utc_offset_hours):
+    """Computed (sunrise minutes, sunset minutes, radiation) for the rows that need any of them."""
+    sunrise = np.full(len(t), np.nan)
+    sunset = np.full(len(t), np.nan)
+    radiation = np.full(len(t), np.nan)
+    valid = np.isfinite(lat) & np.isfinite(lon) & ~np.isnat(t)
+    times_needed = valid & (need_sunrise | need_sunset)
+    if times_needed.any():
+        sunrise[times_needed], sunset[times_needed], _ = sun_times(
+            lat[times_needed], lon[times_needed], t[times_needed], utc_offset_hours)
+    # A daily row stamped at midnight gets the day's mean, not the (zero) irradiance at midnight
+    instant = valid & need_radiation & ~daily
+    if instant.any():
+        radiation[instant] = clear_sky_ghi(solar_elevation(lat[instant], lon[instant], t[instant], utc_offset_hours))
+    day_mean = valid & need_radiation & daily
+    if day_mean.any():
+        radiation[day_mean] = daily_mean_clear_sky_ghi(lat[day_mean], lon[day_mean], t[day_mean], utc_offset_hours)
+    return sunrise, sunset, np.round(radiation, 1)
+
+
+def fill_solar_columns(columns, utc_offset_hours=EAT_UTC_OFFSET_HOURS, daily=None):
+    """
+    Fill missing sunrise_time, sunset_time and solar_radiation_w_m2 values of
+    weather_data columns (lists) in place from latitude/longitude/recorded_at.
+    Values already present (e.g. the API's astro times) are kept. Radiation
+    is the clear-sky estimate at recorded_at, or the day's mean for daily
+    rows; `daily` is a boolean per row, or None to detect them (looks_daily).
+    """
+    need = {name: np.array([v is None for v in columns[name]], dtype=bool)
+            for name in ("sunrise_time", "sunset_time", "solar_radiation_w_m2")}
+    if not any(mask.any() for mask in need.values()):
+        return columns
+    lat = np.array([np.nan if v is None else v for v in columns["latitude"]], dtype=np.float64)
+    lon = np.array([np.nan if v is None else v for v in columns["longitude"]], dtype=np.float64)
+    t = np.array(columns["recorded_at"], dtype="datetime64[s]")
+    daily = looks_daily(lat, lon, t) if daily is None else np.broadcast_to(np.asarray(daily, dtype=bool), t.shape)
+    sunrise, sunset, radiation = _solar_fill(lat, lon, t, need["sunrise_time"], need["sunset_time"],
+                                             need["solar_radiation_w_m2"], daily, utc_offset_hours)
+    for i in np.flatnonzero(need["sunrise_time"] & np.isfinite(sunrise)):
+        columns["sunrise_time"][i] = minutes_to_time(sunrise[i])
+    for i in np.flatnonzero(need["sunset_time"] & np.isfinite(sunset)):
+        columns["sunset_time"][i] = minutes_to_time(sunset[i])
+    for i in np.flatnonzero(need["solar_radiation_w_m2"] & np.isfinite(radiation)):
+        columns["solar_radiation_w_m2"][i] = float(radiation[i])
+    return columns
+
+
+# Every minute of the day as a datetime.time, so conversion is a single take()
+_TIMES_OF_DAY = np.array([time(m // 60, m % 60) for m in range(24 * 60)] + [None], dtype=object)
+
+
+def _minutes_to_times(minutes):
+    """Vectorized minutes-after-midnight -> datetime.time (None where NaN)."""
+    whole = np.rint(np.nan_to_num(minutes)).astype(np.int64) % (24 * 60)
+    return _TIMES_OF_DAY[np.where(np.isfinite(minutes), whole, 24 * 60)]
+
+
+def fill_solar_frame(df, utc_offset_hours=EAT_UTC_OFFSET_HOURS, daily=None):
+    """
+    DataFrame version of fill_solar_columns for the trainers; needs latitude,
+    longitude and recorded_at. Vectorized over all rows.
+    """
+    import pandas as pd  # type: ignore
+
+    lat = pd.to_numeric(df["latitude"], errors="coerce").to_numpy(dtype=np.float64)
+    lon = pd.to_numeric(df["longitude"], errors="coerce").to_numpy(dtype=np.float64)
+    t = pd.to_datetime(df["recorded_at"]).to_numpy(dtype="datetime64[s]")
+    need_sunrise = df["sunrise_time"].isna().to_numpy()
+    need_sunset = df["sunset_time"].isna().to_numpy()
+    radiation_now = pd.to_numeric(df["solar_radiation_w_m2"], errors="coerce").to_numpy(dtype=np.float64)
+    need_radiation = np.isnan(radiation_now)
+    if not (need_sunrise.any() or need_sunset.any() or need_radiation.any()):
+        return df
+    daily = looks_daily(lat, lon, t) if daily is None else np.broadcast_to(np.asarray(daily, dtype=bool), t.shape)
+    sunrise, sunset, radiation = _solar_fill(lat, lon, t, need_sunrise, need_sunset, need_radiation,
+                                             daily, utc_offset_hours)
+    if need_sunrise.any():
+        df["sunrise_time"] = np.where(need_sunrise, _minutes_to_times(sunrise), df["sunrise_time"].to_numpy(dtype=object))
+    if need_sunset.any():
+        df["sunset_time"] = np.where(need_sunset, _minutes_to_times(sunset), df["sunset_time"].to_numpy(dtype=object))
+    df["solar_radiation_w_m2"] = np.where(need_radiation, radiation, radiation_now)
+    return df
@@ -0,0 +1,134 @@
+"""
+In-memory spatial index over the known station (city) locations.
+
+weather_data stores latitude/longitude with every row; `StationIndex` keeps
+one point per city in a KD-tree so GPS coordinates from the field can be
+resolved to their k nearest stations, and readings interpolated with inverse
+distance weighting, for thousands of coordinates in one vectorized call
+instead of one weatherapi.com request per coordinate.
+
+Points are stored as unit vectors on the sphere, so the tree's Euclidean
+(chord) distance orders neighbours exactly like great-circle distance.
+"""
+import threading
+
+import numpy as np
+from scipy.spatial import cKDTree  # type: ignore
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(latitude, longitude):
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon = np.radians(np.asarray(longitude, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def idw_weights(distances_km, power=2.0):
+    """
+    Row-normalised inverse-distance weights for an (n, k) distance matrix.
+    A query sitting on a station (distance 0) takes that station's value.
+    """
+    distances_km = np.asarray(distances_km, dtype=np.float64)
+    exact = distances_km < 1e-9
+    with np.errstate(divide="ignore"):
+        weights = 1.0 / distances_km ** power
+    weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+    weights[~np.isfinite(weights)] = 0.0
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def station_locations(conn):
+    """Latest known latitude/longitude per city, as (cities, latitudes, longitudes)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            SELECT city, latitude, longitude FROM (
+                SELECT city, latitude, longitude,
+                       ROW_NUMBER() OVER (PARTITION BY city ORDER BY recorded_at DESC) AS rn
+                FROM weather_data
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            ) latest
+            WHERE rn = 1
+            ORDER BY city
+        """)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    cities = [row[0] for row in rows]
+    return cities, [row[1] for row in rows], [row[2] for row in rows]
+
+
+class StationIndex:
+    def __init__(self, cities=(), latitudes=(), longitudes=()):
+        self._lock = threading.Lock()
+        self.locations = {}
+        self.update(cities, latitudes, longitudes)
+
+    def __len__(self):
+        return len(self.cities)
+
+    def update(self, cities, latitudes, longitudes):
+        """
+        Add or move stations; the tree is rebuilt only when a location is new
+        or has changed. Returns True if it was rebuilt.
+        """
+        changed = {
+            city: (float(lat), float(lon))
+            for city, lat, lon in zip(cities, latitudes, longitudes)
+            if self.locations.get(city) != (float(lat), float(lon))
+        }
+        if not changed and hasattr(self, "tree"):
+            return False
+        with self._lock:
+            self.locations.update(changed)
+            self.cities = np.array(list(self.locations), dtype=object)
+            coords = np.array([self.locations[c] for c in self.cities], dtype=np.float64).reshape(-1, 2)
+            self.latitudes, self.longitudes = coords[:, 0], coords[:, 1]
+            self.tree = cKDTree(to_unit_vectors(self.latitudes, self.longitudes)) if len(coords) else None
+        return True
+
+    @classmethod
+    def from_db(cls, conn):
+        return cls(*station_locations(conn))
+
+    def refresh(self, conn):
+        return self.update(*station_locations(conn))
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        The k nearest stations of each query point: (n, k) arrays of station
+        indices (into `cities`) and great-circle distances in km.
+        """
+        tree, n_stations = self.tree, len(self.cities)
+        if tree is None:
+            raise ValueError("Station index is empty")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        # The tree returns an out-of-range index for NaN/inf queries
+        if not (np.isfinite(latitude).all() and np.isfinite(longitude).all()):
+            raise ValueError("Coordinates must be finite")
+        k = min(k, n_stations)
+        chord, idx = tree.query(to_unit_vectors(latitude, longitude).reshape(-1, 3), k=k)
+        return idx.reshape(-1, k), chord_to_km(chord).reshape(-1, k)
+
+    def interpolate(self, latitude, longitude, values, k=4, power=2.0, neighbours=None):
+        """
+        Inverse-distance-weighted estimate at each query point from the k
+        nearest stations. `values` is (stations, variables) aligned with
+        `cities`; stations with NaN for a variable are skipped for it.
+        Pass `neighbours`, the (idx, distances) of an earlier `nearest`
+        call, to skip the tree query. Returns (points, variables).
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(len(self.cities), -1)
+        idx, distances = neighbours or self.nearest(latitude, longitude, k)
+        neighbour_values = values[idx]                              # (points, k, variables)
+        weights = idw_weights(distances, power)[:, :, None] * ~np.isnan(neighbour_values)
+        total = weights.sum(axis=1)
+        with np.errstate(invalid="ignore"):
+            return np.nansum(neighbour_values * weights, axis=1) / np.where(total > 0, total, np.nan)
@@ -0,0 +1,212 @@
+"""
+Parallel training of global, per-region and per-city Random Forest models.
+
+Every model is a job on a process pool. CPU use is bounded: each job fits
+with `threads_per_job` threads (RandomForest `n_jobs` plus BLAS/OpenMP pools
+via threadpoolctl) and the pool runs `max_cpus // threads_per_job` jobs at a
+time, so the forest's own parallelism never oversubscribes the machine. The
+largest jobs start first, so retraining many regional models takes about as
+long as the slowest one. Failed jobs are retried, and a JSON summary with
+rows, time and test MSE per job is written next to the models.
+
+    python -m app.train_orchestrator --scopes global,region,city --max-cpus 8 --threads-per-job 2
+"""
+import argparse
+import json
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+from app.db import connect
+
+FEATURES = ["humidity_percent", "wind_speed_kmh", "pressure_hpa", "precipitation_mm"]
+TARGET = "temperature_c"
+
+# Default city -> region grouping for regional models
+REGIONS = {
+    "Nairobi": "Nairobi",
+    "Nakuru": "Rift Valley",
+    "Eldoret": "Rift Valley",
+    "Naivasha": "Rift Valley",
+    "Nanyuki": "Laikipia",
+    "Nyahururu": "Laikipia",
+    "Nyeri": "Central",
+    "Ol Kalou": "Central",
+    "Kisumu": "Nyanza",
+    "Kakamega": "Western",
+    "Mombasa": "Coast",
+    "Garissa": "North Eastern",
+}
+
+DEFAULT_PARAMS = {"n_estimators": 100, "max_depth": 20, "min_samples_split": 5}
+
+
+@dataclass
+class Job:
+    name: str
+    scope: str
+    X: np.ndarray
+    y: np.ndarray
+    params: dict = field(default_factory=lambda: dict(DEFAULT_PARAMS))
+
+
+def load_training_frame(conn=None):
+    """Read the training columns (plus city) from weather_data, dropping incomplete rows."""
+    query = f"""
+    SELECT city, {', '.join(FEATURES)}, {TARGET}
+    FROM weather_data
+    WHERE {TARGET} IS NOT NULL
+    ORDER BY recorded_at;
+    """
+    owns_conn = conn is None
+    conn = conn or connect()
+    try:
+        df = pd.read_sql(query, conn)
+    finally:
+        if owns_conn:
+            conn.close()
+    return df.dropna()
+
+
+def build_jobs(df, scopes=("global",), regions=None, min_rows=50, params=None):
+    """One job per requested scope: the global model, each region, each city."""
+    regions = REGIONS if regions is None else regions
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    groups = []
+    if "global" in scopes:
+        groups.append(("global", "global", df))
+    if "region" in scopes:
+        region = df["city"].map(regions)
+        groups += [("region", f"region_{name}", part) for name, part in df[region.notna()].groupby(region)]
+    if "city" in scopes:
+        groups += [("city", f"city_{name}", part) for name, part in df.groupby("city")]
+
+    jobs = []
+    for scope, name, part in groups:
+        if len(part) < min_rows:
+            print(f"[WARN] Skipping {name}: {len(part)} rows < {min_rows}")
+            continue
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_").lower()
+        jobs.append(Job(slug, scope, part[FEATURES].to_numpy(np.float32), part[TARGET].to_numpy(np.float64),
+                        dict(params)))
+    return jobs
+
+
+def train_job(job, out_dir, threads_per_job):
+    """
+    Fit, evaluate and save one model. Runs in a worker process and times
+    itself there, so `seconds` excludes time spent queued for a worker.
+    """
+    import joblib  # type: ignore
+    from sklearn.ensemble import RandomForestRegressor  # type: ignore
+    from sklearn.metrics import mean_squared_error  # type: ignore
+    from sklearn.model_selection import train_test_split  # type: ignore
+    from threadpoolctl import threadpool_limits  # type: ignore
+
+    from app.model_compaction import compact_forest, save_compact
+
+    start = time.perf_counter()
+    X_train, X_test, y_train, y_test = train_test_split(job.X, job.y, test_size=0.2, random_state=42)
+    with threadpool_limits(limits=threads_per_job):
+        model = RandomForestRegressor(random_state=42, n_jobs=threads_per_job, **job.params)
+        model.fit(X_train, y_train)
+        mse = mean_squared_error(y_test, model.predict(X_test))
+
+    model_path = os.path.join(out_dir, f"rf_{job.name}.joblib")
+    joblib.dump(model, model_path)
+    save_compact(compact_forest(model), os.path.join(out_dir, f"rf_{job.name}.compact"))
+    return {"rows": int(len(job.y)), "test_mse": float(mse), "model_path": model_path,
+            "seconds": time.perf_counter() - start}
+
+
+def run_jobs(jobs, out_dir, max_cpus=None, threads_per_job=1, retries=1):
+    """
+    Train `jobs` on a process pool and write `training_summary.json` to
+    `out_dir`. Returns the summary: one entry per job with its status,
+    attempts, training time and test MSE. If a worker dies, the pool is
+    broken: the jobs it takes down and any retries are recorded as failed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    max_cpus = max_cpus or os.cpu_count() or 1
+    threads_per_job = max(1, min(threads_per_job, max_cpus))
+    workers = max(1, max_cpus // threads_per_job)
+
+    # Longest jobs first keeps the total close to the slowest single job
+    jobs = sorted(jobs, key=lambda job: len(job.y), reverse=True)
+    results = {job.name: {"name": job.name, "scope": job.scope, "attempts": 0} for job in jobs}
+    start = time.perf_counter()
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(job):
+            entry = results[job.name]
+            entry["attempts"] += 1
+            try:
+                pending[pool.submit(train_job, job, out_dir, threads_per_job)] = job
+            except BrokenProcessPool as e:
+                entry.update(status="failed", error=f"BrokenProcessPool: {e}")
+                print(f"❌ {job.name} not run: the process pool is broken")
+
+        for job in jobs:
+            submit(job)
+        while pending:
+            future = next(as_completed(pending))
+            job = pending.pop(future)
+            entry = results[job.name]
+            try:
+                entry.update(future.result(), status="ok")
+                entry.pop("error", None)
+                print(f"✅ {job.name}: {entry['rows']} rows, test MSE {entry['test_mse']:.4f}, "
+                      f"{entry['seconds']:.1f}s")
+            except Exception as e:
+                entry.update(status="failed", error="".join(traceback.format_exception_only(type(e), e)).strip())
+                if entry["attempts"] <= retries:
+                    print(f"❌ {job.name} failed ({e}); retrying")
+                    submit(job)
+                else:
+                    print(f"❌ {job.name} failed after {entry['attempts']} attempts: {e}")
+
+    summary = {
+        "wall_seconds": time.perf_counter() - start,
+        "max_cpus": max_cpus,
+        "threads_per_job": threads_per_job,
+        "jobs": sorted(results.values(), key=lambda entry: entry["name"]),
+    }
+    with open(os.path.join(out_dir, "training_summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train global, regional and per-city weather models in parallel")
+    parser.add_argument("--scopes", default="global,region,city", help="comma-separated: global, region, city")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "trained"))
+    parser.add_argument("--max-cpus", type=int, default=None, help="CPU slots to use (default: all)")
+    parser.add_argument("--threads-per-job", type=int, default=1, help="RandomForest n_jobs per model")
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--min-rows", type=int, default=50)
+    parser.add_argument("--regions", default=None, help="JSON file mapping city -> region")
+    args = parser.parse_args(argv)
+
+    regions = None
+    if args.regions:
+        with open(args.regions) as f:
+            regions = json.load(f)
+    df = load_training_frame()
+    print(f"[INFO] Retrieved {len(df)} complete records from database")
+    jobs = build_jobs(df, scopes=args.scopes.split(","), regions=regions, min_rows=args.min_rows)
+    summary = run_jobs(jobs, args.out, max_cpus=args.max_cpus, threads_per_job=args.threads_per_job,
+                       retries=args.retries)
+    failed = [entry["name"] for entry in summary["jobs"] if entry["status"] != "ok"]
+    print(f"[RESULT] {len(jobs) - len(failed)}/{len(jobs)} models trained in {summary['wall_seconds']:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,167 @@
+"""
+Data-access layer for the latest weather readings of many locations.
+
+Readings come from the newest weather_data row per city; only cities whose
+newest row is missing or older than `max_age` are fetched from
+weatherapi.com (through the response cache), concurrently. Results are
+returned as a columnar batch of NumPy arrays so the impact pipeline can run
+over every tracked location at once.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.db import connect, dialect
+from app.response_cache import ResponseCache
+
+DEFAULT_CITIES = ("Nairobi",)
+
+READING_COLUMNS = (
+    "temperature_c",
+    "humidity_percent",
+    "wind_speed_kmh",
+    "pressure_hpa",
+    "precipitation_mm",
+    "uv_index",
+    "cloud_cover_percent",
+)
+
+MAX_CONCURRENT_FETCHES = 8
+
+
+def tracked_cities():
+    """Cities listed in TRACKED_CITIES (comma-separated), or DEFAULT_CITIES."""
+    cities = [c.strip() for c in os.getenv("TRACKED_CITIES", "").split(",") if c.strip()]
+    return cities or list(DEFAULT_CITIES)
+
+
+def parse_current_weather(data):
+    """Parse a current.json response into a weather_data record."""
+    return {
+        "city": data["location"]["name"],
+        "country": data["location"]["country"][:2],
+        "latitude": data["location"]["lat"],
+        "longitude": data["location"]["lon"],
+        "recorded_at": datetime.strptime(data["location"]["localtime"], "%Y-%m-%d %H:%M"),
+        "temperature_c": data["current"]["temp_c"],
+        "humidity_percent": data["current"]["humidity"],
+        "wind_speed_kmh": data["current"]["wind_kph"],
+        "pressure_hpa": data["current"]["pressure_mb"],
+        "precipitation_mm": data["current"]["precip_mm"],
+        "wind_direction_deg": data["current"]["wind_degree"],
+        "uv_index": data["current"].get("uv", None),
+        "air_quality_index": None,
+        "weather_condition": data["current"]["condition"]["text"],
+        "cloud_cover_percent": data["current"].get("cloud", None),
+        "visibility_km": data["current"].get("vis_km", None),
+        "dew_point_c": None,
+        "solar_radiation_w_m2": None,
+        "sunrise_time": None,
+        "sunset_time": None
+    }
+
+
+def latest_readings(conn, cities):
+    """Newest weather_data row per city, as {city: record}."""
+    columns = ("city", "recorded_at") + READING_COLUMNS
+    select = ", ".join(columns)
+    placeholders = ", ".join(["%s"] * len(cities))
+    if dialect(conn) == "sqlite":
+        query = f"""
+            SELECT {select} FROM weather_data w
+            WHERE city IN ({placeholders})
+              AND recorded_at = (SELECT MAX(recorded_at) FROM weather_data WHERE city = w.city)
+        """
+    else:
+        # Served by the (city, recorded_at) index: one backward index probe per city
+        query = f"""
+            SELECT DISTINCT ON (city) {select} FROM weather_data
+            WHERE city IN ({placeholders})
+            ORDER BY city, recorded_at DESC
+        """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, list(cities))
+        readings = {}
+        for row in cursor.fetchall():
+            record = dict(zip(columns, row))
+            if isinstance(record["recorded_at"], str):
+                record["recorded_at"] = datetime.fromisoformat(record["recorded_at"])
+            readings[record["city"]] = record
+        return readings
+    finally:
+        cursor.close()
+
+
+async def _fetch_current_many(cities, cache):
+    base_url = os.getenv("WEATHERAPI_BASE_URL", "http://api.weatherapi.com/v1")
+    key = os.getenv("WEATHERAPI_KEY")
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+    async def fetch(city):
+        async with semaphore:
+            data = await asyncio.to_thread(cache.fetch_json, base_url, "current.json", {"key": key, "q": city})
+        return parse_current_weather(data)
+
+    results = await asyncio.gather(*(fetch(city) for city in cities), return_exceptions=True)
+    return dict(zip(cities, results))
+
+
+def fetch_weather_batch(cities=None, max_age=timedelta(minutes=30), conn=None, cache=None, now=None):
+    """
+    Latest reading for each city as a columnar batch: `city`, `recorded_at`
+    (datetime64), one float array per READING_COLUMNS entry (NaN when
+    missing) and `source` ("db" or "api"). Cities with no reading from either
+    source are left out. `recorded_at` is the station's local time, as stored
+    by ingestion, and is compared against `now` (default: local time now).
+    """
+    cities = list(cities or tracked_cities())
+    now = now or datetime.now()
+    cache = cache or ResponseCache.from_env()
+
+    readings = {}
+    owns_conn = conn is None
+    try:
+        if owns_conn:
+            conn = connect()
+        readings = latest_readings(conn, cities)
+    except Exception as e:
+        print(f"❌ Error reading latest weather from the database: {e}")
+    finally:
+        if owns_conn and conn is not None:
+            conn.close()
+    sources = {city: "db" for city in readings}
+
+    stale = [c for c in cities if c not in readings or now - readings[c]["recorded_at"] > max_age]
+    if stale:
+        for city, result in asyncio.run(_fetch_current_many(stale, cache)).items():
+            if isinstance(result, Exception):
+                print(f"❌ Error fetching current weather for {city}: {result}")
+                continue
+            readings[city] = result
+            sources[city] = "api"
+
+    found = [c for c in cities if c in readings]
+    batch = {
+        "city": np.array(found, dtype=object),
+        "recorded_at": np.array([readings[c]["recorded_at"] for c in found], dtype="datetime64[s]"),
+        "source": np.array([sources[c] for c in found], dtype=object),
+    }
+    for column in READING_COLUMNS:
+        batch[column] = np.array([readings[c][column] for c in found], dtype=float)
+    return batch
+
+
 def fetch_weather_data():
-    # Placeholder for weather data fetching
-    return {"temp": 28, "humidity": 60, "wind": 12}
+    # Single-reading view of the first tracked city, kept for older callers.
+    # Always a dict as before; NaN readings when no source had the city.
+    batch = fetch_weather_batch()
+    if not len(batch["city"]):
+        return {"temp": np.nan, "humidity": np.nan, "wind": np.nan}
+    return {
+        "temp": batch["temperature_c"][0],
+        "humidity": batch["humidity_percent"][0],
+        "wind": batch["wind_speed_kmh"][0],
+    }
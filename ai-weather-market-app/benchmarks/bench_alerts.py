@@ -0,0 +1,78 @@
+"""
+Alert engine latency benchmark.
+
+Simulates ingestion ticks: every tick appends one observed hour for each city
+and re-evaluates the full forecast horizon, then reports per-tick latency.
+
+    python benchmarks/bench_alerts.py --cities 500 --horizon 72 --ticks 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.alerts import AlertEngine  # noqa: E402
+
+VARIABLES = {
+    # variable: (mean, daily amplitude, noise)
+    "temperature_c": (24.0, 7.0, 2.5),
+    "precipitation_mm": (1.0, 0.0, 6.0),
+    "wind_speed_kmh": (15.0, 5.0, 10.0),
+    "pressure_hpa": (1012.0, 1.5, 1.5),
+}
+
+
+def synthetic(rng, n_cities, start_hour, n_hours):
+    hours = start_hour + np.arange(n_hours)
+    daily = np.sin(2 * np.pi * (hours - 9) / 24)
+    values = {}
+    for var, (mean, amplitude, noise) in VARIABLES.items():
+        data = mean + amplitude * daily + rng.normal(0, noise, (n_cities, n_hours))
+        values[var] = np.clip(data, 0, None) if var == "precipitation_mm" else data
+    times = np.datetime64("2024-01-01T00:00") + hours * np.timedelta64(1, "h")
+    return times, values
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    cities = [f"city_{i:04d}" for i in range(args.cities)]
+    regions = {city: f"region_{i % args.regions:02d}" for i, city in enumerate(cities)}
+    engine = AlertEngine(regions=regions)
+
+    tick_ms, alerts = [], 0
+    for tick in range(args.ticks):
+        obs_times, observed = synthetic(rng, args.cities, tick, 1)
+        fc_times, forecast = synthetic(rng, args.cities, tick + 1, args.horizon)
+        start = time.perf_counter()
+        alerts += len(engine.observe(cities, obs_times, observed))
+        alerts += len(engine.forecast(cities, fc_times, forecast))
+        tick_ms.append((time.perf_counter() - start) * 1000)
+
+    tick_ms.sort()
+    print(f"[RESULT] {args.cities} cities x {args.horizon} h horizon, {args.ticks} ticks")
+    print(f"[RESULT] tick latency: median {statistics.median(tick_ms):.2f} ms, "
+          f"p95 {tick_ms[int(0.95 * (len(tick_ms) - 1))]:.2f} ms, max {tick_ms[-1]:.2f} ms")
+    print(f"[RESULT] alerts raised after dedup: {alerts}")
+    return tick_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=500)
+    parser.add_argument("--regions", type=int, default=47)
+    parser.add_argument("--horizon", type=int, default=72)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args(argv))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
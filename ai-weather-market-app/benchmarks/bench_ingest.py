@@ -0,0 +1,224 @@
+"""
+Ingestion throughput benchmark.
+
+Runs the backfill and realtime paths of `ins-weather-data.py` against a local
+fake weatherapi.com server and a local database (SQLite by default, or the
+PostgreSQL configured in `.env` with `--db postgres`) and reports records/sec,
+API calls/sec, the latency of whole insert calls (fill, checks, insert,
+rollups, commit) and of the DB commit alone.
+
+    python benchmarks/bench_ingest.py --mode backfill --days 365 --latency-ms 20
+    python benchmarks/bench_ingest.py --mode backfill --days 365 --hourly
+    python benchmarks/bench_ingest.py --mode realtime --ticks 200 --error-rate 0.05
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_weatherapi import FakeWeatherAPI  # noqa: E402
+from benchmarks.sqlite_standin import SQLiteStandIn  # noqa: E402
+
+
+def load_ingest_module(base_url, cache_dir=None):
+    """
+    Import `ins-weather-data.py` pointed at `base_url`. The response cache is
+    disabled unless `cache_dir` is given. The script reads its settings at
+    import time, so the environment (including anything load_dotenv adds) is
+    restored afterwards and nothing leaks into later callers.
+    """
+    saved = dict(os.environ)
+    try:
+        os.environ["WEATHERAPI_BASE_URL"] = base_url
+        os.environ["WEATHER_CACHE"] = "1" if cache_dir else "0"
+        if cache_dir:
+            os.environ["WEATHER_CACHE_DIR"] = cache_dir
+        os.environ.setdefault("WEATHERAPI_KEY", "bench")
+        path = os.path.join(ROOT, "ins-weather-data.py")
+        spec = importlib.util.spec_from_file_location("ins_weather_data", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    return module
+
+
+class Timings:
+    def __init__(self):
+        self.api = []
+        self.inserts = []
+        self.commits = []
+        self.records = 0
+        self.api_errors = 0
+
+
+class TimedConnection:
+    """Delegates to a DB connection, timing each commit()."""
+
+    def __init__(self, conn, timings):
+        self._conn = conn
+        self._timings = timings
+
+    def commit(self):
+        start = time.perf_counter()
+        self._conn.commit()
+        self._timings.commits.append(time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrument(module, timings):
+    """Wrap the module's fetch and insert functions with timers."""
+    fetch_historical = module.fetch_historical_weather
+    fetch_current = module.fetch_current_weather
+    insert = module.insert_weather_columns
+
+    def timed_fetch_historical(*args, **kwargs):
+        start = time.perf_counter()
+        data = fetch_historical(*args, **kwargs)
+        timings.api.append(time.perf_counter() - start)
+        if data is None:
+            timings.api_errors += 1
+        return data
+
+    def timed_fetch_current(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fetch_current(*args, **kwargs)
+        except Exception:
+            timings.api_errors += 1
+            raise
+        finally:
+            timings.api.append(time.perf_counter() - start)
+
+    def timed_insert(columns, *args, **kwargs):
+        start = time.perf_counter()
+        insert(columns, *args, **kwargs)
+        timings.inserts.append(time.perf_counter() - start)
+        timings.records += len(columns["city"])
+
+    module.fetch_historical_weather = timed_fetch_historical
+    module.fetch_current_weather = timed_fetch_current
+    module.insert_weather_columns = timed_insert
+
+
+def open_db(kind, module):
+    if kind == "postgres":
+        return module.psycopg2.connect(
+            dbname=module.DB_NAME,
+            user=module.DB_USER,
+            password=module.DB_PASSWORD,
+            host=module.DB_HOST,
+            port=module.DB_PORT,
+        )
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_ingest_"), "weather.db")
+    return SQLiteStandIn(path)
+
+
+def run_backfill(module, conn, cities, days, batch_size, hourly):
+    end_date = datetime(2024, 1, 1)
+    start_date = end_date - timedelta(days=days - 1)
+    for city in cities:
+        module.backfill(city, start_date, end_date, batch_size=batch_size, delay=0, conn=conn,
+                        hourly=hourly)
+
+
+def run_realtime(module, conn, cities, ticks):
+    for _ in range(ticks):
+        for city in cities:
+            try:
+                record = module.fetch_current_weather(city)
+            except Exception:
+                continue
+            module.insert_weather_data([record], conn=conn)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(args):
+    with FakeWeatherAPI(latency=args.latency_ms / 1000, error_rate=args.error_rate,
+                        rate_limit=args.rate_limit, seed=args.seed) as api:
+        module = load_ingest_module(api.base_url, cache_dir=args.cache_dir)
+        timings = Timings()
+        instrument(module, timings)
+        conn = TimedConnection(open_db(args.db, module), timings)
+        cities = args.cities.split(",")
+
+        start = time.perf_counter()
+        # The ingestion code prints one line per batch; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            if args.mode == "backfill":
+                run_backfill(module, conn, cities, args.days, args.batch_size, args.hourly)
+            else:
+                run_realtime(module, conn, cities, args.ticks)
+        elapsed = time.perf_counter() - start
+        conn.close()
+
+        return {
+            "mode": args.mode + (" (hourly)" if args.hourly and args.mode == "backfill" else ""),
+            "db": args.db,
+            "elapsed_s": elapsed,
+            "records": timings.records,
+            "records_per_s": timings.records / elapsed if elapsed else 0.0,
+            "api_calls": len(timings.api),
+            "api_calls_per_s": len(timings.api) / elapsed if elapsed else 0.0,
+            "api_errors": timings.api_errors,
+            "cache_hits": module.response_cache.hits,
+            "api_status_counts": dict(api.status_counts),
+            "api_latency_p50_ms": percentile(timings.api, 50) * 1000,
+            "api_latency_p95_ms": percentile(timings.api, 95) * 1000,
+            "inserts": len(timings.inserts),
+            "insert_latency_mean_ms": statistics.fmean(timings.inserts) * 1000 if timings.inserts else 0.0,
+            "insert_latency_p95_ms": percentile(timings.inserts, 95) * 1000,
+            "commits": len(timings.commits),
+            "commit_latency_mean_ms": statistics.fmean(timings.commits) * 1000 if timings.commits else 0.0,
+            "commit_latency_p95_ms": percentile(timings.commits, 95) * 1000,
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["backfill", "realtime"], default="backfill")
+    parser.add_argument("--db", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--cities", default="Nairobi", help="comma-separated city names")
+    parser.add_argument("--days", type=int, default=90, help="days per city in backfill mode")
+    parser.add_argument("--ticks", type=int, default=100, help="polls per city in realtime mode")
+    parser.add_argument("--batch-size", type=int, default=10, help="days per DB commit in backfill mode")
+    parser.add_argument("--hourly", action="store_true", help="keep all 24 hourly records per day in backfill mode")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency added to each API response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of API calls answered with 500")
+    parser.add_argument("--rate-limit", type=int, default=None, help="API calls/sec before 429 responses")
+    parser.add_argument("--cache-dir", default=None,
+                        help="enable the response cache in this directory (run twice to measure replay)")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+def main(argv=None):
+    result = run(build_parser().parse_args(argv))
+    for key, value in result.items():
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        print(f"{key:>24}: {value}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Known station locations served by the fake API; unknown cities get a
+# location near Nairobi.
+LOCATIONS = {
+    "Nairobi": (-1.28, 36.82),
+    "Nakuru": (-0.28, 36.07),
+    "Nyeri": (-0.42, 36.95),
+    "Nanyuki": (0.02, 37.07),
+    "Eldoret": (0.52, 35.27),
+    "Kisumu": (-0.1, 34.75),
+    "Mombasa": (-4.05, 39.67),
+    "Garissa": (-0.45, 39.65),
+}
+
+CONDITIONS = ["Sunny", "Partly cloudy", "Cloudy", "Patchy rain possible", "Moderate rain", "Clear"]
+
+
+def _location(city, localtime):
+    lat, lon = LOCATIONS.get(city, (-1.28, 36.82))
+    return {
+        "name": city,
+        "region": "",
+        "country": "Kenya",
+        "lat": lat,
+        "lon": lon,
+        "tz_id": "Africa/Nairobi",
+        "localtime": localtime.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def _hour(rng, moment):
+    temp = round(rng.uniform(12, 30), 1)
+    return {
+        "time_epoch": int(moment.timestamp()),
+        "time": moment.strftime("%Y-%m-%d %H:%M"),
+        "temp_c": temp,
+        "condition": {"text": rng.choice(CONDITIONS)},
+        "wind_kph": round(rng.uniform(0, 30), 1),
+        "wind_degree": rng.randint(0, 359),
+        "pressure_mb": float(rng.randint(1005, 1025)),
+        "precip_mm": round(max(0.0, rng.gauss(0.2, 1.0)), 2),
+        "humidity": rng.randint(30, 95),
+        "cloud": rng.randint(0, 100),
+        "dewpoint_c": round(temp - rng.uniform(2, 12), 1),
+        "vis_km": 10.0,
+        "uv": float(rng.randint(1, 11)),
+    }
+
+
+def history_payload(city, date):
+    """Build a deterministic history.json response for one city and day."""
+    rng = random.Random(f"{city}:{date:%Y-%m-%d}")
+    midnight = datetime(date.year, date.month, date.day)
+    hours = [_hour(rng, midnight + timedelta(hours=h)) for h in range(24)]
+    temps = [h["temp_c"] for h in hours]
+    return {
+        "location": _location(city, midnight),
+        "forecast": {
+            "forecastday": [{
+                "date": midnight.strftime("%Y-%m-%d"),
+                "date_epoch": int(midnight.timestamp()),
+                "day": {
+                    "maxtemp_c": max(temps),
+                    "mintemp_c": min(temps),
+                    "avgtemp_c": round(sum(temps) / 24, 1),
+                    "maxwind_kph": max(h["wind_kph"] for h in hours),
+                    "totalprecip_mm": round(sum(h["precip_mm"] for h in hours), 2),
+                    "avghumidity": round(sum(h["humidity"] for h in hours) / 24),
+                    "condition": {"text": rng.choice(CONDITIONS)},
+                    "uv": max(h["uv"] for h in hours),
+                },
+                "astro": {"sunrise": "06:32 AM", "sunset": "06:41 PM"},
+                "hour": hours,
+            }]
+        },
+    }
+
+
+def current_payload(city, now=None):
+    """Build a current.json response for one city."""
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    rng = random.Random(f"{city}:{now:%Y-%m-%d %H:%M}")
+    current = _hour(rng, now)
+    current["last_updated"] = current.pop("time")
+    return {"location": _location(city, now), "current": current}
+
+
+class FakeWeatherAPI:
+    """
+    Local stand-in for api.weatherapi.com serving `history.json` and
+    `current.json` from a background thread.
+
+    `latency` (seconds) is added to every response, `error_rate` is the
+    fraction of requests answered with a 500, and `rate_limit` caps accepted
+    calls per second; calls over the limit get a 429 like the real API.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit=None, seed=42, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.calls = 0
+        self.status_counts = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _admit(self):
+        # Decide the status code for one request under the configured faults
+        with self._lock:
+            self.calls += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_calls = 0
+                self._window_calls += 1
+                if self._window_calls > self.rate_limit:
+                    return 429
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return 500
+            return 200
+
+    def _record(self, status):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if api.latency:
+                    time.sleep(api.latency)
+
+                status = api._admit()
+                city = params.get("q", "Nairobi")
+                if status == 429:
+                    body = {"error": {"code": 2007, "message": "API key has exceeded calls per month quota."}}
+                elif status == 500:
+                    body = {"error": {"code": 9999, "message": "Internal application error."}}
+                elif url.path.endswith("/history.json") and "dt" in params:
+                    body = history_payload(city, datetime.strptime(params["dt"], "%Y-%m-%d"))
+                elif url.path.endswith("/current.json"):
+                    body = current_payload(city)
+                else:
+                    status = 400
+                    body = {"error": {"code": 1005, "message": "API request url is invalid."}}
+
+                payload = json.dumps(body).encode("utf-8")
+                api._record(status)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
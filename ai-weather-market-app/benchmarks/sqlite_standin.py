@@ -0,0 +1,47 @@
+import sqlite3
+from datetime import date, datetime, time
+
+# sqlite3 has no adapter for datetime.time and deprecates the datetime ones,
+# so store all of them as ISO strings like PostgreSQL renders them.
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" "))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(time, lambda v: v.isoformat())
+
+
+class _Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        return self._cursor.execute(query.replace("%s", "?"), params)
+
+    def executemany(self, query, seq_of_params):
+        return self._cursor.executemany(query.replace("%s", "?"), seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLiteStandIn:
+    """
+    Minimal DB-API wrapper that lets the psycopg2-style queries in the
+    ingestion code (`%s` placeholders) run against a local SQLite file.
+    """
+
+    dialect = "sqlite"
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self):
+        return _Cursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
@@ -1,5 +1,7 @@
 #!/Users/melchizedekvii/Documents/GitHub/ai-weather-market-app/ai-weather-market-app/aiwma_env/bin/python3
+import argparse
 import psycopg2  # type: ignore
+from psycopg2.extras import execute_values  # type: ignore
 from datetime import datetime, timedelta
 import pytz  # type: ignore
 from dotenv import load_dotenv # type: ignore
@@ -9,6 +11,16 @@ import numpy as np  # type: ignore
 import requests
 import time
 
+from app.change_feed import publish_changes
+from app.response_cache import CacheMiss, ResponseCache
+from app.db import dialect
+from app.drift_monitor import DriftMonitor
+from app import profiling
+from app.rollups import update_rollups
+from app.schema import ensure_partitions, ensure_schema
+from app.solar import daily_mean_clear_sky_ghi, fill_solar_columns
+from app.weather_data import parse_current_weather
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -19,21 +31,35 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 WEATHERAPI_KEY = os.getenv("WEATHERAPI_KEY")
+WEATHERAPI_BASE_URL = os.getenv("WEATHERAPI_BASE_URL", "http://api.weatherapi.com/v1")
+
+# Raw API responses are cached on disk (see app/response_cache.py)
+response_cache = ResponseCache.from_env()
+
+# Drift and null-rate monitoring of everything ingested (see app/drift_monitor.py);
+# metrics go to DRIFT_METRICS_FILE when set
+drift_monitor = DriftMonitor.from_env()
+DRIFT_METRICS_FILE = os.getenv("DRIFT_METRICS_FILE")
+
+# weather_data columns in insert order
+WEATHER_COLUMNS = (
+    "city", "country", "latitude", "longitude", "recorded_at",
+    "temperature_c", "humidity_percent", "pressure_hpa", "wind_speed_kmh",
+    "wind_direction_deg", "precipitation_mm", "uv_index", "air_quality_index",
+    "weather_condition", "cloud_cover_percent", "visibility_km", "dew_point_c",
+    "solar_radiation_w_m2", "sunrise_time", "sunset_time"
+)
 
 # Function to fetch historical weather data from weatherapi.com
 def fetch_historical_weather(date, city="Nairobi"):
-    url = f"http://api.weatherapi.com/v1/history.json"
     params = {
         "key": WEATHERAPI_KEY,
         "q": city,
         "dt": date.strftime("%Y-%m-%d")
     }
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return data
-    except requests.RequestException as e:
+        return response_cache.fetch_json(WEATHERAPI_BASE_URL, "history.json", params)
+    except (requests.RequestException, CacheMiss) as e:
         print(f"Error fetching data for {date}: {e}")
         return None
 
@@ -64,168 +90,206 @@ def parse_weather_data(api_data):
         "cloud_cover_percent": hour.get("cloud", None),
         "visibility_km": hour.get("vis_km", None),
         "dew_point_c": None,  # Not provided
-        "solar_radiation_w_m2": None,  # Not provided
+        # Not provided: the day's mean clear-sky irradiance, computed locally
+        "solar_radiation_w_m2": round(float(daily_mean_clear_sky_ghi(
+            [api_data["location"]["lat"]], [api_data["location"]["lon"]],
+            np.array([forecast_day["date"]], dtype="datetime64[s]"))[0]), 1),
         "sunrise_time": datetime.strptime(astro["sunrise"], "%I:%M %p").time(),
         "sunset_time": datetime.strptime(astro["sunset"], "%I:%M %p").time()
     }
     return record
 
+# Parse every hourly record of a history response into columns (one list per
+# weather_data column) ready for insert_weather_columns
+def parse_hourly_weather_data(api_data):
+    if not api_data or "forecast" not in api_data:
+        return None
+    location = api_data["location"]
+    columns = {col: [] for col in WEATHER_COLUMNS}
+
+    for forecast_day in api_data["forecast"]["forecastday"]:
+        hours = forecast_day["hour"]
+        astro = forecast_day["astro"]
+        n = len(hours)
+        sunrise = datetime.strptime(astro["sunrise"], "%I:%M %p").time()
+        sunset = datetime.strptime(astro["sunset"], "%I:%M %p").time()
+
+        columns["city"] += [location["name"]] * n
+        columns["country"] += [location["country"][:2]] * n
+        columns["latitude"] += [location["lat"]] * n
+        columns["longitude"] += [location["lon"]] * n
+        columns["recorded_at"] += [datetime.strptime(h["time"], "%Y-%m-%d %H:%M") for h in hours]
+        columns["temperature_c"] += [h["temp_c"] for h in hours]
+        columns["humidity_percent"] += [h["humidity"] for h in hours]
+        columns["pressure_hpa"] += [h.get("pressure_mb", None) for h in hours]
+        columns["wind_speed_kmh"] += [h["wind_kph"] for h in hours]
+        columns["wind_direction_deg"] += [h.get("wind_degree", None) for h in hours]
+        columns["precipitation_mm"] += [h["precip_mm"] for h in hours]
+        columns["uv_index"] += [h.get("uv", None) for h in hours]
+        columns["air_quality_index"] += [None] * n  # Not provided by weatherapi.com free tier
+        columns["weather_condition"] += [h["condition"]["text"] for h in hours]
+        columns["cloud_cover_percent"] += [h.get("cloud", None) for h in hours]
+        columns["visibility_km"] += [h.get("vis_km", None) for h in hours]
+        columns["dew_point_c"] += [h.get("dewpoint_c", None) for h in hours]
+        columns["solar_radiation_w_m2"] += [None] * n  # Not provided; filled from app.solar on insert
+        columns["sunrise_time"] += [sunrise] * n
+        columns["sunset_time"] += [sunset] * n
+
+    return columns
+
+# Turn a list of record dicts into weather_data columns
+def records_to_columns(records):
+    return {col: [record[col] for record in records] for col in WEATHER_COLUMNS}
+
+# Update the drift monitor with a batch and report newly raised flags
+def check_data_quality(columns):
+    for city, feature, kind, value in drift_monitor.observe(columns):
+        print(f"⚠️ Data drift for {city} {feature}: {kind} = {value:.3f}")
+    if DRIFT_METRICS_FILE:
+        drift_monitor.write_textfile(DRIFT_METRICS_FILE)
+
 # Connect and insert data
-def insert_weather_data(records):
+# An already-open connection can be passed in (e.g. by the benchmarks); it is
+# left open for the caller to reuse.
+def insert_weather_data(records, conn=None):
+    insert_weather_columns(records_to_columns(records), conn=conn)
+
+# Bulk-insert weather_data columns in a single statement and commit
+def insert_weather_columns(columns, conn=None):
+    owns_conn = conn is None
     try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
+        # Sunrise/sunset and clear-sky radiation are computed locally where the API gave none
+        # (daily summaries already carry their day's mean from parse_weather_data)
+        fill_solar_columns(columns, daily=False)
+        rows = list(zip(*(columns[col] for col in WEATHER_COLUMNS)))
+        if owns_conn:
+            conn = psycopg2.connect(
+                dbname=DB_NAME,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                host=DB_HOST,
+                port=DB_PORT
+            )
         cursor = conn.cursor()
 
-        # Create weather_data table if it doesn't exist
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS weather_data (
-            id SERIAL PRIMARY KEY,
-            city VARCHAR(100),
-            country VARCHAR(2),
-            latitude DECIMAL(9,6),
-            longitude DECIMAL(9,6),
-            recorded_at TIMESTAMP,
-            temperature_c FLOAT,
-            humidity_percent FLOAT,
-            pressure_hpa FLOAT,
-            wind_speed_kmh FLOAT,
-            wind_direction_deg FLOAT,
-            precipitation_mm FLOAT,
-            uv_index FLOAT,
-            air_quality_index FLOAT,
-            weather_condition VARCHAR(50),
-            cloud_cover_percent FLOAT,
-            visibility_km FLOAT,
-            dew_point_c FLOAT,
-            solar_radiation_w_m2 FLOAT,
-            sunrise_time TIME,
-            sunset_time TIME
-        )
-        """
-        cursor.execute(create_table_query)
-        conn.commit()
-
-        insert_query = """
-        INSERT INTO weather_data (
-            city, country, latitude, longitude, recorded_at,
-            temperature_c, humidity_percent, pressure_hpa, wind_speed_kmh,
-            wind_direction_deg, precipitation_mm, uv_index, air_quality_index,
-            weather_condition, cloud_cover_percent, visibility_km, dew_point_c,
-            solar_radiation_w_m2, sunrise_time, sunset_time
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        for record in records:
-            cursor.execute(insert_query, (
-                record["city"],
-                record["country"],
-                record["latitude"],
-                record["longitude"],
-                record["recorded_at"],
-                record["temperature_c"],
-                record["humidity_percent"],
-                record["pressure_hpa"],
-                record["wind_speed_kmh"],
-                record["wind_direction_deg"],
-                record["precipitation_mm"],
-                record["uv_index"],
-                record["air_quality_index"],
-                record["weather_condition"],
-                record["cloud_cover_percent"],
-                record["visibility_km"],
-                record["dew_point_c"],
-                record["solar_radiation_w_m2"],
-                record["sunrise_time"],
-                record["sunset_time"]
-            ))
-
-        conn.commit()
-        print(f"✅ {len(records)} weather records inserted successfully.")
+        # Create weather_data and the monthly partitions this batch lands in
+        with profiling.stage("schema"):
+            ensure_schema(conn)
+            ensure_partitions(conn, columns["recorded_at"])
+
+        column_list = ", ".join(WEATHER_COLUMNS)
+        with profiling.stage("insert"):
+            if isinstance(cursor, psycopg2.extensions.cursor):
+                # One multi-row INSERT per page instead of one round trip per row
+                execute_values(cursor, f"INSERT INTO weather_data ({column_list}) VALUES %s", rows, page_size=1000)
+            else:
+                placeholders = ", ".join(["%s"] * len(WEATHER_COLUMNS))
+                cursor.executemany(f"INSERT INTO weather_data ({column_list}) VALUES ({placeholders})", rows)
+
+        # Fold the batch into the daily/weekly rollups in the same transaction
+        with profiling.stage("rollups"):
+            update_rollups(cursor, columns, dialect(conn))
+        # Tell serving processes which city/time ranges changed; on PostgreSQL
+        # the notification is only delivered if this transaction commits
+        publish_changes(cursor, columns, dialect(conn))
+
+        with profiling.stage("commit"):
+            conn.commit()
+        print(f"✅ {len(rows)} weather records inserted successfully.")
+
+        # Only committed rows count towards the drift statistics, so failed or
+        # retried batches are not folded in twice
+        with profiling.stage("quality"):
+            check_data_quality(columns)
 
     except Exception as e:
         print("❌ Error:", e)
+        # Leave a caller's connection usable: on PostgreSQL a failed statement
+        # aborts the transaction and every later insert would fail with it
+        if conn and not owns_conn:
+            try:
+                conn.rollback()
+            except Exception as rollback_error:
+                print("❌ Rollback failed:", rollback_error)
 
     finally:
-        if 'conn' in locals() and conn:
-            cursor.close()
-            conn.close()
+        if conn:
+            if 'cursor' in locals():
+                cursor.close()
+            if owns_conn:
+                conn.close()
+
+# Fetch the current conditions for a city and parse them into a weather_data record
+def fetch_current_weather(city="Nairobi"):
+    params = {
+        "key": WEATHERAPI_KEY,
+        "q": city
+    }
+    data = response_cache.fetch_json(WEATHERAPI_BASE_URL, "current.json", params)
+    return parse_current_weather(data)
 
 # New function to fetch and insert latest weather data every interval seconds
 def fetch_and_insert_realtime_weather(city="Nairobi", interval=300):
+    profiling.install_signal_handler()
     while True:
-        url = f"http://api.weatherapi.com/v1/current.json"
-        params = {
-            "key": WEATHERAPI_KEY,
-            "q": city
-        }
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            record = {
-                "city": data["location"]["name"],
-                "country": data["location"]["country"][:2],
-                "latitude": data["location"]["lat"],
-                "longitude": data["location"]["lon"],
-                "recorded_at": datetime.strptime(data["location"]["localtime"], "%Y-%m-%d %H:%M"),
-                "temperature_c": data["current"]["temp_c"],
-                "humidity_percent": data["current"]["humidity"],
-                "wind_speed_kmh": data["current"]["wind_kph"],
-                "pressure_hpa": data["current"]["pressure_mb"],
-                "precipitation_mm": data["current"]["precip_mm"],
-                "wind_direction_deg": data["current"]["wind_degree"],
-                "uv_index": data["current"].get("uv", None),
-                "air_quality_index": None,
-                "weather_condition": data["current"]["condition"]["text"],
-                "cloud_cover_percent": data["current"].get("cloud", None),
-                "visibility_km": data["current"].get("vis_km", None),
-                "dew_point_c": None,
-                "solar_radiation_w_m2": None,
-                "sunrise_time": None,
-                "sunset_time": None
-            }
-            insert_weather_data([record])
+            with profiling.timed(f"realtime tick {city}"):
+                with profiling.stage("fetch"):
+                    record = fetch_current_weather(city)
+                insert_weather_data([record])
             print(f"✅ Inserted real-time weather data for {city} at {record['recorded_at']}")
         except Exception as e:
             print(f"❌ Error fetching real-time data: {e}")
 
         time.sleep(interval)
 
-# Main function to fetch and insert historical data with rate limiting
-def main():
-    start_date = datetime(2023, 1, 1)
-    end_date = datetime.now()
+# Fetch and insert historical data for one city, one day per API call.
+# `delay` is the rate-limiting sleep between API calls. With `hourly`, all 24
+# hourly records of each day are kept instead of one daily summary row.
+def backfill(city, start_date, end_date, batch_size=10, delay=1, conn=None, hourly=False):
     delta = timedelta(days=1)
-    city = "Nairobi"
-    records_to_insert = []
+    pending = {col: [] for col in WEATHER_COLUMNS}
+    days_pending = 0
 
     current_date = start_date
     while current_date <= end_date:
         api_data = fetch_historical_weather(current_date, city)
-        record = parse_weather_data(api_data)
-        if record:
-            records_to_insert.append(record)
+        if hourly:
+            columns = parse_hourly_weather_data(api_data)
+        else:
+            record = parse_weather_data(api_data)
+            columns = records_to_columns([record]) if record else None
+        if columns:
+            for col in WEATHER_COLUMNS:
+                pending[col] += columns[col]
+            days_pending += 1
 
-        # Insert in batches of 10 to reduce DB commits
-        if len(records_to_insert) >= 10:
-            insert_weather_data(records_to_insert)
-            records_to_insert = []
+        # Insert in batches of `batch_size` days to reduce DB commits
+        if days_pending >= batch_size:
+            insert_weather_columns(pending, conn=conn)
+            pending = {col: [] for col in WEATHER_COLUMNS}
+            days_pending = 0
 
         current_date += delta
 
-        # Rate limiting: sleep 1 second between API calls to avoid hitting limits
-        time.sleep(1)
+        # Rate limiting: sleep between API calls to avoid hitting limits
+        if delay:
+            time.sleep(delay)
 
     # Insert any remaining records
-    if records_to_insert:
-        insert_weather_data(records_to_insert)
+    if days_pending:
+        insert_weather_columns(pending, conn=conn)
+
+# Main function to fetch and insert historical data with rate limiting
+def main():
+    parser = argparse.ArgumentParser(description="Backfill historical weather data into PostgreSQL")
+    parser.add_argument("--city", default="Nairobi")
+    parser.add_argument("--start", default="2023-01-01", help="first day to fetch (YYYY-MM-DD)")
+    parser.add_argument("--hourly", action="store_true", help="keep all 24 hourly records per day")
+    args = parser.parse_args()
+
+    profiling.install_signal_handler()
+    backfill(args.city, datetime.strptime(args.start, "%Y-%m-%d"), datetime.now(), hourly=args.hourly)
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,6 @@
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import psycopg2 # type: ignore
 import pandas as pd # type: ignore
 from dotenv import load_dotenv # type: ignore
@@ -46,7 +48,10 @@ SELECT
     dew_point_c,
     solar_radiation_w_m2,
     sunrise_time,
-    sunset_time
+    sunset_time,
+    latitude,
+    longitude,
+    recorded_at
 FROM weather_data
 WHERE temperature_c IS NOT NULL
 ORDER BY recorded_at;
@@ -55,6 +60,10 @@ ORDER BY recorded_at;
 df = pd.read_sql(query, conn)
 print(f"[INFO] Retrieved {len(df)} records from database")
 
+# Compute sunrise/sunset and clear-sky radiation locally where the API gave none
+from app.solar import fill_solar_frame
+df = fill_solar_frame(df).drop(columns=["latitude", "longitude", "recorded_at"])
+
 # Handle missing values
 df.dropna(inplace=True)
 print(f"[INFO] After dropping nulls: {len(df)} records remain")
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import psycopg2 # type: ignore
 import pandas as pd # type: ignore
 import numpy as np
@@ -9,6 +11,8 @@ from sklearn.model_selection import train_test_split # type: ignore
 from tensorflow.keras.models import Sequential # type: ignore
 from tensorflow.keras.layers import LSTM, Dense, Dropout # type: ignore
 from tensorflow.keras.callbacks import EarlyStopping # type: ignore
+from app.lite_runtime import LiteModel, check_parity, export_tflite
+from app.recent_store import LSTM_SEQ_LENGTH
 
 # Load environment variables
 load_dotenv()
@@ -86,7 +90,7 @@ def create_sequences(data, seq_length):
         y.append(data[i, 0])  # Predict temperature
     return np.array(X), np.array(y)
 
-SEQ_LENGTH = 10
+SEQ_LENGTH = LSTM_SEQ_LENGTH
 X, y = create_sequences(scaled_data, SEQ_LENGTH)
 
 # Split into train/test sets
@@ -119,3 +123,17 @@ model.save("ai-weather-market-app/models/lstm_weather_model.h5")
 import joblib # type: ignore
 joblib.dump(scaler, "ai-weather-market-app/models/scaler.save")
 print("[INFO] Model and scaler saved.")
+
+# Export a TFLite artifact for lightweight serving and check it against Keras
+tflite_path = "ai-weather-market-app/models/lstm_weather_model.tflite"
+tflite_size = export_tflite(model, tflite_path)
+max_diff, parity_ok = check_parity(model, tflite_path, X_test.astype(np.float32))
+print(f"[INFO] TFLite model saved to {tflite_path} ({tflite_size / 1024:.1f} KiB)")
+print(f"[{'INFO' if parity_ok else 'WARN'}] TFLite vs Keras max abs difference on test set: {max_diff:.2e}")
+
+# Int8 dynamic-range quantized export: record size and accuracy deltas
+quantized_path = "ai-weather-market-app/models/lstm_weather_model.int8.tflite"
+quantized_size = export_tflite(model, quantized_path, quantize=True)
+quantized_mse = float(np.mean((LiteModel(quantized_path).predict(X_test.astype(np.float32))[:, 0] - y_test) ** 2))
+print(f"[INFO] Quantized TFLite model saved to {quantized_path}: "
+      f"{tflite_size / 1024:.1f} KiB -> {quantized_size / 1024:.1f} KiB, test MSE {loss:.4f} -> {quantized_mse:.4f}")
@@ -1,56 +1,78 @@
 import os
 import psycopg2 # type: ignore
-import pandas as pd # type: ignore
 import numpy as np
 from dotenv import load_dotenv # type: ignore
-from tensorflow.keras.models import load_model # type: ignore
 from sklearn.preprocessing import MinMaxScaler # type: ignore
+from app.lite_runtime import LiteModel
+from app.recent_store import LSTM_SEQ_LENGTH, RecentObservationStore
 
-# Load environment variables
-load_dotenv()
-
-# Load the trained LSTM model
-model = load_model(os.path.join(os.path.dirname(__file__), "models/lstm_weather_model.h5"))
-# Connect to PostgreSQL
-conn = psycopg2.connect(
-    dbname=os.getenv("DB_NAME"),
-    user=os.getenv("DB_USER"),
-    password=os.getenv("DB_PASSWORD"),
-    host=os.getenv("DB_HOST"),
-    port=os.getenv("DB_PORT")
-)
-
-# Fetch the last 30 records
-query = """
-SELECT recorded_at, temperature_c, humidity_percent, wind_speed_kmh, pressure_hpa, precipitation_mm
-FROM weather.weather_data
-ORDER BY recorded_at DESC
-LIMIT 30;
-"""
-df = pd.read_sql(query, conn)
-conn.close()
-
-# Preprocess in chronological order
-df = df.dropna().sort_values(by="recorded_at")
-
-# Normalize features
-scaler = MinMaxScaler()
-scaled_data = scaler.fit_transform(df[['temperature_c', 'humidity_percent', 'wind_speed_kmh', 'pressure_hpa', 'precipitation_mm']])
-
-# Prepare input for prediction
-X_input = np.expand_dims(scaled_data, axis=0)  # Shape: (1, 30, features)
-
-# Predict all features
-predicted_scaled = model.predict(X_input)[0]  # Get all predicted features
-predicted_data = np.zeros((1, 5))
-predicted_data[0] = predicted_scaled  # Store all predictions
-
-# Inverse transform all features
-original_values = scaler.inverse_transform(predicted_data)[0]
-
-print("🌤️ Weather Prediction for Next Time Step:")
-print(f"•🌡 Temperature: {original_values[0]:.2f}°C")
-print(f"• 🌬 Humidity: {original_values[1]:.2f}%")
-print(f"• 💨 Wind Speed: {original_values[2]:.2f} km/h")
-print(f"• 🎈Pressure: {original_values[3]:.2f} hPa")
-print(f"• 🌧 Precipitation: {original_values[4]:.2f} mm")
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+
+def load_lstm(models_dir=MODELS_DIR):
+    # Prefer the TFLite export so TensorFlow is only imported when no .tflite artifact exists
+    tflite_path = os.path.join(models_dir, "lstm_weather_model.tflite")
+    if os.path.exists(tflite_path):
+        return LiteModel(tflite_path)
+    from tensorflow.keras.models import load_model # type: ignore
+    return load_model(os.path.join(models_dir, "lstm_weather_model.h5"))
+
+
+def window_length(model):
+    """Timesteps the model takes: LiteModel.input_shape is (steps, features), Keras' is (batch, steps, features)."""
+    shape = model.input_shape
+    return shape[0] if isinstance(model, LiteModel) else shape[1]
+
+
+def prepare_input(window, steps):
+    """
+    Scale the newest `steps` complete rows of a store window into a
+    (1, steps, features) model input. Returns the input and its scaler.
+    """
+    window = window[~np.isnan(window).any(axis=1)][-steps:]
+    if len(window) < steps:
+        raise ValueError(f"Need {steps} complete observations, have {len(window)}")
+    scaler = MinMaxScaler()
+    X_input = np.expand_dims(scaler.fit_transform(window), axis=0).astype(np.float32)
+    return X_input, scaler
+
+
+def predict_next(model, window):
+    """Next-step values of every feature, in the window's units."""
+    X_input, scaler = prepare_input(window, window_length(model))
+    predicted_data = np.zeros((1, window.shape[1]))
+    predicted_data[0] = model.predict(X_input)[0]
+    return scaler.inverse_transform(predicted_data)[0]
+
+
+def main():
+    # Load environment variables
+    load_dotenv()
+    model = load_lstm()
+
+    # Load PREDICT_CITY's newest observations into the recent-observation store,
+    # with headroom for incomplete rows that prepare_input drops
+    city = os.getenv("PREDICT_CITY", "Nairobi")
+    conn = psycopg2.connect(
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT")
+    )
+    store = RecentObservationStore(capacity=LSTM_SEQ_LENGTH * 3)
+    store.load_from_db(conn, cities=[city])
+    conn.close()
+
+    original_values = predict_next(model, store.window(city))
+
+    print("🌤️ Weather Prediction for Next Time Step:")
+    print(f"•🌡 Temperature: {original_values[0]:.2f}°C")
+    print(f"• 🌬 Humidity: {original_values[1]:.2f}%")
+    print(f"• 💨 Wind Speed: {original_values[2]:.2f} km/h")
+    print(f"• 🎈Pressure: {original_values[3]:.2f} hPa")
+    print(f"• 🌧 Precipitation: {original_values[4]:.2f} mm")
+
+
+if __name__ == "__main__":
+    main()
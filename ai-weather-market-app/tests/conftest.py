@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.bench_ingest import load_ingest_module
+from benchmarks.fake_weatherapi import FakeWeatherAPI
+from benchmarks.sqlite_standin import SQLiteStandIn
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """A local weatherapi.com stand-in, with the environment pointing at it for the test."""
+    with FakeWeatherAPI() as api:
+        monkeypatch.setenv("WEATHERAPI_BASE_URL", api.base_url)
+        monkeypatch.setenv("WEATHERAPI_KEY", "test")
+        monkeypatch.setenv("WEATHER_CACHE", "0")
+        yield api
+
+
+@pytest.fixture
+def ingest(fake_api):
+    """ins-weather-data.py loaded against `fake_api`."""
+    return load_ingest_module(fake_api.base_url)
+
+
+@pytest.fixture
+def sqlite_conn():
+    conn = SQLiteStandIn()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def make_record(ingest):
+    """Build a weather_data record: every column None except the given ones."""
+    def make(**values):
+        record = {col: None for col in ingest.WEATHER_COLUMNS}
+        record.update(values)
+        return record
+    return make
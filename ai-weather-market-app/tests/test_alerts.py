@@ -0,0 +1,47 @@
+import numpy as np
+
+from app.alerts import AlertEngine, run_lengths
+
+RULES = [
+    {"name": "heat", "variable": "temperature_c", "op": ">=", "threshold": 35, "duration": 3,
+     "region_thresholds": {"Coast": 37}},
+    {"name": "pressure_drop", "kind": "rate", "variable": "pressure_hpa", "op": "<=", "threshold": -6, "window": 3},
+]
+CITIES = ["Garissa", "Mombasa", "Nairobi"]
+REGIONS = {"Garissa": "North Eastern", "Mombasa": "Coast", "Nairobi": "Nairobi"}
+
+
+def hours(start, n):
+    return np.datetime64("2024-02-01T00:00") + np.arange(start, start + n) * np.timedelta64(1, "h")
+
+
+def test_run_lengths_carry_over():
+    mask = np.array([[True, True, False, True], [True, True, True, True]])
+    assert run_lengths(mask, initial=[2, 5]).tolist() == [[3, 4, 0, 1], [6, 7, 8, 9]]
+
+
+def test_duration_region_thresholds_and_incremental_state():
+    engine = AlertEngine(RULES, REGIONS)
+    temps = np.array([[36.0] * 2, [36.0] * 2, [20.0] * 2])
+    pressure = np.full((3, 2), 1012.0)
+    assert engine.observe(CITIES, hours(0, 2), {"temperature_c": temps, "pressure_hpa": pressure}) == []
+
+    # Re-sent steps are skipped; the third hot hour in Garissa completes the run
+    alerts = engine.observe(CITIES, hours(1, 2), {"temperature_c": temps, "pressure_hpa": pressure})
+    assert [(a["rule"], a["region"], a["start"]) for a in alerts] == [("heat", "North Eastern", "2024-02-01T02:00:00")]
+
+
+def test_rate_rule_uses_observed_tail_and_forecast_dedup():
+    engine = AlertEngine(RULES, REGIONS)
+    pressure = np.full((3, 4), 1012.0)
+    temps = np.full((3, 4), 20.0)
+    engine.observe(CITIES, hours(0, 4), {"temperature_c": temps, "pressure_hpa": pressure})
+
+    forecast_pressure = np.full((3, 72), 1012.0)
+    forecast_pressure[2, :2] = [1009.0, 1005.0]  # Nairobi falls 7 hPa within 3 h of the last observation
+    forecast = {"temperature_c": np.full((3, 72), 20.0), "pressure_hpa": forecast_pressure}
+    alerts = engine.forecast(CITIES, hours(4, 72), forecast)
+    assert [(a["rule"], a["region"], a["source"]) for a in alerts] == [("pressure_drop", "Nairobi", "forecast")]
+
+    # The same forecast on the next tick is deduplicated
+    assert engine.forecast(CITIES, hours(4, 72), forecast) == []
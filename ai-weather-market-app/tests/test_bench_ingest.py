@@ -0,0 +1,34 @@
+import os
+from datetime import datetime
+
+from benchmarks.bench_ingest import load_ingest_module
+from benchmarks.fake_weatherapi import FakeWeatherAPI
+
+
+def test_backfill_against_fake_api(ingest, sqlite_conn):
+    ingest.backfill("Nakuru", datetime(2024, 1, 1), datetime(2024, 1, 12), batch_size=5, delay=0, conn=sqlite_conn)
+
+    cursor = sqlite_conn.cursor()
+    cursor.execute("SELECT COUNT(*), MIN(recorded_at), MAX(city) FROM weather_data")
+    count, first, city = cursor.fetchone()
+    assert count == 12
+    assert first.startswith("2024-01-01")
+    assert city == "Nakuru"
+
+
+def test_hourly_backfill_keeps_every_hour(ingest, sqlite_conn):
+    ingest.backfill("Nairobi", datetime(2024, 3, 1), datetime(2024, 3, 3), batch_size=2, delay=0, conn=sqlite_conn,
+                    hourly=True)
+
+    cursor = sqlite_conn.cursor()
+    cursor.execute("SELECT COUNT(*), COUNT(DISTINCT recorded_at), MAX(recorded_at) FROM weather_data")
+    count, distinct, last = cursor.fetchone()
+    assert count == distinct == 72
+    assert last == "2024-03-03 23:00:00"
+
+
+def test_loading_the_script_leaves_the_environment_alone():
+    before = dict(os.environ)
+    with FakeWeatherAPI() as api:
+        load_ingest_module(api.base_url)
+    assert dict(os.environ) == before
@@ -0,0 +1,49 @@
+import queue
+import socket
+from datetime import datetime
+
+from app import change_feed
+from app.change_feed import ChangeFeedListener, publish_changes, summarize_changes
+
+
+def batch():
+    return {
+        "city": ["Nairobi", "Mombasa", "Nairobi"],
+        "recorded_at": [datetime(2024, 5, 1, 6), datetime(2024, 5, 1, 7), datetime(2024, 5, 2, 9)],
+    }
+
+
+def test_summarize_changes_gives_range_per_city():
+    messages = summarize_changes(batch())
+    assert messages == [
+        {"city": "Mombasa", "start": "2024-05-01T07:00:00", "end": "2024-05-01T07:00:00", "rows": 1},
+        {"city": "Nairobi", "start": "2024-05-01T06:00:00", "end": "2024-05-02T09:00:00", "rows": 2},
+    ]
+
+
+def test_local_listener_receives_published_changes(monkeypatch):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        address = probe.getsockname()
+    monkeypatch.setattr(change_feed, "LOCAL_FEED_ADDRESS", address)
+    monkeypatch.setenv("CHANGE_FEED_LOCAL", "1")
+
+    received = queue.Queue()
+    listener = ChangeFeedListener(received.put, source="local", poll_interval=0.1).start()
+    try:
+        publish_changes(None, batch(), "sqlite")
+        cities = {received.get(timeout=5)["city"] for _ in range(2)}
+    finally:
+        listener.stop()
+    assert cities == {"Nairobi", "Mombasa"}
+
+
+def test_unreachable_database_is_logged_once(monkeypatch, capsys):
+    import time
+
+    monkeypatch.setattr(change_feed, "DB_PARAMS", {"host": "127.0.0.1", "port": 1, "dbname": "none",
+                                                   "connect_timeout": 1})
+    listener = ChangeFeedListener(lambda message: None, poll_interval=0.05).start(wait=False)
+    time.sleep(0.5)
+    listener.stop()
+    assert capsys.readouterr().out.count("Change feed connection lost") == 1
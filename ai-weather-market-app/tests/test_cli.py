@@ -0,0 +1,69 @@
+import contextlib
+import subprocess
+import sys
+
+from app import cli, db
+
+
+def test_cli_imports_no_heavy_dependencies():
+    code = (
+        "import sys; from app.cli import build_parser; build_parser(); "
+        "print(sorted(m for m in ('tensorflow', 'h2o', 'pandas', 'sklearn') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=cli.PACKAGE_ROOT).stdout
+    assert out.strip() == "[]"
+
+
+def test_ingest_once_uses_pooled_connection(monkeypatch, fake_api, sqlite_conn):
+    monkeypatch.setattr(db, "pooled", lambda: contextlib.nullcontext(sqlite_conn))
+    monkeypatch.setattr(db, "close_pool", lambda: None)
+    assert cli.main(["ingest", "--city", "Nairobi", "--city", "Mombasa", "--once"]) == 0
+
+    cursor = sqlite_conn.cursor()
+    cursor.execute("SELECT city, sunrise_time FROM weather_data ORDER BY city")
+    rows = cursor.fetchall()
+    assert [city for city, _ in rows] == ["Mombasa", "Nairobi"]
+    assert all(sunrise is not None for _, sunrise in rows)
+
+
+def test_passthrough_arguments():
+    args, extra = cli.build_parser().parse_known_args(["train", "orchestrate", "--max-cpus", "2"])
+    assert args.model == "orchestrate" and extra == ["--max-cpus", "2"]
+
+
+def test_failed_insert_rolls_back_callers_connection(monkeypatch, ingest, sqlite_conn):
+    conn, module = sqlite_conn, ingest
+    record = module.fetch_current_weather("Nairobi")
+
+    def broken_rollups(*args):
+        raise RuntimeError("rollup failure")
+
+    real_rollups = module.update_rollups
+    monkeypatch.setattr(module, "update_rollups", broken_rollups)
+    module.insert_weather_data([record], conn=conn)
+    monkeypatch.setattr(module, "update_rollups", real_rollups)
+    module.insert_weather_data([dict(record, city="Mombasa")], conn=conn)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT city FROM weather_data")
+    assert [row[0] for row in cursor.fetchall()] == ["Mombasa"]
+    # The rolled-back batch never reached the drift statistics
+    assert {city for city, _ in module.drift_monitor.stats} == {"Mombasa"}
+
+    def broken_solar(*args, **kwargs):
+        raise ValueError("solar failure")
+
+    # A solar-geometry error is reported like any other insert failure
+    monkeypatch.setattr(module, "fill_solar_columns", broken_solar)
+    module.insert_weather_data([dict(record, city="Kisumu")], conn=conn)
+    assert "Kisumu" not in {city for city, _ in module.drift_monitor.stats}
+
+
+def test_prices_subcommand_loads_a_price_file(tmp_path):
+    prices = tmp_path / "prices.csv"
+    prices.write_text("market,commodity,observed_at,price\nNakuru,maize,2024-01-02,48\n")
+    store = tmp_path / "store.npz"
+    assert cli.main(["prices", str(prices), "--store", str(store)]) == 0
+    assert store.exists()
+    assert cli.main(["prices", str(tmp_path / "prices.txt"), "--store", str(store)]) == 1
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from app.drift_monitor import DriftMonitor, build_snapshot
+
+
+def test_flags_mean_shift_and_null_rate():
+    rng = np.random.default_rng(0)
+    train = pd.DataFrame({
+        "city": ["Nairobi"] * 2000,
+        "temperature_c": rng.normal(20, 3, 2000),
+        "dew_point_c": rng.normal(10, 2, 2000),
+    })
+    monitor = DriftMonitor(build_snapshot(train), min_count=200)
+
+    normal = {"city": ["Nairobi"] * 500, "temperature_c": rng.normal(20, 3, 500), "dew_point_c": rng.normal(10, 2, 500)}
+    assert monitor.observe(normal) == []
+    stats = monitor.stats[("Nairobi", "temperature_c")]
+    assert abs(stats.mean - 20) < 0.5 and abs(stats.variance ** 0.5 - 3) < 0.3
+    assert abs(stats.quantile(0.5) - 20) < 0.5
+
+    shifted = {"city": ["Nairobi"] * 2000, "temperature_c": rng.normal(35, 3, 2000), "dew_point_c": [None] * 2000}
+    raised = {(feature, kind) for _, feature, kind, _ in monitor.observe(shifted)}
+    assert ("temperature_c", "mean_shift") in raised and ("temperature_c", "psi") in raised
+    assert ("dew_point_c", "null_rate") in raised
+    # Active flags are not re-reported
+    assert monitor.observe(shifted) == []
+    assert 'weather_feature_drift{city="Nairobi",feature="dew_point_c"} 1' in monitor.metrics()
+
+
+def test_shift_after_long_history_is_flagged():
+    rng = np.random.default_rng(1)
+    train = pd.DataFrame({"city": ["Mombasa"] * 2000, "temperature_c": rng.normal(27, 2, 2000)})
+    monitor = DriftMonitor(build_snapshot(train), min_count=100, half_life=200)
+    for _ in range(100):
+        assert monitor.observe({"city": ["Mombasa"] * 200, "temperature_c": rng.normal(27, 2, 200)}) == []
+    # 20,000 normal rows must not dilute a shift of a few hundred
+    raised = monitor.observe({"city": ["Mombasa"] * 400, "temperature_c": rng.normal(40, 2, 400)})
+    assert ("Mombasa", "temperature_c", "mean_shift") in [r[:3] for r in raised]
@@ -0,0 +1,58 @@
+import time
+
+from app.ensemble import EnsemblePredictor, Member
+
+
+def test_blend_skips_slow_and_failing_members():
+    def slow(batch):
+        time.sleep(0.5)
+        return [100.0] * len(batch)
+
+    def broken(batch):
+        raise RuntimeError("model not loaded")
+
+    ensemble = EnsemblePredictor([
+        Member("a", lambda batch: [10.0] * len(batch), weight=3),
+        Member("b", lambda batch: [20.0] * len(batch), weight=1),
+        Member("slow", slow, timeout=0.05),
+        Member("broken", broken),
+    ])
+    start = time.perf_counter()
+    result = ensemble.predict([{}, {}])
+    assert time.perf_counter() - start < 0.4
+    assert result["prediction"] == [12.5, 12.5]
+    assert result["members"]["slow"]["status"] == "timeout"
+    assert result["members"]["broken"]["status"] == "error"
+
+    # Still running from the first call, so it is skipped rather than queued
+    assert ensemble.predict([{}])["members"]["slow"]["status"] == "busy"
+    ensemble.shutdown()
+
+
+def test_wrong_length_member_is_dropped():
+    ensemble = EnsemblePredictor([
+        Member("a", lambda batch: [10.0] * len(batch)),
+        Member("short", lambda batch: [99.0]),
+    ])
+    result = ensemble.predict([{}, {}, {}])
+    assert result["prediction"] == [10.0, 10.0, 10.0]
+    assert result["members"]["short"]["status"] == "error"
+    ensemble.shutdown()
+
+
+def test_concurrent_requests_skip_a_busy_member():
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+
+    def slow(batch):
+        calls.append(1)
+        time.sleep(0.3)
+        return [1.0] * len(batch)
+
+    ensemble = EnsemblePredictor([Member("slow", slow, timeout=0.05)])
+    assert ensemble.predict([{}])["members"]["slow"]["status"] == "timeout"
+    with ThreadPoolExecutor(8) as pool:
+        statuses = list(pool.map(lambda _: ensemble.predict([{}])["members"]["slow"]["status"], range(8)))
+    assert statuses == ["busy"] * 8 and len(calls) == 1
+    ensemble.shutdown()
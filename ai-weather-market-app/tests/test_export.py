@@ -0,0 +1,49 @@
+import io
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pytest
+
+from app.export import build_query, export
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+def conn(ingest, sqlite_conn, make_record):
+    records = [
+        make_record(city=city, recorded_at=datetime(2024, 5, 1) + timedelta(hours=h), temperature_c=20.0 + h,
+                    humidity_percent=60.0, wind_speed_kmh=10.0, pressure_hpa=1012.0,
+                    precipitation_mm=None if h == 0 else 0.5, sunrise_time=time(6, 30))
+        for city in ("Nairobi", "Nakuru")
+        for h in range(48)
+    ]
+    ingest.insert_weather_data(records, conn=sqlite_conn)
+    return sqlite_conn
+
+
+def test_arrow_stream_with_projection_and_pushdown(conn):
+    chunks = list(export(conn, "arrow", ["city", "recorded_at", "temperature_c", "sunrise_time"],
+                         cities=["Nakuru"], start=datetime(2024, 5, 2), chunk_size=10))
+    assert len(chunks) > 2
+    table = pa.ipc.open_stream(io.BytesIO(b"".join(chunks))).read_all()
+    assert table.column_names == ["city", "recorded_at", "temperature_c", "sunrise_time"]
+    assert table.num_rows == 24 and set(table["city"].to_pylist()) == {"Nakuru"}
+    assert table["recorded_at"][0].as_py() == datetime(2024, 5, 2)
+    assert table["sunrise_time"][0].as_py() == time(6, 30)
+
+
+def test_parquet_with_predictions(conn):
+    predictor = lambda X: X[:, 0] + X[:, 3]  # noqa: E731
+    data = b"".join(export(conn, "parquet", ["city", "recorded_at"], predictor=predictor, chunk_size=30))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 96
+    predictions = table["rf_prediction"].to_numpy(zero_copy_only=False)
+    assert np.isnan(predictions[0]) and predictions[1] == pytest.approx(60.5)
+
+
+def test_measurements_are_selected_as_floats():
+    query, params = build_query(["city", "latitude", "recorded_at"], cities=["Nairobi"])
+    assert query.startswith("SELECT city, CAST(latitude AS DOUBLE PRECISION) AS latitude, recorded_at FROM")
+    assert params == ["Nairobi"]
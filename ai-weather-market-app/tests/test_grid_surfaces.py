@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.grid_surfaces import build_snapshot, load_surface, prune_surfaces, save_surface
+
+STATIONS = {
+    "Nairobi": (-1.2864, 36.8172, 22.0),
+    "Nyeri": (-0.4201, 36.9476, 18.0),
+    "Nakuru": (-0.3031, 36.0800, 20.0),
+    "Mombasa": (-4.0435, 39.6682, 30.0),
+}
+
+
+def test_snapshot_is_memory_mapped_and_sliced_by_region(tmp_path, ingest, sqlite_conn, make_record):
+    conn = sqlite_conn
+    records = [make_record(city=city, latitude=lat, longitude=lon, temperature_c=temp,
+                           recorded_at=datetime(2024, 5, 1, 12))
+               for city, (lat, lon, temp) in STATIONS.items()]
+    ingest.insert_weather_data(records, conn=conn)
+
+    stamp = build_snapshot(conn, str(tmp_path), variables=("temperature_c", "humidity_percent"), resolution=0.1,
+                           extra_values={"temperature_forecast_c": {"Nairobi": 23.0}})
+    surface = load_surface(str(tmp_path))
+    assert isinstance(surface.data, np.memmap)
+    assert surface.meta["stations"] == 4 and stamp in str(surface.data.filename)
+    assert surface.data.shape == (3, 100, 82)
+
+    lats, lons, slices = surface.region("Laikipia", ["temperature_c"])
+    assert lats.min() >= -0.25 and lons.max() <= 37.4
+    assert 17.5 < np.nanmin(slices["temperature_c"]) and np.nanmax(slices["temperature_c"]) < 23
+    assert np.isnan(surface.data[1]).all()
+    assert np.allclose(surface.data[2], 23.0)
+
+    near = surface.sample([-4.04, 10.0], [39.67, 36.0], "temperature_c")
+    assert 28 < near[0] <= 30 and np.isnan(near[1])
+
+
+def test_prune_keeps_newest_snapshots(tmp_path):
+    lats, lons = np.array([0.0, 0.1]), np.array([36.0, 36.1])
+    stamps = [save_surface(np.zeros((1, 2, 2)), lats, lons, ["t"], str(tmp_path), created_at=datetime(2024, 5, 1, hour))
+              for hour in range(5)]
+    assert prune_surfaces(str(tmp_path), keep=2) == stamps[:3]
+    assert sorted(p.name for p in tmp_path.glob("*.npy")) == [f"{s}.npy" for s in stamps[3:]]
+    assert load_surface(str(tmp_path)).meta["created_at"].startswith("2024-05-01T04")
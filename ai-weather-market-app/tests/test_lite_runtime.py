@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.lite_runtime import LiteModel, check_parity, export_tflite
+
+
+def test_tflite_matches_keras(tmp_path):
+    tf = pytest.importorskip("tensorflow")
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(10, 5)),
+        tf.keras.layers.LSTM(8),
+        tf.keras.layers.Dense(1),
+    ])
+    path = str(tmp_path / "model.tflite")
+    export_tflite(model, path)
+
+    X = np.random.default_rng(0).random((37, 10, 5), dtype=np.float32)
+    max_diff, ok = check_parity(model, path, X)
+    assert ok, max_diff
+    assert LiteModel(path).predict(X, batch_size=16).shape == (37, 1)
+
+
+def test_predict_weather_feeds_an_exported_model(tmp_path):
+    tf = pytest.importorskip("tensorflow")
+    from datetime import datetime, timedelta
+
+    import predict_weather
+    from app.recent_store import RecentObservationStore
+
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(10, 5)),
+        tf.keras.layers.LSTM(8),
+        tf.keras.layers.Dense(1),
+    ])
+    path = str(tmp_path / "model.tflite")
+    export_tflite(model, path)
+
+    # The store holds more rows than the model's window
+    store = RecentObservationStore(capacity=30)
+    rng = np.random.default_rng(0)
+    times = [datetime(2024, 1, 1) + timedelta(hours=h) for h in range(30)]
+    store.append_columns({"city": ["Nairobi"] * 30, "recorded_at": times,
+                          **{c: rng.random(30).tolist() for c in store.columns}})
+    window = store.window("Nairobi")
+
+    lite = predict_weather.predict_next(LiteModel(path), window)
+    keras = predict_weather.predict_next(model, window)
+    assert lite.shape == (5,)
+    assert np.allclose(lite, keras, atol=1e-4)
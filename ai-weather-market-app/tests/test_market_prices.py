@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from app.market_prices import PriceStore, asof_join, load_weather_series
+from app.schema import ensure_schema
+
+
+def test_store_roundtrip_and_asof_join(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    pd.DataFrame({
+        "market": ["Nakuru", "Nakuru", "Nakuru", "Wakulima"],
+        "commodity": ["maize", "maize", "maize", "beans"],
+        "observed_at": ["2024-01-05", "2024-01-02", "2024-01-05", "2024-01-06"],
+        "price": [52.0, 48.0, 55.0, 120.0],
+    }).to_csv(csv_path, index=False)
+
+    store = PriceStore().load(str(csv_path))
+    # Sorted by time, and the later duplicate for 2024-01-05 wins
+    _, prices = store.get("Nakuru", "maize")
+    assert prices.tolist() == [48.0, 55.0]
+
+    store.save(tmp_path / "store.npz")
+    store = PriceStore.open(tmp_path / "store.npz")
+    assert store.keys() == [("Nakuru", "maize"), ("Wakulima", "beans")]
+
+    days = np.arange("2024-01-01", "2024-01-08", dtype="datetime64[D]").astype("datetime64[s]").astype(np.int64)
+    features = np.arange(len(days), dtype=np.float32)[:, None]
+    weather = {"Nakuru": (days, features), "Nairobi": (days, features + 100)}
+
+    result = asof_join(store, weather, {"Nakuru": "Nakuru", "Wakulima": "Nairobi"}, window=3)
+    # 2024-01-02 has only two readings at or before it and is dropped
+    assert result["y"].tolist() == [55.0, 120.0]
+    assert result["X"][:, :, 0].tolist() == [[2, 3, 4], [103, 104, 105]]
+
+
+def test_daily_series_come_from_rollups(sqlite_conn):
+    conn = sqlite_conn
+    ensure_schema(conn)
+    cursor = conn.cursor()
+    for day, total in (("2024-01-01", 40.0), ("2024-01-02", 50.0)):
+        for variable in ("temperature_c", "humidity_percent"):
+            cursor.execute("INSERT INTO weather_rollup_daily VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                           ("Nakuru", day, variable, 2, total, 0.0, total))
+    conn.commit()
+
+    timestamps, features = load_weather_series(conn, features=("temperature_c", "humidity_percent"), period="daily")["Nakuru"]
+    # Each day's mean becomes available at the end of that day
+    assert timestamps.astype("datetime64[s]").astype(str).tolist() == ["2024-01-02T00:00:00", "2024-01-03T00:00:00"]
+    assert features.tolist() == [[20.0, 20.0], [25.0, 25.0]]
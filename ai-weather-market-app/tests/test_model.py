@@ -4,3 +4,23 @@ def test_predict_impact():
     data = {"temp": 30, "humidity": 50, "wind": 10}
     result = predict_impact(data)
     assert result == "Increased energy demand"
+
+
+def test_predict_impact_batch():
+    import numpy as np
+    from app.ai_model import NORMAL_IMPACT, predict_impact_batch
+
+    batch = {
+        "city": np.array(["Nairobi"] * 4 + ["Nyeri"] * 4 + ["Kisumu"] * 2),
+        "temperature_c": np.array([30, 31, 20, 29, 18, 19, 20, 21, 22, np.nan]),
+        "precipitation_mm": np.array([0, 0, 0, 0, 15, 20, 0, 0, 0, 0]),
+        "humidity_percent": np.full(10, 60.0),
+        "wind_speed_kmh": np.full(10, 10.0),
+    }
+    result = predict_impact_batch(batch)
+    impacts = dict(zip(result["cities"], result["impact"]))
+    scores = dict(zip(result["cities"], result["score"]))
+    assert impacts["Nairobi"] == "Increased energy demand"
+    assert scores["Nairobi"] == 0.75
+    assert impacts["Nyeri"] == "Harvest and transport disruption"
+    assert impacts["Kisumu"] == NORMAL_IMPACT
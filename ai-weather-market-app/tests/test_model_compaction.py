@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from app.model_compaction import compact_forest, compaction_report, load_compact, save_compact
+
+
+def test_compact_forest_matches_sklearn(tmp_path):
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    joblib = pytest.importorskip("joblib")
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5)) * [10, 1, 100, 0.01, 5]
+    y = X[:, 0] * 2 + np.sin(X[:, 1]) + rng.normal(size=400)
+    model = ensemble.RandomForestRegressor(n_estimators=20, max_depth=12, random_state=0).fit(X[:300], y[:300])
+
+    model_path = str(tmp_path / "rf.joblib")
+    joblib.dump(model, model_path)
+    compact_path = str(tmp_path / "rf.compact")
+    save_compact(compact_forest(model), compact_path, compress=True)
+
+    forest = load_compact(compact_path)
+    assert isinstance(forest.arrays["threshold"], np.memmap)
+    np.testing.assert_allclose(forest.predict(X[300:], chunk_size=32), model.predict(X[300:]), rtol=1e-5)
+    np.testing.assert_allclose(load_compact(compact_path + ".npz").predict(X[300:]), model.predict(X[300:]),
+                               rtol=1e-5)
+
+    report = compaction_report(model, model_path, compact_path, X[300:], y[300:])
+    assert report["compact_bytes"] < report["original_bytes"]
+    assert report["compact_mse"] == pytest.approx(report["original_mse"], rel=1e-4)
+
+    save_compact(compact_forest(model, quantize=True), str(tmp_path / "rf.q"))
+    quantized = load_compact(str(tmp_path / "rf.q"))
+    assert quantized.arrays["value"].dtype == np.float16
+    np.testing.assert_allclose(quantized.predict(X[300:]), model.predict(X[300:]), atol=0.05)
@@ -0,0 +1,61 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from app.negotiation import DataVersion, respond
+
+msgpack = pytest.importorskip("msgpack")
+
+ROWS = [{"city": "Nairobi", "prediction": 21.5 + i} for i in range(50)]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    version = DataVersion()
+    app.config["version"] = version
+
+    @app.route("/forecast", methods=["GET", "POST"])
+    def forecast():
+        return respond(ROWS, version=version, last_modified=version.modified)
+
+    return app.test_client()
+
+
+def test_json_by_default_and_gzip(client):
+    plain = client.get("/forecast")
+    assert plain.mimetype == "application/json" and json.loads(plain.data) == ROWS
+
+    compressed = client.get("/forecast", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data)) == ROWS
+    assert len(compressed.data) < len(plain.data)
+
+
+def test_msgpack(client):
+    response = client.post("/forecast", data=b'{"city": "Nairobi"}', headers={"Accept": "application/msgpack"})
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.data) == ROWS
+
+
+def test_conditional_get_returns_304_until_data_changes(client):
+    first = client.get("/forecast")
+    etag = first.headers["ETag"]
+    assert client.get("/forecast", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/forecast", headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+    # Same URL, different POST body: different ETag
+    assert client.post("/forecast", data=b"{}", headers={"If-None-Match": etag}).status_code == 200
+
+    client.application.config["version"].bump()
+    assert client.get("/forecast", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_post_ignores_if_modified_since_and_versions_differ_per_process(client):
+    first = client.post("/forecast", data=b'{"humidity_percent": 40}')
+    other_body = client.post("/forecast", data=b'{"humidity_percent": 90}',
+                             headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert other_body.status_code == 200
+
+    assert str(DataVersion()) != str(DataVersion())
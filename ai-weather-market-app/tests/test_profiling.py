@@ -0,0 +1,46 @@
+import threading
+import time
+
+from flask import Flask
+
+from app import profiling
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_cpu_profile_finds_busy_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+    try:
+        result = profiling.profile_cpu(0.3, interval=0.002)
+    finally:
+        stop.set()
+        worker.join()
+    assert result["samples"] > 10
+    assert any("busy_worker" in row["function"] for row in result["top_total"])
+    assert any(line.startswith("busy;") for line in result["folded"].splitlines())
+
+
+def test_stages_are_noops_when_disabled_and_logged_when_slow(monkeypatch, capsys):
+    monkeypatch.setattr(profiling, "_slow_ms", None)
+    assert profiling.timed("tick") is profiling.stage("fetch")
+
+    monkeypatch.setattr(profiling, "_slow_ms", 5)
+    with profiling.timed("realtime tick"):
+        with profiling.stage("fetch"):
+            time.sleep(0.01)
+    assert "[SLOW] realtime tick took" in capsys.readouterr().out
+
+
+def test_profile_routes_need_token(monkeypatch):
+    monkeypatch.setenv("PROFILING_TOKEN", "secret")
+    app = Flask(__name__)
+    profiling.install_flask(app)
+    client = app.test_client()
+    assert client.get("/debug/profile/memory?seconds=0").status_code == 404
+    response = client.get("/debug/profile/memory?seconds=0.05", headers={"X-Profiling-Token": "secret"})
+    assert response.status_code == 200 and "top" in response.get_json()
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.recent_store import RecentObservationStore
+
+
+def _columns(city, start, hours, offset=0.0):
+    times = [start + timedelta(hours=h) for h in range(hours)]
+    return {
+        "city": [city] * hours,
+        "recorded_at": times,
+        "temperature_c": [offset + h for h in range(hours)],
+        "humidity_percent": [50.0] * hours,
+        "wind_speed_kmh": [None] * hours,
+        "pressure_hpa": [1013.0] * hours,
+        "precipitation_mm": [0.0] * hours,
+    }
+
+
+def test_ring_buffer_windows():
+    store = RecentObservationStore(capacity=5)
+    store.append_columns(_columns("Nairobi", datetime(2024, 1, 1), 8))
+    store.append_columns(_columns("Nyeri", datetime(2024, 1, 1), 2, offset=100))
+
+    window = store.window("Nairobi")
+    assert window[:, 0].tolist() == [3, 4, 5, 6, 7]
+    assert np.isnan(window[:, 2]).all()
+    assert np.shares_memory(window, store.rings["Nairobi"].values)
+    assert store.window("Nairobi", 2)[:, 0].tolist() == [6, 7]
+
+    # Older rows are ignored; the same timestamp replaces the newest row
+    store.append_columns(_columns("Nairobi", datetime(2023, 12, 1), 1, offset=-50))
+    store.append_columns(_columns("Nairobi", datetime(2024, 1, 1, 7), 1, offset=70))
+    assert store.window("Nairobi")[:, 0].tolist() == [3, 4, 5, 6, 70]
+
+    batch = store.batch(["Nyeri", "Nairobi", "Unknown"], 3)
+    assert batch.shape == (3, 3, 5)
+    assert np.isnan(batch[0, 0, 0]) and batch[0, 1:, 0].tolist() == [100, 101]
+    assert np.isnan(batch[2]).all()
+
+
+def test_reload_swaps_in_backfilled_rows(sqlite_conn):
+    conn = sqlite_conn
+    conn.cursor().execute(
+        "CREATE TABLE weather_data (city TEXT, recorded_at TIMESTAMP, temperature_c REAL, humidity_percent REAL, "
+        "wind_speed_kmh REAL, pressure_hpa REAL, precipitation_mm REAL)"
+    )
+    store = RecentObservationStore(capacity=3)
+    store.append_columns(_columns("Nairobi", datetime(2024, 1, 1), 3))
+    old_ring = store.rings["Nairobi"]
+
+    # A backfill lands a row older than the newest buffered one
+    cursor = conn.cursor()
+    for h, temp in ((0, 0.0), (1, 1.0), (2, 2.0), (-1, -9.0)):
+        cursor.execute("INSERT INTO weather_data VALUES (%s, %s, %s, 50, 5, 1013, 0)",
+                       ("Nairobi", datetime(2024, 1, 1) + timedelta(hours=h), temp))
+    conn.commit()
+    store.reload(conn, ["Nairobi", "Nyeri"])
+    assert store.rings["Nairobi"] is not old_ring
+    assert store.window("Nairobi")[:, 0].tolist() == [0, 1, 2]
+    assert "Nyeri" not in store.rings
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from app.response_cache import CacheMiss, ResponseCache
+
+
+def test_history_is_kept_and_current_expires(tmp_path):
+    cache = ResponseCache(root=str(tmp_path), current_ttl=60)
+    history = {"key": "secret", "q": "Nairobi", "dt": "2023-01-01"}
+    current = {"key": "secret", "q": "Nairobi"}
+    cache.put("history.json", history, {"forecast": 1})
+    cache.put("current.json", current, {"current": 1})
+
+    # The API key is not part of the cache key
+    assert cache.get("history.json", dict(history, key="other")) == {"forecast": 1}
+    assert cache.get("current.json", current) == {"current": 1}
+
+    for root, _, files in os.walk(tmp_path):
+        for name in files:
+            os.utime(os.path.join(root, name), (0, 0))
+    assert cache.get("history.json", history) == {"forecast": 1}
+    assert cache.get("current.json", current) is None
+
+
+def test_offline_miss_raises(tmp_path):
+    cache = ResponseCache(root=str(tmp_path), offline=True)
+    with pytest.raises(CacheMiss):
+        cache.fetch_json("http://unused", "history.json", {"q": "Nairobi", "dt": "2023-01-01"})
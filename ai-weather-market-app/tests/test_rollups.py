@@ -0,0 +1,27 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.rollups import fetch_rollups, rebuild_rollups
+
+
+def test_incremental_rollups_match_rebuild(ingest, sqlite_conn):
+    conn = sqlite_conn
+    for city in ("Nairobi", "Eldoret"):
+        ingest.backfill(city, datetime(2024, 1, 1), datetime(2024, 1, 10), batch_size=3, delay=0, conn=conn,
+                        hourly=True)
+
+    incremental = {period: fetch_rollups(conn, period) for period in ("daily", "weekly")}
+    rebuild_rollups(conn)
+    for period, rows in incremental.items():
+        rebuilt = fetch_rollups(conn, period)
+        assert len(rows) == len(rebuilt)
+        for row, expected in zip(rows, rebuilt):
+            assert row["n_obs"] == expected["n_obs"]
+            assert row["mean"] == pytest.approx(expected["mean"])
+            assert row["max"] == pytest.approx(expected["max"])
+
+    weekly = fetch_rollups(conn, "weekly", cities=["Nairobi"], variables=["temperature_c"])
+    # 2024-01-01 is a Monday: days 1-7 and 8-10 fall in two weeks
+    assert [(row["bucket_start"], row["n_obs"]) for row in weekly] == [("2024-01-01", 168), ("2024-01-08", 72)]
+    assert fetch_rollups(conn, "daily", start=date(2024, 1, 10), variables=["uv_index"])[0]["n_obs"] == 24
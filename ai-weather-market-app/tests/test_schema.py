@@ -0,0 +1,20 @@
+from app.schema import ensure_schema
+from benchmarks.sqlite_standin import SQLiteStandIn
+
+
+class CountingConnection(SQLiteStandIn):
+    commits = 0
+
+    def commit(self):
+        self.commits += 1
+        super().commit()
+
+
+def test_ensure_schema_runs_once_per_connection():
+    conn = CountingConnection()
+    for _ in range(3):
+        ensure_schema(conn)
+    assert conn.commits == 1
+    other = CountingConnection()
+    ensure_schema(other)
+    assert other.commits == 1
@@ -0,0 +1,60 @@
+from datetime import datetime, time
+
+import numpy as np
+import pandas as pd
+
+from app.solar import (daily_mean_clear_sky_ghi, fill_solar_columns, fill_solar_frame, minutes_to_time,
+                       solar_elevation, sun_times)
+
+
+def test_sun_times_match_noaa():
+    # NOAA solar calculator: London, 21 June 2024 (BST): sunrise 04:43, sunset 21:21
+    sunrise, sunset, day_length = sun_times(51.5, -0.12, np.array(["2024-06-21"], dtype="datetime64[s]"), 1)
+    assert minutes_to_time(sunrise[0]) == time(4, 43)
+    assert minutes_to_time(sunset[0]) == time(21, 21)
+    # Near the equator the day is ~12 h all year
+    _, _, nairobi = sun_times(-1.2864, 36.8172, np.array(["2024-03-20", "2024-12-21"], dtype="datetime64[s]"))
+    assert np.allclose(nairobi, 12.1, atol=0.15)
+
+
+def test_elevation_overhead_at_equinox_noon_and_negative_at_night():
+    times = np.array(["2024-03-20T12:37", "2024-03-20T00:00"], dtype="datetime64[s]")
+    elevation = solar_elevation(-1.2864, 36.8172, times)
+    assert elevation[0] > 88 and elevation[1] < -75
+
+
+def test_fill_keeps_api_values_and_fills_missing():
+    columns = {
+        "latitude": [-1.2864, -1.2864, None],
+        "longitude": [36.8172, 36.8172, None],
+        "recorded_at": [datetime(2024, 3, 20, 12, 37), datetime(2024, 3, 20, 22), datetime(2024, 3, 20)],
+        "sunrise_time": [time(6, 32), None, None],
+        "sunset_time": [time(18, 41), None, None],
+        "solar_radiation_w_m2": [None, None, None],
+    }
+    fill_solar_columns(columns, daily=False)
+    assert columns["sunrise_time"][:2] == [time(6, 32), time(6, 37)]
+    assert 1000 < columns["solar_radiation_w_m2"][0] < 1100 and columns["solar_radiation_w_m2"][1] == 0
+    assert columns["sunset_time"][2] is None
+
+    df = pd.DataFrame({k: v[:2] for k, v in columns.items()})
+    df.loc[1, "solar_radiation_w_m2"] = np.nan
+    assert fill_solar_frame(df)["solar_radiation_w_m2"].notna().all()
+
+
+def test_daily_rows_get_the_days_mean_not_midnight():
+    day = np.array(["2024-03-20"], dtype="datetime64[s]")
+    mean = daily_mean_clear_sky_ghi([-1.2864], [36.8172], day)[0]
+    assert 250 < mean < 400
+
+    # One midnight row per location/date is a daily summary; an hourly day keeps 0 at midnight
+    hourly = pd.date_range("2024-03-20", periods=24, freq="h")
+    df = pd.DataFrame({
+        "latitude": [-1.2864] * 25, "longitude": [36.8172] * 24 + [39.6682],
+        "recorded_at": list(hourly) + [pd.Timestamp("2024-03-20")],
+        "sunrise_time": [None] * 25, "sunset_time": [None] * 25, "solar_radiation_w_m2": [np.nan] * 25,
+    })
+    df = fill_solar_frame(df)
+    assert df["solar_radiation_w_m2"].iloc[0] == 0
+    assert df["solar_radiation_w_m2"].iloc[24] > 250
+    assert df["sunrise_time"].iloc[0] == time(6, 37)
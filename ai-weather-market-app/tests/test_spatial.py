@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.spatial import StationIndex, idw_weights
+
+STATIONS = (
+    ["Nairobi", "Mombasa", "Nakuru", "Nyeri"],
+    [-1.2864, -4.0435, -0.3031, -0.4201],
+    [36.8172, 39.6682, 36.0800, 36.9476],
+)
+
+
+def test_nearest_and_distance():
+    index = StationIndex(*STATIONS)
+    idx, km = index.nearest([-1.29, -3.9], [36.82, 39.6], k=2)
+    assert index.cities[idx[:, 0]].tolist() == ["Nairobi", "Mombasa"]
+    assert km[0, 0] < 1
+    # Nairobi-Mombasa is roughly 440 km as the crow flies
+    assert 420 < index.nearest(-1.2864, 36.8172, k=4)[1][0, -1] < 460
+
+
+def test_idw_interpolation_and_rebuild():
+    index = StationIndex(*STATIONS)
+    values = np.array([[20.0, 1.0], [30.0, np.nan], [18.0, 3.0], [16.0, 5.0]])
+    on_station = index.interpolate([-1.2864], [36.8172], values, k=3)
+    assert on_station[0].tolist() == [20.0, 1.0]
+
+    between = index.interpolate(np.full(5000, -0.8), np.full(5000, 36.5), values, k=3)
+    assert between.shape == (5000, 2)
+    assert 16 < between[0, 0] < 20 and not np.isnan(between[:, 1]).any()
+
+    assert not index.update(["Nairobi"], [-1.2864], [36.8172])
+    assert index.update(["Eldoret"], [0.5143], [35.2698])
+    assert index.cities[index.nearest(0.5, 35.3)[0][0, 0]] == "Eldoret"
+
+
+def test_idw_weights_sum_to_one():
+    weights = idw_weights([[1.0, 2.0], [0.0, 5.0]])
+    assert np.allclose(weights.sum(axis=1), 1)
+    assert weights[1].tolist() == [1.0, 0.0]
+
+
+def test_non_finite_points_are_rejected_and_neighbours_reused():
+    index = StationIndex(*STATIONS)
+    with pytest.raises(ValueError):
+        index.nearest([np.nan, -1.0], [36.8, np.inf], k=2)
+    values = np.array([[20.0], [30.0], [18.0], [16.0]])
+    neighbours = index.nearest([-0.8], [36.5], k=3)
+    assert index.interpolate([-0.8], [36.5], values, neighbours=neighbours) == index.interpolate([-0.8], [36.5], values, k=3)
@@ -0,0 +1,46 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.train_orchestrator import FEATURES, TARGET, Job, build_jobs, run_jobs
+
+
+def test_parallel_training_writes_summary(tmp_path):
+    pytest.importorskip("sklearn")
+    rng = np.random.default_rng(0)
+    n = 300
+    df = pd.DataFrame(rng.normal(size=(n, len(FEATURES))), columns=FEATURES)
+    df[TARGET] = df[FEATURES[0]] * 3 + rng.normal(size=n)
+    df["city"] = np.repeat(["Nakuru", "Eldoret", "Mombasa"], n // 3)
+
+    jobs = build_jobs(df, scopes=("global", "region", "city"), min_rows=50, params={"n_estimators": 5})
+    assert sorted(job.name for job in jobs) == [
+        "city_eldoret", "city_mombasa", "city_nakuru", "global", "region_coast", "region_rift_valley"]
+
+    jobs[0].params["max_depth"] = -1  # Fails on every attempt
+    summary = run_jobs(jobs, str(tmp_path), max_cpus=2, threads_per_job=1, retries=1)
+
+    entries = {entry["name"]: entry for entry in summary["jobs"]}
+    assert entries["global"]["status"] == "failed" and entries["global"]["attempts"] == 2
+    assert all(entries[name]["status"] == "ok" for name in entries if name != "global")
+    assert all(entries[name]["seconds"] > 0 for name in entries if name != "global")
+    assert (tmp_path / "rf_region_rift_valley.compact" / "meta.json").exists()
+    assert json.loads((tmp_path / "training_summary.json").read_text())["threads_per_job"] == 1
+
+
+class _KillsWorker:
+    # Unpickling this in the worker process exits it, breaking the pool
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def test_broken_pool_marks_jobs_failed(tmp_path):
+    pytest.importorskip("sklearn")
+    job = Job("crash", "city", _KillsWorker(), np.zeros(10))
+    summary = run_jobs([job], str(tmp_path), max_cpus=1, retries=1)
+    entry = summary["jobs"][0]
+    assert entry["status"] == "failed" and entry["attempts"] == 2
+    assert "BrokenProcessPool" in entry["error"]
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.response_cache import ResponseCache
+from app.weather_data import fetch_weather_batch
+
+
+def test_fetches_only_stale_cities(tmp_path, fake_api, ingest, sqlite_conn, make_record):
+    now = datetime(2024, 5, 1, 12, 0)
+    fresh = make_record(city="Nairobi", recorded_at=now - timedelta(minutes=5), temperature_c=24.5)
+    stale = dict(fresh, city="Nakuru", recorded_at=now - timedelta(days=2))
+    ingest.insert_weather_data([fresh, stale], conn=sqlite_conn)
+
+    batch = fetch_weather_batch(["Nairobi", "Nakuru", "Eldoret"], conn=sqlite_conn, now=now,
+                                cache=ResponseCache(root=str(tmp_path)))
+    assert fake_api.calls == 2
+
+    assert list(batch["city"]) == ["Nairobi", "Nakuru", "Eldoret"]
+    assert list(batch["source"]) == ["db", "api", "api"]
+    assert batch["temperature_c"][0] == 24.5
+    assert batch["humidity_percent"].dtype == float
+
+
+def test_single_reading_view_keeps_its_dict_when_empty(monkeypatch):
+    import app.weather_data as weather_data
+    from app.ai_model import predict_impact
+
+    monkeypatch.setattr(weather_data, "fetch_weather_batch", lambda: {"city": np.array([], dtype=object)})
+    data = weather_data.fetch_weather_data()
+    assert set(data) == {"temp", "humidity", "wind"}
+    assert predict_impact(data) == "Normal market behavior"
@@ -1,10 +1,24 @@
+import hmac
 import os
-from datetime import datetime, timedelta
+import sys
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv # type: ignore
-from flask import Flask, request, jsonify # type: ignore
+from flask import Flask, Response, request, jsonify, stream_with_context # type: ignore
+import numpy as np
+import pandas as pd # type: ignore
 import requests # type: ignore
 import json
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai-weather-market-app'))
+from app.change_feed import ChangeFeedListener
+from app.ensemble import EnsemblePredictor, Member
+from app.export import EXPORT_COLUMNS, FORMATS, build_query, export, export_schema, load_rf_predictor
+from app.grid_surfaces import REGIONS, load_surface
+from app.negotiation import DataVersion, respond
+from app import profiling
+from app.recent_store import LSTM_SEQ_LENGTH, RecentObservationStore
+from app.spatial import StationIndex
+
 # Load environment variables explicitly from the .env file in ai-weather-market-app directory
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), 'ai-weather-market-app', '.env'))
 
@@ -12,11 +26,166 @@ import h2o
 import json
 
 app = Flask(__name__)
+# Off unless PROFILING_TOKEN / SLOW_REQUEST_MS / PROFILING_SIGNAL are set
+profiling.install_flask(app)
+profiling.install_signal_handler()
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), 'ai-weather-market-app', 'models')
 
 # Initialize H2O and load the trained model at startup
 h2o.init()
-model_path = os.path.join(os.path.dirname(__file__), 'ai-weather-market-app', 'models', 'h2o_automl_model', 'GLM_1_AutoML_1_20250425_144833')
+model_path = os.path.join(MODELS_DIR, 'h2o_automl_model', 'GLM_1_AutoML_1_20250425_144833')
 model = h2o.load_model(model_path)
+model_loaded_at = datetime.now(timezone.utc)
+
+# Input columns in the order the H2O model expects
+EXPECTED_COLUMNS = [
+    "humidity_percent",
+    "wind_speed_kmh",
+    "pressure_hpa",
+    "precipitation_mm",
+    "wind_direction_deg",
+    "uv_index",
+    "air_quality_index",
+    "cloud_cover_percent",
+    "visibility_km",
+    "dew_point_c",
+    "solar_radiation_w_m2",
+    "weather_condition"
+]
+
+# Features of the Random Forest trained by models/train-rf_weather_model.py
+RF_FEATURES = ["humidity_percent", "wind_speed_kmh", "pressure_hpa", "precipitation_mm"]
+
+# LSTM input: the last LSTM_SEQ_LENGTH steps of these columns, as trained by models/train-lstm_weather_model.py
+LSTM_COLUMNS = ["temperature_c", "humidity_percent", "wind_speed_kmh", "pressure_hpa", "precipitation_mm"]
+
+
+def to_h2o_frame(rows):
+    """Build an H2OFrame from input dicts, filling missing columns with None."""
+    df = pd.DataFrame({col: [row.get(col, None) for row in rows] for col in EXPECTED_COLUMNS})
+    # Set weather_condition as categorical with correct categories
+    weather_condition_domain = model._model_json['output']['domains'][-1]  # last column domain
+    df['weather_condition'] = pd.Categorical(df['weather_condition'], categories=weather_condition_domain)
+    return h2o.H2OFrame(df)
+
+
+def h2o_predict(rows):
+    return model.predict(to_h2o_frame(rows)).as_data_frame().iloc[:, 0].to_numpy()
+
+
+def load_recent_store():
+    """Fill the per-city recent-observation buffers from the database, if reachable."""
+    store = RecentObservationStore(capacity=LSTM_SEQ_LENGTH * 3, columns=LSTM_COLUMNS)
+    try:
+        from app.db import connect
+        conn = connect()
+        try:
+            store.load_from_db(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"❌ Could not load recent observations: {e}")
+    return store
+
+
+recent_store = load_recent_store()
+
+
+def load_station_index():
+    """KD-tree over each city's latest latitude/longitude, if the database is reachable."""
+    try:
+        from app.db import connect
+        conn = connect()
+        try:
+            return StationIndex.from_db(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"❌ Could not load station locations: {e}")
+        return StationIndex()
+
+
+station_index = load_station_index()
+
+# Version of the data behind /predict/ensemble and /nearest, bumped by the change feed
+data_version = DataVersion()
+
+
+def refresh_recent(change):
+    """
+    Reload one city's recent observations after ingestion announces new rows
+    for it; a city the station index has not seen yet triggers a rebuild.
+    """
+    from app.db import connect
+    conn = connect()
+    try:
+        recent_store.reload(conn, [change["city"]])
+        if change["city"] not in station_index.locations:
+            station_index.refresh(conn)
+        data_version.bump()
+    finally:
+        conn.close()
+
+
+# CHANGE_FEED: "postgresql" (LISTEN/NOTIFY), "local" (UDP stand-in; writers need CHANGE_FEED_LOCAL=1)
+# or "off" (default), so importing this module from tests or the CLI starts no background thread
+CHANGE_FEED = os.getenv("CHANGE_FEED", "off")
+change_listener = ChangeFeedListener(refresh_recent, source=CHANGE_FEED).start(wait=False) if CHANGE_FEED != "off" else None
+
+
+def lstm_history(row):
+    """A row's explicit `history`, or its city's newest observations from the recent store."""
+    if "history" in row:
+        return row["history"]
+    window = recent_store.window(row.get("city"), LSTM_SEQ_LENGTH)
+    if len(window) < LSTM_SEQ_LENGTH or np.isnan(window).any():
+        raise ValueError("LSTM needs a 'history' or a city with 10 complete recent observations")
+    return window
+
+
+# Random Forest predict(X), from the compact artifact or the joblib model
+rf_predictor = load_rf_predictor(MODELS_DIR)
+
+
+def load_ensemble():
+    """
+    Register every model family whose artifacts exist. Weights come from
+    ENSEMBLE_WEIGHTS (e.g. "h2o_glm=2,random_forest=1,lstm=1"), the
+    per-model timeout in seconds from ENSEMBLE_TIMEOUT.
+    """
+    weights = dict(item.split("=") for item in os.getenv("ENSEMBLE_WEIGHTS", "").split(",") if "=" in item)
+    timeout = float(os.getenv("ENSEMBLE_TIMEOUT", "2.0"))
+    members = [Member("h2o_glm", h2o_predict, float(weights.get("h2o_glm", 1)), timeout)]
+
+    if rf_predictor is not None:
+        def rf_predict(rows):
+            X = np.array([[row.get(col, np.nan) for col in RF_FEATURES] for row in rows], dtype=np.float32)
+            return rf_predictor(X)
+        members.append(Member("random_forest", rf_predict, float(weights.get("random_forest", 1)), timeout))
+
+    tflite_path = os.path.join(MODELS_DIR, 'lstm_weather_model.tflite')
+    scaler_path = os.path.join(MODELS_DIR, 'scaler.save')
+    if os.path.exists(tflite_path) and os.path.exists(scaler_path):
+        import joblib # type: ignore
+        from app.lite_runtime import LiteModel
+        lstm_model = LiteModel(tflite_path)
+        scaler = joblib.load(scaler_path)
+
+        def lstm_predict(rows):
+            # Each row needs the last 10 [temperature, humidity, wind, pressure, precipitation] steps
+            history = np.array([lstm_history(row) for row in rows], dtype=np.float64)
+            history = history.reshape(-1, LSTM_SEQ_LENGTH, len(LSTM_COLUMNS))
+            scaled = scaler.transform(history.reshape(-1, len(LSTM_COLUMNS))).reshape(history.shape)
+            predicted = lstm_model.predict(scaled.astype(np.float32))[:, 0]
+            # The model predicts scaled temperature (column 0)
+            return predicted * scaler.data_range_[0] + scaler.data_min_[0]
+        members.append(Member("lstm", lstm_predict, float(weights.get("lstm", 1)), timeout))
+
+    return EnsemblePredictor(members)
+
+
+ensemble = load_ensemble()
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -29,65 +198,184 @@ def predict():
             return jsonify({"error": "No input data provided"}), 400
 
         # Convert input JSON to H2OFrame with explicit column order and types
-        # Define expected columns in the order the model expects
-        expected_columns = [
-            "humidity_percent",
-            "wind_speed_kmh",
-            "pressure_hpa",
-            "precipitation_mm",
-            "wind_direction_deg",
-            "uv_index",
-            "air_quality_index",
-            "cloud_cover_percent",
-            "visibility_km",
-            "dew_point_c",
-            "solar_radiation_w_m2",
-            "weather_condition"
-        ]
-
-        # Create a list of dicts with all expected columns, filling missing with None
-        row = {}
-        for col in expected_columns:
-            row[col] = input_data.get(col, None)
-
-        import pandas as pd
-
-        # Create pandas DataFrame with expected columns
-        expected_columns = [
-            "humidity_percent",
-            "wind_speed_kmh",
-            "pressure_hpa",
-            "precipitation_mm",
-            "wind_direction_deg",
-            "uv_index",
-            "air_quality_index",
-            "cloud_cover_percent",
-            "visibility_km",
-            "dew_point_c",
-            "solar_radiation_w_m2",
-            "weather_condition"
-        ]
-        data_dict = {col: [input_data.get(col, None)] for col in expected_columns}
-
-        # Set weather_condition as categorical with correct categories
-        weather_condition_domain = model._model_json['output']['domains'][-1]  # last column domain
-        df = pd.DataFrame(data_dict)
-        df['weather_condition'] = pd.Categorical(df['weather_condition'], categories=weather_condition_domain)
-
-        # Convert pandas DataFrame to H2OFrame
-        hf = h2o.H2OFrame(df)
+        with profiling.stage("h2o_frame"):
+            hf = to_h2o_frame([input_data])
 
         # Predict using the loaded model
-        prediction = model.predict(hf)
+        with profiling.stage("h2o_predict"):
+            prediction = model.predict(hf)
 
         # Extract prediction result
         pred_value = prediction.as_data_frame().iloc[0, 0]
 
-        return jsonify({"prediction": pred_value}), 200
+        return respond({"prediction": pred_value}, version=model_path, last_modified=model_loaded_at)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/predict/ensemble', methods=['POST'])
+def predict_ensemble():
+    """
+    Scores one row or a list of rows with every available model in parallel
+    and returns the weighted blend plus each model's output and status.
+    Models that fail or exceed their timeout are left out of the blend. The
+    LSTM uses each row's `history`, or the recent observations of its `city`.
+    """
+    input_data = request.get_json()
+    if not input_data:
+        return jsonify({"error": "No input data provided"}), 400
+    rows = input_data if isinstance(input_data, list) else [input_data]
+
+    result = ensemble.predict(rows)
+    if result["prediction"] is None:
+        return jsonify({"error": "No model produced a prediction", **result}), 503
+    # A degraded result (some members timed out or failed) must not validate as a complete one
+    answered = sorted(name for name, member in result["members"].items() if member["status"] == "ok")
+    return respond(result, version=data_version, last_modified=data_version.modified,
+                   etag_parts=answered)
+
+@app.route('/nearest', methods=['POST'])
+def nearest():
+    """
+    Resolves GPS coordinates to their k nearest stations and an
+    inverse-distance-weighted estimate of the latest readings. Accepts
+    {"points": [[lat, lon], ...], "k": 3} for thousands of points per call.
+    """
+    input_data = request.get_json()
+    if not input_data or not input_data.get("points"):
+        return jsonify({"error": "No points provided"}), 400
+    if not len(station_index):
+        return jsonify({"error": "No station locations available"}), 503
+    try:
+        points = np.asarray(input_data["points"], dtype=np.float64).reshape(-1, 2)
+        k = int(input_data.get("k", 3))
+        idx, distances = station_index.nearest(points[:, 0], points[:, 1], k)
+        latest = np.array([
+            window[-1] if len(window) else np.full(len(LSTM_COLUMNS), np.nan)
+            for window in (recent_store.window(city, 1) for city in station_index.cities)
+        ])
+        estimates = station_index.interpolate(points[:, 0], points[:, 1], latest, neighbours=(idx, distances))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return respond([
+        {
+            "stations": station_index.cities[idx[i]].tolist(),
+            "distance_km": np.round(distances[i], 3).tolist(),
+            "estimate": {c: None if np.isnan(v) else round(float(v), 3) for c, v in zip(LSTM_COLUMNS, estimates[i])},
+        }
+        for i in range(len(points))
+    ], version=data_version, last_modified=data_version.modified)
+
+SURFACE_DIR = os.getenv("SURFACE_DIR", os.path.join(os.path.dirname(__file__), 'ai-weather-market-app', 'data', 'surfaces'))
+_surface = {"mtime": None, "surface": None}
+
+
+def current_surface():
+    """The newest gridded snapshot, re-mapped only when the batch job publishes a new one."""
+    mtime = os.path.getmtime(os.path.join(SURFACE_DIR, "latest.json"))
+    if mtime != _surface["mtime"]:
+        _surface["surface"], _surface["mtime"] = load_surface(SURFACE_DIR), mtime
+    return _surface["surface"]
+
+
+@app.route('/grid', methods=['GET'])
+def grid():
+    """
+    Serves a slice of the latest interpolated surface, by county/region name
+    (?region=Laikipia) or bounding box (?bbox=south,north,west,east), for
+    one or more ?variable= layers.
+    """
+    try:
+        surface = current_surface()
+    except FileNotFoundError:
+        return jsonify({"error": "No gridded surface available yet"}), 503
+
+    region = request.args.get("region", "Kenya")
+    if "bbox" in request.args:
+        try:
+            bounds = tuple(float(v) for v in request.args["bbox"].split(","))
+        except ValueError:
+            bounds = ()
+        if len(bounds) != 4 or not all(np.isfinite(bounds)) or bounds[0] >= bounds[1] or bounds[2] >= bounds[3]:
+            return jsonify({"error": "bbox must be south,north,west,east"}), 400
+    elif region in REGIONS:
+        bounds = REGIONS[region]
+    else:
+        return jsonify({"error": f"Unknown region '{region}'", "regions": sorted(REGIONS)}), 400
+    variables = request.args.getlist("variable") or surface.variables
+    unknown = [v for v in variables if v not in surface.variables]
+    if unknown:
+        return jsonify({"error": f"Unknown variables {unknown}", "variables": surface.variables}), 400
+
+    lats, lons, slices = surface.region(bounds, variables)
+    created_at = datetime.fromisoformat(surface.meta["created_at"])
+    return respond({
+        "created_at": surface.meta["created_at"],
+        "observed_until": surface.meta.get("observed_until"),
+        "latitudes": lats.tolist(),
+        "longitudes": lons.tolist(),
+        "values": {
+            name: np.where(np.isnan(values), None, np.round(values.astype(float), 2)).tolist()
+            for name, values in slices.items()
+        },
+    }, version=surface.meta["created_at"], last_modified=created_at)
+
+# Bulk exports are off unless a token is configured, and bounded in time
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+EXPORT_MAX_DAYS = int(os.getenv("EXPORT_MAX_DAYS", "92"))
+
+
+@app.route('/export', methods=['GET'])
+def export_data():
+    """
+    Streams weather_data as an Arrow IPC stream (?format=arrow, default) or
+    Parquet (?format=parquet). ?columns=a,b projects columns, ?city= (repeatable)
+    and ?start=/?end= (ISO timestamps, end exclusive) filter rows in the
+    query, and ?predictions=1 adds the Random Forest's rf_prediction.
+    Off unless EXPORT_TOKEN is set; requests need it in X-Export-Token and a
+    start/end range of at most EXPORT_MAX_DAYS (default 92) days.
+    """
+    if not EXPORT_TOKEN:
+        return jsonify({"error": "Export is disabled"}), 503
+    if not hmac.compare_digest(request.headers.get("X-Export-Token", ""), EXPORT_TOKEN):
+        return jsonify({"error": "Invalid export token"}), 403
+    fmt = request.args.get("format", "arrow")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(FORMATS)}"}), 400
+    columns = request.args["columns"].split(",") if request.args.get("columns") else list(EXPORT_COLUMNS)
+    cities = request.args.getlist("city") or None
+    try:
+        start = datetime.fromisoformat(request.args["start"])
+        end = datetime.fromisoformat(request.args["end"])
+        if not timedelta(0) < end - start <= timedelta(days=EXPORT_MAX_DAYS):
+            raise ValueError(f"end must be after start and at most {EXPORT_MAX_DAYS} days later")
+        build_query(columns)
+        export_schema(columns)
+    except KeyError:
+        return jsonify({"error": "start and end are required"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+    predictor = None
+    if request.args.get("predictions") in ("1", "true"):
+        if rf_predictor is None:
+            return jsonify({"error": "No Random Forest model available"}), 503
+        predictor = rf_predictor
+
+    def generate():
+        from app.db import connect
+        conn = connect()
+        try:
+            yield from export(conn, fmt, columns, cities, start, end, predictor)
+        finally:
+            conn.close()
+
+    extension = "parquet" if fmt == "parquet" else "arrow"
+    return Response(stream_with_context(generate()), mimetype=FORMATS[fmt],
+                    headers={"Content-Disposition": f"attachment; filename=weather_export.{extension}"})
+
 if __name__ == '__main__':
     port = int(os.getenv("PORT", 5000))
     app.run(debug=True, port=port)
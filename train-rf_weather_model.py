@@ -1,4 +1,6 @@
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ai-weather-market-app"))
 import psycopg2 # type: ignore
 import pandas as pd # type: ignore
 import numpy as np
@@ -48,7 +50,11 @@ SELECT
     dew_point_c,
     solar_radiation_w_m2,
     sunrise_time,
-    sunset_time
+    sunset_time,
+    latitude,
+    longitude,
+    recorded_at,
+    city
 FROM weather_data
 WHERE temperature_c IS NOT NULL
 ORDER BY recorded_at;
@@ -57,6 +63,16 @@ ORDER BY recorded_at;
 df = pd.read_sql(query, conn)
 print(f"[INFO] Retrieved {len(df)} records from database")
 
+# Compute sunrise/sunset and clear-sky radiation locally where the API gave none
+from app.solar import fill_solar_frame
+df = fill_solar_frame(df).drop(columns=["latitude", "longitude", "recorded_at"])
+
+# Snapshot feature distributions and null rates for the ingest drift monitor
+# (overall and per city; this trainer's features get their own snapshot file)
+from app.drift_monitor import RF_FULL_SNAPSHOT, build_snapshot, save_snapshot
+save_snapshot(build_snapshot(df), RF_FULL_SNAPSHOT)
+df = df.drop(columns=["city"])
+
 # Handle missing values
 df.dropna(inplace=True)
 print(f"[INFO] After dropping nulls: {len(df)} records remain")
@@ -97,3 +113,14 @@ import joblib # type: ignore
 model_path = os.path.join(os.path.dirname(__file__), "rf_weather_model.joblib")
 joblib.dump(best_model, model_path)
 print(f"[INFO] Best Random Forest model saved to {model_path}")
+
+# Write compact memory-mappable artifacts and record size/accuracy deltas
+from app.model_compaction import compact_forest, compaction_report, save_compact
+compact_path = os.path.join(os.path.dirname(__file__), "rf_weather_model.compact")
+save_compact(compact_forest(best_model), compact_path, compress=True)
+report = compaction_report(best_model, model_path, compact_path, X_test, y_test,
+                           report_path=compact_path + ".report.json")
+print(f"[INFO] Compact model saved to {compact_path}: "
+      f"{report['original_bytes'] / 2**20:.1f} MiB -> {report['compact_bytes'] / 2**20:.1f} MiB "
+      f"({report['compressed_bytes'] / 2**20:.1f} MiB compressed), "
+      f"test MSE {report['original_mse']:.4f} -> {report['compact_mse']:.4f}")